@@ -11,6 +11,9 @@ from Server.routes.chatbot import chatbot_bp
 from Server.routes.board import board_bp
 from Server.routes.settings import settings_bp 
 from Server.routes.auth import auth_bp 
+from Server.routes.health import health_bp
+from urlbert.urlbert2.config import WARMUP_ON_START
+from urlbert.urlbert2.core.warmup import start_background_warmup
 
 
 app = Flask(__name__) 
@@ -105,6 +108,11 @@ app.register_blueprint(chatbot_bp)                 # ❌ url_prefix 제거
 app.register_blueprint(settings_bp)                # ❌ url_prefix 제거
 app.register_blueprint(board_bp)
 app.register_blueprint(auth_bp) 
+app.register_blueprint(health_bp)                  # /healthz, /readyz
+
+# ✅ URLBERT는 첫 분석 때 지연 로드 — 옵션으로 백그라운드 워밍업(/readyz로 상태 확인)
+if WARMUP_ON_START:
+    start_background_warmup()
 
 if __name__ == "__main__": 
     app.run(host="0.0.0.0", port=5000,debug=True, use_reloader=False, threaded=True)
\ No newline at end of file
@@ -7,6 +7,7 @@ import traceback
 
 #모델 파이프라인을 그대로 사용
 from bot.qr_analysis import get_analysis_for_qr_scan
+from bot.verdict_cache import verdict_cache
 
 analyze_bp = Blueprint("analyze", __name__, url_prefix="/analyze")
 
@@ -48,9 +49,13 @@ def analyze():
         effective_id = user_id if is_logged_in else guest_id
         is_non_member_mode = not is_logged_in
 
+        # 0) 판정 캐시 HIT → DB 왕복 없이 아래 DB HIT 경로로 응답
+        cached = verdict_cache.get(url)
+        source = "cache" if cached is not None else "db"
+
         # 1) DB HIT
-        if UrlBertDAO.exists(url):
-            result = UrlBertDAO.find_by_url(url)
+        if cached is not None or UrlBertDAO.exists(url):
+            result = cached if cached is not None else UrlBertDAO.find_by_url(url)
 
             if not result:
                 # 실패 → 저장 안 함
@@ -63,7 +68,7 @@ def analyze():
                     "created": "-",
                     "expiry": "-",
                     "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                    "source": "db"
+                    "source": source
                 }), 200
 
             label = (result.get("label") or "").upper()
@@ -77,9 +82,12 @@ def analyze():
                     "created": str(result.get("created_date") or "-"),
                     "expiry": str(result.get("expiry_date") or "-"),
                     "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                    "source": "db"
+                    "source": source
                 }), 200
 
+            if cached is None:
+                verdict_cache.put(url, result)
+
             # 게스트 5개 제한(저장 시도할 때만)
             if is_non_member_mode and effective_id:
                 if not HistoryDAO.can_guest_save_more(effective_id):
@@ -88,7 +96,7 @@ def analyze():
                         "message": "비회원은 최근 5개의 기록만 저장됩니다. 더 많은 정보를 원하시면 로그인하세요.",
                         "result": label,
                         "confidence": result.get("confidence"),  # 팝업에도 같이 내려줌
-                        "source": "db"
+                        "source": source
                     }), 200
 
             # 히스토리 저장
@@ -107,7 +115,7 @@ def analyze():
                 "created": str(result.get("created_date") or "-"),
                 "expiry": str(result.get("expiry_date") or "-"),
                 "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                "source": "db"
+                "source": source
             }), 200
 
         # 2) DB MISS → 모델 실행
@@ -115,10 +123,14 @@ def analyze():
             model_out = get_analysis_for_qr_scan(url)  # 내부에서 urlbert DB upsert 수행(성공 시)
             label_from_model = (model_out.get("label") or "").upper()  # MALICIOUS / LEGITIMATE
             conf_from_model = model_out.get("confidence")              # 그대로 사용
+            incomplete = bool(model_out.get("incomplete"))             # 마감 시간 안에 헤더를 못 받음
+            model_name = model_out.get("model")                        # urlbert / lexical(캐스케이드 1단계)
         except Exception as e:
             current_app.logger.exception(f"모델 호출 실패: {e}")
             label_from_model = "FAILED"
             conf_from_model = None
+            incomplete = False
+            model_name = None
 
         if label_from_model not in ("MALICIOUS", "LEGITIMATE"):
             # 모델 실패 → 저장 안 하고 FAILED 반환
@@ -160,7 +172,9 @@ def analyze():
             "created": "-",
             "expiry": "-",
             "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "source": "model"
+            "source": "model",
+            "incomplete": incomplete,
+            "model": model_name
         }), 200
 
     except Exception:
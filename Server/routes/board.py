@@ -4,6 +4,8 @@ from Server.models.board_dao import BoardDAO
 from Server.models.user_dao import UserDAO
 from Server.models.urlbert_dao import UrlBertDAO # UrlBertDAO 임포트 (3-2-1용)
 from bot.qr_analysis import get_analysis_for_qr_scan 
+from bot.lexical_cascade import LEXICAL_MODEL
+from bot.verdict_cache import verdict_cache
 
 board_bp = Blueprint("board", __name__, url_prefix="/board")
 
@@ -13,13 +15,18 @@ def _get_analysis_for_report(url: str) -> dict:
     기존 /analyze 로직을 참조하되, 히스토리 저장이나 세션 관리는 제외합니다.
     """
     
+    # 0. 판정 캐시 HIT (프로세스 메모리, DB 조회 없음)
+    cached = verdict_cache.get(url)
+
     # 1. DB HIT (캐시 조회)
-    if UrlBertDAO.exists(url):
-        result = UrlBertDAO.find_by_url(url)
+    if cached is not None or UrlBertDAO.exists(url):
+        result = cached if cached is not None else UrlBertDAO.find_by_url(url)
 
         if result and (result.get("label") in ("MALICIOUS", "LEGITIMATE")):
             label = (result.get("label") or "FAILED").upper()
             confidence = result.get("confidence")
+            if cached is None:
+                verdict_cache.put(url, result)
             
             # DB 캐시 결과를 프론트엔드 형식에 맞춤
             text_result = f"DB 캐시: **{label}**로 판별됨 (신뢰도: {confidence*100:.1f}%)" if confidence else f"DB 캐시: **{label}**로 판별됨"
@@ -28,7 +35,7 @@ def _get_analysis_for_report(url: str) -> dict:
                 "is_malicious": 1 if label == "MALICIOUS" else 0,
                 "confidence": confidence,
                 "text_result": text_result,
-                "source": "db"
+                "source": "cache" if cached is not None else "db"
             }
 
     # 2. DB MISS → 모델 실행
@@ -54,7 +61,8 @@ def _get_analysis_for_report(url: str) -> dict:
             "source": "model"
         }
         
-    text_result = f"URLBERT 모델: **{label}**로 판별됨 (신뢰도: {confidence*100:.1f}%)"
+    model_name = "URL 문자열 모델(1단계)" if model_out.get("model") == LEXICAL_MODEL else "URLBERT 모델"
+    text_result = f"{model_name}: **{label}**로 판별됨 (신뢰도: {confidence*100:.1f}%)"
     
     return {
         "is_malicious": 1 if label == "MALICIOUS" else 0,
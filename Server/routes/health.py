@@ -0,0 +1,59 @@
+# routes/health.py
+from flask import Blueprint, jsonify
+
+from urlbert.urlbert2.core.warmup import readiness
+from bot.lexical_cascade import cascade_stats
+from bot.verdict_cache import verdict_cache
+from bot.whois_cache import whois_cache
+from bot.whois_breaker import whois_breaker
+from bot.add_ssl import ssl_probe
+from urlbert.urlbert2.core.dns_cache import dns_cache
+from urlbert.urlbert2.core.page_fetcher import page_cache
+
+health_bp = Blueprint("health", __name__)
+
+# 프로세스 생존 여부 (모델 상태와 무관)
+@health_bp.route("/healthz", methods=["GET"])
+def healthz():
+    return jsonify({"status": "ok"}), 200
+
+# 로드 밸런서용: 모델이 로드/워밍업되어 분석 요청을 받을 수 있을 때만 200
+@health_bp.route("/readyz", methods=["GET"])
+def readyz():
+    state = readiness()
+    return jsonify(state), (200 if state["ready"] else 503)
+
+# 2단계 캐스케이드 집계 (단축 처리 비율, URLBERT와의 일치율)
+@health_bp.route("/metrics/cascade", methods=["GET"])
+def cascade_metrics():
+    return jsonify(cascade_stats()), 200
+
+# 판정 캐시 적중률 / 크기
+@health_bp.route("/metrics/verdict-cache", methods=["GET"])
+def verdict_cache_metrics():
+    return jsonify(verdict_cache.stats()), 200
+
+# WHOIS 디스크 캐시 적중률 (이 워커 프로세스 기준) / 저장된 도메인 수
+@health_bp.route("/metrics/whois-cache", methods=["GET"])
+def whois_cache_metrics():
+    return jsonify(whois_cache.stats()), 200
+
+# TLD별 WHOIS 서킷 브레이커 상태 (open/half_open 서버, 실패·거절 횟수, 동시 조회 수)
+@health_bp.route("/metrics/whois-breaker", methods=["GET"])
+def whois_breaker_metrics():
+    return jsonify(whois_breaker.stats()), 200
+
+# SSL 인증서 캐시 적중률 / 실제 연결 수 / 동시 조회 합치기 횟수
+@health_bp.route("/metrics/ssl-cache", methods=["GET"])
+def ssl_cache_metrics():
+    return jsonify(ssl_probe.stats()), 200
+
+# 공용 DNS 캐시 적중률 (실패 캐시 포함), 실제 조회 수, 리졸버 종류
+@health_bp.route("/metrics/dns-cache", methods=["GET"])
+def dns_cache_metrics():
+    return jsonify(dns_cache.stats()), 200
+
+# 페이지 수집 재사용률 (헤더 추출과 크롤링이 같은 응답을 쓴 비율), 캐시된 본문 크기
+@health_bp.route("/metrics/page-cache", methods=["GET"])
+def page_cache_metrics():
+    return jsonify(page_cache.stats()), 200
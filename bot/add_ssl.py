@@ -1,30 +1,212 @@
+import os
 import ssl
 import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
 from datetime import datetime
 
+from urlbert.urlbert2.core.dns_cache import dns_cache
+
+# SSL 인증서 정보 수집
+# - 검증용 SSLContext(시스템 CA 번들)는 프로세스에서 한 번만 만들어 재사용합니다.
+# - 결과는 호스트명 단위로 캐시하며, 인증서 notAfter 와 SSL_CACHE_TTL_SECONDS 중 이른 시각에 만료됩니다.
+#   연결/검증 실패는 SSL_NEGATIVE_TTL_SECONDS 동안만 캐시하고, 시간 초과는 캐시하지 않습니다.
+# - 같은 호스트를 동시에 조회하면 한 번만 연결하고 결과를 나눠 씁니다.
+# - 여러 호스트는 ssl_probe.probe_many()로 한꺼번에 조회합니다.
+# - 주소는 프로세스 공용 DNS 캐시로 풀고, 풀리지 않는 호스트는 연결하지 않습니다.
+SSL_CACHE_SIZE = int(os.getenv("SSL_CACHE_SIZE", "10000"))
+SSL_CACHE_TTL_SECONDS = float(os.getenv("SSL_CACHE_TTL_SECONDS", str(24 * 3600)))
+SSL_NEGATIVE_TTL_SECONDS = float(os.getenv("SSL_NEGATIVE_TTL_SECONDS", "300"))
+SSL_BATCH_WORKERS = int(os.getenv("SSL_BATCH_WORKERS", "30"))
+
+_EMPTY = (None, None)
+
+
+class SslProbe:
+    """공유 SSLContext + 호스트별 인증서 캐시(LRU + 만료) + 동시 조회 합치기."""
+
+    def __init__(self, maxsize: int = SSL_CACHE_SIZE, ttl_seconds: float = SSL_CACHE_TTL_SECONDS,
+                 negative_ttl_seconds: float = SSL_NEGATIVE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self.negative_ttl = negative_ttl_seconds
+        self._context = None
+        self._data = OrderedDict()   # hostname -> (만료 시각(time.time), (period, issuer))
+        self._inflight = {}          # hostname -> Future
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "coalesced": 0,
+                          "probes": 0, "failures": 0, "timeouts": 0}
+
+    @property
+    def context(self) -> ssl.SSLContext:
+        # create_default_context()는 매번 CA 번들을 다시 읽으므로 한 번만 만듭니다. (wrap_socket은 스레드 안전)
+        if self._context is None:
+            with self._lock:
+                if self._context is None:
+                    self._context = ssl.create_default_context()
+        return self._context
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._counters[key] += n
+
+    def _connect(self, hostname: str, timeout: float) -> socket.socket:
+        # DNS와 연결을 합쳐 timeout 안에 끝냅니다. 주소가 여러 개면 차례로 시도합니다.
+        started = time.monotonic()
+        addresses = dns_cache.resolve(hostname, timeout)
+        if not addresses:
+            if dns_cache.peek(hostname) is None:
+                raise socket.timeout("DNS timed out")  # 조회가 아직 진행 중 (캐시하지 않음)
+            raise OSError(f"DNS lookup failed: {hostname}")
+        error = None
+        for family, ip in addresses:
+            remaining = timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                raise socket.timeout("timed out")
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.settimeout(remaining)
+            try:
+                sock.connect((ip, 443))
+                return sock
+            except OSError as e:
+                sock.close()
+                error = e
+        raise error
+
+    def _fetch(self, hostname: str, timeout: float):
+        """((period, issuer), 캐시 만료 시각 또는 None(캐시 안 함))"""
+        self._count("probes")
+        now = time.time()
+        try:
+            with self._connect(hostname, timeout) as raw:
+                with self.context.wrap_socket(raw, server_hostname=hostname) as s:
+                    cert = s.getpeercert()
+
+            not_before = datetime.strptime(cert['notBefore'], "%b %d %H:%M:%S %Y %Z")
+            not_after  = datetime.strptime(cert['notAfter'],  "%b %d %H:%M:%S %Y %Z")
+            period     = (not_after - not_before).days
+            issuer     = " ".join([entry[0][1] for entry in cert.get('issuer', [])])
+            expires_at = min(now + self.ttl, ssl.cert_time_to_seconds(cert['notAfter']))
+            return (period, issuer), expires_at
+        except socket.timeout:
+            # 느린 서버인지 마감 시간 때문인지 알 수 없으므로 캐시하지 않습니다.
+            self._count("timeouts")
+            return _EMPTY, None
+        except Exception:
+            # 연결 거부, 인증서 검증 실패, 포맷 오류 등
+            self._count("failures")
+            return _EMPTY, now + self.negative_ttl
+
+    def _get_cached(self, hostname: str):
+        with self._lock:
+            entry = self._data.get(hostname)
+            if entry is not None and entry[0] <= time.time():
+                del self._data[hostname]
+                self._counters["expired"] += 1
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._data.move_to_end(hostname)
+            self._counters["hits"] += 1
+            return entry[1]
+
+    def _put(self, hostname: str, value, expires_at):
+        if expires_at is None or expires_at <= time.time() or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[hostname] = (expires_at, value)
+            self._data.move_to_end(hostname)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def probe(self, hostname: str, timeout: float = 3):
+        """(period, issuer). 실패하면 (None, None). timeout: 연결/핸드셰이크 대기 시간(초)"""
+        hostname = (hostname or "").strip().rstrip(".").lower()
+        if not hostname:
+            return _EMPTY
+        cached = self._get_cached(hostname)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            future = self._inflight.get(hostname)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[hostname] = future
+            else:
+                self._counters["coalesced"] += 1
+        if not owner:
+            # 먼저 시작한 조회를 기다리되, 내 timeout보다 오래 기다리지는 않습니다.
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeout:
+                return _EMPTY
+
+        try:
+            value, expires_at = self._fetch(hostname, timeout)
+            self._put(hostname, value, expires_at)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(hostname, None)
+
+    def probe_many(self, hostnames, timeout: float = 3, max_workers: int = SSL_BATCH_WORKERS, progress=None) -> dict:
+        """
+        여러 호스트를 동시에 조회해 {hostname: (period, issuer)}를 반환합니다. (중복/빈 값 제외, 캐시에 있는 호스트는 연결하지 않음)
+        progress: 호스트 하나가 끝날 때마다 호출할 함수 (예: tqdm.update)
+        """
+        todo = list(dict.fromkeys(h for h in hostnames if isinstance(h, str) and h))
+        results = {}
+        if todo:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(todo))),
+                                    thread_name_prefix="ssl-probe") as executor:
+                future_map = {executor.submit(self.probe, h, timeout): h for h in todo}
+                for fut in as_completed(future_map):
+                    results[future_map[fut]] = fut.result()
+                    if progress is not None:
+                        progress(1)
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._counters)
+            out["size"] = len(self._data)
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = out["hits"] / lookups if lookups else 0.0
+        out["maxsize"] = self.maxsize
+        out["ttl_seconds"] = self.ttl
+        out["negative_ttl_seconds"] = self.negative_ttl
+        return out
+
+
+# 프로세스 전체에서 공유하는 SSL 조회기
+ssl_probe = SslProbe()
+
+
 # SSL 인증서 정보 추출 함수
 # 단일 호스트명에 대해 인증서 유효기간(일)과 발급기관을 반환
 # 임포트 시 바로 실행되지 않고, 필요한 곳에서만 호출됩니다.
-def get_ssl_cert_info(hostname: str):
-    try:
-        ctx = ssl.create_default_context()
-        with ctx.wrap_socket(socket.socket(), server_hostname=hostname) as s:
-            s.settimeout(3)
-            s.connect((hostname, 443))
-            cert = s.getpeercert()
-
-        not_before = datetime.strptime(cert['notBefore'], "%b %d %H:%M:%S %Y %Z")
-        not_after  = datetime.strptime(cert['notAfter'],  "%b %d %H:%M:%S %Y %Z")
-        period     = (not_after - not_before).days
-        issuer     = " ".join([entry[0][1] for entry in cert.get('issuer', [])])
-        return hostname, period, issuer
-    except Exception:
-        # 연결 실패나 포맷 오류 시 None으로 채웁니다
-        return hostname, None, None
+# timeout: 연결/핸드셰이크 대기 시간(초). 요청 마감 시간이 있으면 호출부가 남은 시간으로 줄여서 넘깁니다.
+def get_ssl_cert_info(hostname: str, timeout: float = 3):
+    # 연결 실패나 포맷 오류 시 None으로 채웁니다
+    period, issuer = ssl_probe.probe(hostname, timeout)
+    return hostname, period, issuer
 
 if __name__ == "__main__":
     import pandas as pd
-    from concurrent.futures import ThreadPoolExecutor, as_completed
     from urllib.parse import urlparse
     from tqdm import tqdm
 
@@ -41,12 +223,8 @@ if __name__ == "__main__":
     hostnames = df['hostname'].dropna().unique().tolist()
 
     # 3) 병렬로 SSL 정보 수집
-    results = {}
-    with ThreadPoolExecutor(max_workers=30) as executor:
-        future_map = {executor.submit(get_ssl_cert_info, h): h for h in hostnames}
-        for fut in tqdm(as_completed(future_map), total=len(future_map), desc="Fetching SSL info"):
-            hostname, days, issuer = fut.result()
-            results[hostname] = (days, issuer)
+    with tqdm(total=len(hostnames), desc="Fetching SSL info") as bar:
+        results = ssl_probe.probe_many(hostnames, progress=bar.update)
 
     # 4) 결과 매핑
     df['cert_total_days'] = df['hostname'].map(lambda h: results.get(h, (None,None))[0])
@@ -55,4 +233,4 @@ if __name__ == "__main__":
     # 5) 불필요 컬럼 제거 및 저장
     df.drop(columns=['hostname'], inplace=True)
     df.to_csv(OUTPUT_CSV, index=False)
-    print(f"✅ SSL features saved to {OUTPUT_CSV}")
\ No newline at end of file
+    print(f"✅ SSL features saved to {OUTPUT_CSV}")
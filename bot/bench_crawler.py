@@ -0,0 +1,165 @@
+# bot/bench_crawler.py
+# 크롤링 지표(extUrlRatio, externalAnchorRatio, invalidAnchorRatio) 계산 비교
+#   legacy: BeautifulSoup(html.parser)로 전체 트리를 만든 뒤 find_all
+#   stream: feature_crawler.crawler_ratios (HTMLParser 이벤트로 태그 수만 셈, 조각 단위 디코딩)
+#
+# 사용 예 (저장소 루트에서 실행):
+#   python -m bot.bench_crawler --corpus saved_pages/pages.csv
+#   python -m bot.bench_crawler --synthetic 200 --repeat 3
+# --corpus CSV 는 'url', 'path'(CSV 기준 상대 경로) 컬럼이 필수이고 'content_type' 컬럼은 선택입니다.
+# 페이지마다 두 결과가 같은지 확인하고, 총 소요 시간과 페이지당 최대 할당량(tracemalloc)을 출력합니다.
+# 결과가 다른 페이지가 있으면 종료 코드 1을 반환합니다.
+import argparse
+import csv
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+from urllib.parse import urlparse, urljoin
+
+from bot.feature_crawler import (
+    CRAWLER_MAX_PARSE_BYTES, crawler_ratios, is_external, is_invalid_href, _charset
+)
+
+
+def legacy_ratios(body: bytes, url: str, content_type: str = None) -> dict:
+    """기존 analyze_url_entry의 계산 그대로 (BeautifulSoup 트리)."""
+    soup = BeautifulSoup(body or b"", 'html.parser', from_encoding=_charset(content_type))
+    base_domain = urlparse(url).netloc
+
+    external_resources = 0
+    total_resources = 0
+    for script in soup.find_all('script', src=True):
+        total_resources += 1
+        if is_external(base_domain, script['src']):
+            external_resources += 1
+    for link in soup.find_all('link', href=True):
+        total_resources += 1
+        if is_external(base_domain, link['href']):
+            external_resources += 1
+    ext_url_ratio = external_resources / total_resources if total_resources else 0
+
+    anchor_tags = soup.find_all('a')
+    total_anchors = len(anchor_tags)
+    external_anchors = 0
+    invalid_anchors = 0
+    for a in anchor_tags:
+        href = a.get('href')
+        if is_invalid_href(href):
+            invalid_anchors += 1
+        elif is_external(base_domain, urljoin(url, href)):
+            external_anchors += 1
+
+    return {
+        'extUrlRatio':         round(ext_url_ratio, 3),
+        'externalAnchorRatio': round(external_anchors / total_anchors if total_anchors else 0, 3),
+        'invalidAnchorRatio':  round(invalid_anchors / total_anchors if total_anchors else 0, 3),
+    }
+
+
+def stream_ratios(body: bytes, url: str, content_type: str = None) -> dict:
+    return crawler_ratios(body, url, content_type)
+
+
+MODES = {"legacy": legacy_ratios, "stream": stream_ratios}
+
+
+def load_corpus(csv_path: str, limit: int = None) -> list:
+    """[(url, body, content_type)]"""
+    root = os.path.dirname(os.path.abspath(csv_path))
+    pages = []
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if 'url' not in row or 'path' not in row:
+                raise ValueError("CSV에 'url', 'path' 컬럼이 필요합니다.")
+            with open(os.path.join(root, row['path']), 'rb') as page:
+                pages.append((row['url'], page.read(), row.get('content_type') or None))
+            if limit and len(pages) >= limit:
+                break
+    return pages
+
+
+_SNIPPETS = [
+    '<a href="#">menu</a>', '<a href="javascript:void(0)">x</a>', '<a href="javascript:;">y</a>', '<a>no href</a>',
+    '<a href>empty</a>', '<a href="/login">login</a>', '<a href="https://{own}/account">acc</a>',
+    '<a href="http://evil-{n}.com/verify">verify</a>', '<a href="//cdn{n}.example.net/x">cdn</a>',
+    '<A HREF="HTTP://Upper.COM/">upper</A>', '<a href="a" href="http://dup.com/">dup</a>',
+    '<script src="http://cdn.other.com/{n}.js"></script>', '<script src="/static/{n}.js"></script>',
+    '<script src></script>', '<script>var s = "<a href=\'http://inside.js\'>";</script>',
+    '<link rel="stylesheet" href="https://fonts.example.org/{n}.css">', '<link href="/s{n}.css"/>',
+    '<link rel="icon">', '<!-- <a href="http://commented.com/">c</a> -->',
+    '<div class="form"><form action="http://collect.bad/post"><input name="pw"></form></div>',
+    '<img src="http://img.other.com/{n}.png">', '<p>로그인이 필요합니다 &amp; 확인</p>',
+    '<a href="http://{own}.evil.com/">lookalike</a>', '<style>a[href="#"]{{color:red}}</style>',
+]
+
+
+def synthetic_corpus(n: int, seed: int = 0) -> list:
+    """저장된 페이지가 없을 때 쓰는 피싱 키트 비슷한 페이지들 (크기 수 KB ~ 약 1 MB)."""
+    rng = random.Random(seed)
+    pages = []
+    for i in range(n):
+        own = f"bank{i}.co.kr"
+        parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>로그인</title>']
+        for _ in range(int(rng.expovariate(1 / 800)) + 5):
+            parts.append(rng.choice(_SNIPPETS).format(own=own, n=rng.randint(0, 99)))
+        if i % 7 == 0:
+            parts.append('<a href="http://trunc.com/' + 'x' * 50)  # 닫히지 않은 태그로 끝남
+        else:
+            parts.append('</body></html>')
+        pages.append((f"https://{own}/login?i={i}", "".join(parts).encode("utf-8"), "text/html; charset=utf-8"))
+    return pages
+
+
+def run_mode(fn, pages: list, repeat: int):
+    results = [fn(body, url, ctype) for url, body, ctype in pages]   # 첫 호출(임포트/워밍업)은 측정에서 뺌
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for url, body, ctype in pages:
+            fn(body, url, ctype)
+    elapsed = time.perf_counter() - start
+
+    peak = 0
+    tracemalloc.start()
+    for url, body, ctype in pages:
+        tracemalloc.reset_peak()
+        fn(body, url, ctype)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    return results, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="크롤링 지표 계산: BeautifulSoup vs 스트리밍 파서")
+    parser.add_argument("--corpus", help="저장된 페이지 목록 CSV (url, path[, content_type])")
+    parser.add_argument("--synthetic", type=int, default=100, help="--corpus가 없을 때 만들 페이지 수")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus, args.limit) if args.corpus else synthetic_corpus(args.synthetic)
+    total_bytes = sum(len(body) for _, body, _ in pages)
+    over_limit = sum(1 for _, body, _ in pages if CRAWLER_MAX_PARSE_BYTES > 0 and len(body) > CRAWLER_MAX_PARSE_BYTES)
+    print(f"pages={len(pages)} bytes={total_bytes / 1e6:.1f}MB repeat={args.repeat} "
+          f"max_parse_bytes={CRAWLER_MAX_PARSE_BYTES} (초과 페이지 {over_limit}개는 결과가 다를 수 있음)")
+
+    measured = {}
+    for mode, fn in MODES.items():
+        results, elapsed, peak = run_mode(fn, pages, args.repeat)
+        measured[mode] = results
+        per_page_ms = elapsed / max(1, len(pages) * args.repeat) * 1000
+        print(f"{mode:>6}: {elapsed:.2f}s  ({per_page_ms:.2f} ms/page, "
+              f"{total_bytes * args.repeat / elapsed / 1e6:.1f} MB/s)  peak alloc/page {peak / 1e6:.1f}MB")
+
+    mismatches = [(url, a, b) for (url, _, _), a, b in zip(pages, measured["legacy"], measured["stream"]) if a != b]
+    print(f"identical: {len(pages) - len(mismatches)}/{len(pages)}")
+    for url, a, b in mismatches[:10]:
+        print(f"  ≠ {url}\n    legacy={a}\n    stream={b}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
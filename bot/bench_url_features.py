@@ -0,0 +1,125 @@
+# bot/bench_url_features.py
+# URL 어휘 피처 계산 비교
+#   scalar: processed_feature.extract_url_features_minimal 을 URL마다 호출한 뒤 DataFrame으로 묶음
+#   batch:  processed_feature.extract_url_features_batch (numpy 벡터화, 예외 URL만 스칼라 함수로 계산)
+#
+# 사용 예 (저장소 루트에서 실행):
+#   python -m bot.bench_url_features --csv bot/final_dataset.csv --limit 100000
+#   python -m bot.bench_url_features --synthetic 200000 --repeat 3
+# --csv 는 'url' 컬럼이 필요합니다.
+# URL·컬럼마다 두 결과가 같은지 확인하고 초당 처리 URL 수를 출력합니다.
+# 결과가 다른 값이 있으면 종료 코드 1을 반환합니다.
+import argparse
+import random
+import sys
+import time
+
+import pandas as pd
+
+from bot.processed_feature import (
+    BRAND_LIST, FEATURE_COLUMNS, PHISHING_KEYWORDS, SHORTENING_SERVICES,
+    extract_url_features_batch, extract_url_features_minimal
+)
+
+
+def scalar_features(urls: list) -> pd.DataFrame:
+    return pd.DataFrame([extract_url_features_minimal(u) for u in urls], columns=FEATURE_COLUMNS)
+
+
+def batch_features(urls: list) -> pd.DataFrame:
+    return extract_url_features_batch(urls)
+
+
+MODES = {"scalar": scalar_features, "batch": batch_features}
+
+
+def load_urls(csv_path: str, limit: int = None) -> list:
+    df = pd.read_csv(csv_path, usecols=["url"], nrows=limit)
+    return df["url"].astype(str).tolist()
+
+
+_TLDS = [".com", ".co.kr", ".net", ".org", ".kr", ".tk", ".ml", ".io", ".xn--3e0b707e"]
+_WORDS = ["login", "verify", "account", "secure", "update", "index", "board", "news", "event", "shop", "mail"]
+
+
+def synthetic_urls(n: int, seed: int = 0) -> list:
+    """CSV가 없을 때 쓰는 정상/피싱 비슷한 URL들 (일부는 IP, 단축 URL, 포트, 인코딩, 한글 포함)."""
+    rng = random.Random(seed)
+    names = BRAND_LIST + ["nave", "g00gle", "kakaoo", "amaz0n", "bank-secure", "my-app", "shop24"]
+    urls = []
+    for i in range(n):
+        kind = rng.random()
+        if kind < 0.05:
+            host = ".".join(str(rng.randint(0, 255)) for _ in range(4))
+        elif kind < 0.10:
+            host = rng.choice(SHORTENING_SERVICES)
+        else:
+            sub = rng.choice(["", "www.", "m.", "login.", "secure.account."])
+            host = sub + rng.choice(names) + rng.choice(["", "-" + rng.choice(PHISHING_KEYWORDS)]) + rng.choice(_TLDS)
+        if rng.random() < 0.1:
+            host += ":" + str(rng.choice([80, 443, 8080]))
+        path = "/".join(rng.choice(_WORDS) for _ in range(rng.randint(0, 4)))
+        if rng.random() < 0.3:
+            path += rng.choice([".php", ".html", ".exe", ".apk", ""])
+        url = f"{rng.choice(['http', 'https'])}://{host}/{path}"
+        if rng.random() < 0.4:
+            url += f"?id={i}&next=%2F{rng.choice(_WORDS)}"
+        if rng.random() < 0.1:
+            url += "#" + rng.choice(_WORDS)
+        if rng.random() < 0.02:
+            url += rng.choice(["/로그인", " ", "[x]", ";v=1"])   # 스칼라 함수로 넘어가는 경우
+        urls.append(url)
+    return urls
+
+
+def run_mode(fn, urls: list, repeat: int):
+    result = fn(urls)   # 첫 호출(정규식 컴파일/워밍업)은 측정에서 뺌
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(urls)
+    return result, time.perf_counter() - start
+
+
+def compare(urls: list, scalar: pd.DataFrame, batch: pd.DataFrame) -> list:
+    """[(url, column, scalar 값, batch 값)] — 값과 타입(bool/정수/실수 표현)까지 같아야 같은 것으로 봅니다."""
+    mismatches = []
+    for column in FEATURE_COLUMNS:
+        left = scalar[column].tolist()
+        right = batch[column].tolist()
+        for url, a, b in zip(urls, left, right):
+            if isinstance(a, bool):
+                same = bool(b) is a
+            else:
+                same = repr(float(a)) == repr(float(b))
+            if not same:
+                mismatches.append((url, column, a, b))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="URL 어휘 피처 계산: URL별 함수 vs 벡터화 배치")
+    parser.add_argument("--csv", help="'url' 컬럼이 있는 CSV")
+    parser.add_argument("--synthetic", type=int, default=100000, help="--csv가 없을 때 만들 URL 수")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    urls = load_urls(args.csv, args.limit) if args.csv else synthetic_urls(args.synthetic)
+    print(f"urls={len(urls)} repeat={args.repeat}")
+
+    measured = {}
+    for mode, fn in MODES.items():
+        result, elapsed = run_mode(fn, urls, args.repeat)
+        measured[mode] = result
+        rate = len(urls) * args.repeat / elapsed if elapsed else float("inf")
+        print(f"{mode:>6}: {elapsed:.2f}s  ({rate:,.0f} URLs/s)")
+
+    mismatches = compare(urls, measured["scalar"], measured["batch"])
+    print(f"identical: {len(urls) * len(FEATURE_COLUMNS) - len(mismatches)}/{len(urls) * len(FEATURE_COLUMNS)} 값")
+    for url, column, a, b in mismatches[:10]:
+        print(f"  ≠ {url!r} [{column}] scalar={a!r} batch={b!r}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,7 @@ import joblib
 import json
 import numpy as np
 from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.metrics.pairwise import cosine_similarity
 
 # GPU 차단 및 경고 무시
@@ -51,17 +52,23 @@ llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.01)
 
 # 2) URL-BERT
 from bot.tools.urlbert_tool import load_urlbert_tool
-from urlbert.urlbert2.core.model_loader import GLOBAL_MODEL, GLOBAL_TOKENIZER
 from bot.feature_extractor import build_raw_features, summarize_features_for_explanation
+from urlbert.urlbert2.core.deadline import deadline_from_seconds
+from urlbert.urlbert2.core import page_fetcher
+
+# "왜 위험해?" 같은 상세 분석에서 URLBERT + 특징 수집(WHOIS/크롤링/SSL)에 쓰는 전체 시간(초). 0이면 제한 없음.
+WHY_DEADLINE_SECONDS = float(os.getenv("WHY_DEADLINE_SECONDS", "1.5"))
+STAGE_NAMES_KO = {"lexical": "URL 문자열 분석", "whois": "WHOIS", "dns": "DNS 조회", "crawl": "페이지 크롤링", "ssl": "SSL 인증서"}
+_why_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="why-features")
 
 try:
-    url_tool = load_urlbert_tool(GLOBAL_MODEL, GLOBAL_TOKENIZER)
+    url_tool = load_urlbert_tool()  # 사이드카 클라이언트 (모델은 사이드카가 보유)
     log.info("✅ URL-BERT 툴 로드 완료")
 except Exception as e:
     log.error(f"❌ URL-BERT 툴 로드 실패: {e}")
     url_tool = Tool(
         name="URLBERT_ThreatAnalyzer",
-        func=lambda x, _e=str(e): f"URL 분석 툴 로드 중 오류 발생: {_e}",
+        func=lambda x, _e=str(e), **_kw: f"URL 분석 툴 로드 중 오류 발생: {_e}",
         description="URL 안전/위험 판단"
     )
 
@@ -223,18 +230,27 @@ def get_chatbot_response(query: str, session_id: Optional[str] = None) -> Dict[s
     # 2) URL 분석 처리
     elif match:
         url = match.group(1)
+        # 상세 분석은 URLBERT와 특징 수집(WHOIS/크롤링/SSL)을 같은 마감 시간 안에서 동시에 진행합니다.
+        # 페이지는 한 번만 받아 URLBERT 헤더와 크롤링 지표가 함께 씁니다.
+        deadline = deadline_from_seconds(WHY_DEADLINE_SECONDS) if is_why_question else None
+        if is_why_question:
+            page_fetcher.prefetch(url)
+        features_future = _why_pool.submit(build_raw_features, url, deadline) if is_why_question else None
         print("➡️ [3/3] bot/bot_main5.py: url_tool.run()을 호출하여 urlbert_tool.py를 실행합니다.")
         try:
-            bert_result = url_tool.func(url)
+            bert_result = url_tool.func(url, deadline=deadline)
         except Exception as e:
             bert_result = f"URL-BERT 오류: {e}"
 
         if is_why_question:
             # ... 상세 분석 로직 ...
             try:
-                df = build_raw_features(url)
+                df = features_future.result()
                 verdict = _infer_verdict_from_text(bert_result)
                 reasons = summarize_features_for_explanation(df, verdict, top_k=3) if not df.empty else ["세부 특징 추출 실패"]
+                skipped = [s for s in str(df.iloc[0].get("incomplete_stages") or "").split(",") if s] if not df.empty else []
+                if skipped:
+                    reasons.append("시간 제한으로 확인하지 못한 항목: " + ", ".join(STAGE_NAMES_KO.get(s, s) for s in skipped))
                 feature_details = "\n".join(f"- {r}" for r in reasons)
                 prompt = url_prompt.format(user_query=text, bert_result=bert_result, feature_details=feature_details)
                 ans = llm.invoke(prompt).content
@@ -8,9 +8,7 @@ from datetime import datetime
 from urllib.parse import urlparse
 
 from bot.processed_feature import extract_url_features_minimal
-from bot.test_whois import extract_whois_features
-from bot.feature_crawler import extract_crawler_features
-from bot.add_ssl import get_ssl_cert_info
+from bot.feature_stages import run_feature_stages
 from bot.reprocess import convert_to_risk_levels
 # ───────────────────────────────────────────────────────────────────────────────
 # (0) 모델 및 피처 순서 로드
@@ -23,21 +21,28 @@ with open(os.path.join(MODEL_DIR, "feature_order_reduced.pkl"), "rb") as f:
     _feature_order = pickle.load(f)
 # ───────────────────────────────────────────────────────────────────────────────
 
-def build_raw_features(url: str) -> pd.DataFrame:
+def build_raw_features(url: str, deadline=None) -> pd.DataFrame:
     """
     URL 하나를 받아 다양한 원시 피처를 추출하여 DataFrame으로 반환합니다.
     'url', 'domain', 'created_date', 'expiry_date' 등을 포함하며,
     주요 수치형 피처는 np.nan으로 설정합니다.
+    WHOIS / 크롤링 / SSL 은 단계 그래프(bot/feature_stages.py)로 동시에 수집합니다.
     """
     parsed = urlparse(url)
+    run = run_feature_stages(url, parsed.netloc, deadline, dns_guard=False)
     # URL 기반 피처
-    url_feats = extract_url_features_minimal(url).to_dict()
+    # 네트워크 단계와 달리 빈 값으로 채우지 않습니다. 단계에서 실패했거나 건너뛰었으면 여기서 다시 계산해
+    # 예외를 그대로 올립니다 (모델 입력 행이 URL 피처 없이 만들어지지 않도록).
+    if run["lexical"] is not None:
+        url_feats = dict(run["lexical"])
+    else:
+        url_feats = extract_url_features_minimal(url).to_dict()
     # 기본 필드 추가
     url_feats['url']    = url
     url_feats['domain'] = parsed.netloc
 
     # WHOIS 정보
-    whois = extract_whois_features(url)
+    whois = run["whois"] or {}
     created_str = whois.get("Created Date", None)
     expiry_str  = whois.get("Expiry Date", None)
     # lowercase keys for DB
@@ -65,23 +70,24 @@ def build_raw_features(url: str) -> pd.DataFrame:
     url_feats["WHOIS Available"] = url_feats["whois_available"]
 
     # 크롤러 기반 피처
-    crawler = extract_crawler_features(url)
-    url_feats.update(crawler)
+    url_feats.update(run["crawl"])
 
     # SSL 정보
-    _, ssl_days, ssl_issuer = get_ssl_cert_info(parsed.netloc)
+    ssl_days, ssl_issuer = run["ssl"]["cert_total_days"], run["ssl"]["cert_issuer"]
     url_feats["cert_total_days"] = ssl_days if ssl_days is not None else np.nan
     url_feats["cert_issuer"]     = ssl_issuer or ""
 
-    return pd.DataFrame([url_feats])
+    df = pd.DataFrame([url_feats])
+    df.attrs["stage_timings"] = run.timings
+    return df
 
 
-def build_mapped_features(url: str) -> tuple[np.ndarray, dict]:
+def build_mapped_features(url: str, deadline=None) -> tuple[np.ndarray, dict]:
     """
     build_raw_features → NA/None 채움 → 리스크 레벨 변환 →
     모델 입력 배열(X) + raw_feats dict 반환
     """
-    df_raw = build_raw_features(url)
+    df_raw = build_raw_features(url, deadline)
     # 결측치 처리: 매핑 단계에서 오류 방지
     for col in ["domain_age_days", "days_since_creation", "cert_total_days"]:
         if col in df_raw:
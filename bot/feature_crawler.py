@@ -1,12 +1,25 @@
 # feature_crawler.py
 
+import codecs
 import csv
-import requests
-from bs4 import BeautifulSoup
+import os
+import re
+from html.parser import HTMLParser
 from urllib.parse import urlparse, urljoin
 from multiprocessing import Pool, cpu_count
 from tqdm import tqdm
-import os
+
+from urlbert.urlbert2.core.page_fetcher import fetch_page
+
+# 크롤링 지표는 DOM 트리를 만들지 않고 HTMLParser 이벤트로 태그 수만 셉니다.
+# 본문은 CRAWLER_PARSE_CHUNK_BYTES 씩 디코딩해 넣고, CRAWLER_MAX_PARSE_BYTES 를 넘으면 그 뒤는 보지 않습니다.
+# (기본값은 페이지 수집 계층의 본문 상한과 같은 1 MiB. 비교/측정: python -m bot.bench_crawler)
+CRAWLER_MAX_PARSE_BYTES = int(os.getenv("CRAWLER_MAX_PARSE_BYTES", str(1024 * 1024)))
+CRAWLER_PARSE_CHUNK_BYTES = int(os.getenv("CRAWLER_PARSE_CHUNK_BYTES", str(64 * 1024)))
+
+_CHARSET = re.compile(r"charset=[\"']?([\w.:-]+)", re.I)
+_META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?([\w.:-]+)", re.I)
+_BOMS = ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"))
 
 def is_external(base_domain, link):
     try:
@@ -18,55 +31,124 @@ def is_external(base_domain, link):
 def is_invalid_href(href):
     return not href or href.strip() in ['#', 'javascript:void(0)', 'javascript:;']
 
-def analyze_url_entry(row):
+def _charset(content_type):
+    match = _CHARSET.search(content_type or "")
+    return match.group(1) if match else None
+
+def _pick_encoding(content_type, head: bytes) -> str:
+    """Content-Type charset → BOM → 앞부분의 <meta charset> → utf-8 순으로 정합니다."""
+    for bom, name in _BOMS:
+        if head.startswith(bom):
+            return name
+    candidates = [_charset(content_type)]
+    match = _META_CHARSET.search(head[:1024])
+    if match:
+        candidates.append(match.group(1).decode("ascii", "ignore"))
+    for name in candidates:
+        if not name:
+            continue
+        try:
+            return codecs.lookup(name).name
+        except LookupError:
+            continue
+    return "utf-8"
+
+
+class _RatioParser(HTMLParser):
+    """<script src>, <link href>, <a> 시작 태그만 보고 개수를 셉니다. (속성 처리는 BeautifulSoup html.parser와 같음)"""
+
+    def __init__(self, url: str):
+        super().__init__(convert_charrefs=False)
+        self.url = url
+        self.base_domain = urlparse(url).netloc
+        self.total_resources = 0
+        self.external_resources = 0
+        self.total_anchors = 0
+        self.external_anchors = 0
+        self.invalid_anchors = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in ("script", "link", "a"):
+            return
+        # 값 없는 속성은 "", 같은 속성이 여러 번 나오면 마지막 값
+        values = {key: "" if value is None else value for key, value in attrs}
+        if tag == "a":
+            self.total_anchors += 1
+            href = values.get("href")
+            if is_invalid_href(href):
+                self.invalid_anchors += 1
+            elif is_external(self.base_domain, urljoin(self.url, href)):
+                self.external_anchors += 1
+            return
+        link = values.get("src" if tag == "script" else "href")
+        if link is not None:
+            self.total_resources += 1
+            if is_external(self.base_domain, link):
+                self.external_resources += 1
+
+    def ratios(self) -> dict:
+        anchors = self.total_anchors
+        return {
+            'extUrlRatio':         round(self.external_resources / self.total_resources if self.total_resources else 0, 3),
+            'externalAnchorRatio': round(self.external_anchors / anchors if anchors else 0, 3),
+            'invalidAnchorRatio':  round(self.invalid_anchors / anchors if anchors else 0, 3),
+        }
+
+
+def _byte_chunks(body: bytes, chunk_size: int):
+    view = memoryview(body)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
+
+def crawler_ratios(chunks, url: str, content_type: str = None,
+                   max_bytes: int = CRAWLER_MAX_PARSE_BYTES) -> dict:
+    """
+    본문 조각(bytes)들을 차례로 파싱해 extUrlRatio, externalAnchorRatio, invalidAnchorRatio 를 반환합니다.
+    chunks: bytes 이거나 bytes 조각을 내는 iterable (예: 스트리밍 응답의 iter_content)
+    max_bytes 까지만 읽고 멈춥니다. (0 이하면 끝까지)
+    """
+    if isinstance(chunks, (bytes, bytearray)):
+        chunks = _byte_chunks(chunks, max(1, CRAWLER_PARSE_CHUNK_BYTES))
+    parser = _RatioParser(url)
+    decoder = None
+    head = b""
+    remaining = max_bytes if max_bytes > 0 else None
+    for chunk in chunks:
+        if remaining is not None:
+            if remaining <= 0:
+                break
+            chunk = chunk[:remaining]
+            remaining -= len(chunk)
+        if decoder is None:
+            # 인코딩은 앞부분 1 KiB를 모은 뒤 정합니다.
+            head += chunk
+            if len(head) < 1024:
+                continue
+            decoder = codecs.getincrementaldecoder(_pick_encoding(content_type, head))(errors="replace")
+            chunk, head = head, b""
+        parser.feed(decoder.decode(chunk))
+    if decoder is None:
+        decoder = codecs.getincrementaldecoder(_pick_encoding(content_type, head))(errors="replace")
+    parser.feed(decoder.decode(head, final=True))
+    parser.close()
+    return parser.ratios()
+
+def analyze_url_entry(row, timeout: float = 10, deadline=None):
     """
     기존의 batch 처리용 함수.
     row: {'url': ...}
-    내부에서 requests.get() 으로 페이지를 가져와 분석한 뒤
+    페이지 수집 계층(urlbert.urlbert2.core.page_fetcher)으로 페이지를 가져와 분석한 뒤
     row 에 extUrlRatio, externalAnchorRatio, invalidAnchorRatio 를 붙여서 반환합니다.
+    같은 URL의 헤더 추출(URLBERT)과 응답 하나를 함께 쓰며, 본문은 최대 PAGE_MAX_BODY_BYTES 까지만 받습니다.
+    트리를 만들지 않고 crawler_ratios 로 태그 수만 셉니다.
+    deadline 이 cancel()되면 페이지 대기를 바로 그만둡니다.
     """
     url = row['url']
     try:
-        response = requests.get(url, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        base_domain = urlparse(url).netloc
-
-        # 외부 리소스 분석
-        external_resources = 0
-        total_resources = 0
-
-        for script in soup.find_all('script', src=True):
-            total_resources += 1
-            if is_external(base_domain, script['src']):
-                external_resources += 1
-        for link in soup.find_all('link', href=True):
-            total_resources += 1
-            if is_external(base_domain, link['href']):
-                external_resources += 1
-
-        ext_url_ratio = external_resources / total_resources if total_resources else 0
-
-        # 앵커 태그 분석
-        anchor_tags = soup.find_all('a')
-        total_anchors = len(anchor_tags)
-        external_anchors = 0
-        invalid_anchors = 0
-
-        for a in anchor_tags:
-            href = a.get('href')
-            if is_invalid_href(href):
-                invalid_anchors += 1
-            elif is_external(base_domain, urljoin(url, href)):
-                external_anchors += 1
-
-        external_anchor_ratio = external_anchors / total_anchors if total_anchors else 0
-        invalid_anchor_ratio = invalid_anchors / total_anchors if total_anchors else 0
-
-        row.update({
-            'extUrlRatio':         round(ext_url_ratio, 3),
-            'externalAnchorRatio': round(external_anchor_ratio, 3),
-            'invalidAnchorRatio':  round(invalid_anchor_ratio, 3)
-        })
+        page = fetch_page(url, timeout, deadline=deadline)
+        if page is None or page["status"] is None:
+            raise ConnectionError("페이지를 받지 못했습니다 (DNS 실패, 연결 실패 또는 시간 초과)")
+        row.update(crawler_ratios(page["body"] or b"", url, page["content_type"]))
 
     except Exception as e:
         print(f"Error processing {url}: {e}")
@@ -78,14 +160,14 @@ def analyze_url_entry(row):
 
     return row
 
-def extract_crawler_features(url: str) -> dict:
+def extract_crawler_features(url: str, timeout: float = 10, deadline=None) -> dict:
     """
     단일 URL 하나만 넘겨주면,
     extUrlRatio, externalAnchorRatio, invalidAnchorRatio
     세 가지를 dict 로 반환합니다.
     """
     row = {'url': url}
-    out = analyze_url_entry(row)
+    out = analyze_url_entry(row, timeout, deadline)
     return {
         'extUrlRatio':         out.get('extUrlRatio')         or 0.0,
         'externalAnchorRatio': out.get('externalAnchorRatio') or 0.0,
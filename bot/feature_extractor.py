@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
-import os, json, math, socket  # ← socket 추가
+import os, json, math
 from typing import Dict, Any, List, Tuple, Optional
 from datetime import datetime
 from urllib.parse import urlparse
@@ -10,11 +10,8 @@ from urllib.parse import urlparse
 import numpy as np
 import pandas as pd
 
-# 네 기존 모듈
-from bot.processed_feature import extract_url_features_minimal
-from bot.test_whois import extract_whois_features
-from bot.feature_crawler import extract_crawler_features
-from bot.add_ssl import get_ssl_cert_info
+# 네 기존 모듈 (WHOIS/크롤링/SSL 단계 정의는 feature_stages.py)
+from bot.feature_stages import run_feature_stages
 
 # 한글 라벨
 FEATURE_LABELS: Dict[str, str] = {
@@ -37,6 +34,7 @@ FEATURE_LABELS: Dict[str, str] = {
     "extUrlRatio": "외부 리소스 비율", "externalAnchorRatio": "외부 앵커 비율",
     "invalidAnchorRatio": "잘못된 앵커 비율",
     "cert_total_days": "SSL 인증서 총 유효기간(일)", "cert_issuer": "SSL 인증서 발급기관",
+    "incomplete_stages": "시간 제한으로 생략된 단계",
 }
 
 # 대체 키 표준화
@@ -97,24 +95,25 @@ def _fmt_val(v):
         return f"{v:.2f}"
     return v
 
-def _can_resolve(host: str) -> bool:
-    try:
-        socket.getaddrinfo(host, None)
-        return True
-    except Exception:
-        return False
-
 # 1) 모든 원시 특징 수집 (모델 불필요)
-def build_raw_features(url: str) -> pd.DataFrame:
+def build_raw_features(url: str, deadline=None) -> pd.DataFrame:
+    """
+    WHOIS / SSL / (DNS → 크롤링) 단계를 동시에 실행합니다 (bot/feature_stages.py).
+    deadline(urlbert.urlbert2.core.deadline.Deadline)을 주면 각 단계는 남은 시간까지만 기다립니다.
+    시간이 모자라 결과를 얻지 못한 단계는 기본값으로 채우고 'incomplete_stages'("whois,ssl" 형태)에 기록합니다.
+    단계별 상태/소요 시간은 df.attrs["stage_timings"]에 남습니다.
+    """
     parsed = urlparse(url)
     netloc = parsed.netloc.split(":")[0]
     feats: Dict[str, Any] = {"url": url, "domain": netloc}
 
+    # 크롤링 지표는 환경변수 DISABLE_CRAWL 로 토글 (OFF면 기본값 0.0), DNS가 안 풀리면 크롤링하지 않음
+    run = run_feature_stages(url, netloc, deadline, crawl=os.getenv("DISABLE_CRAWL", "0") != "1")
+
     # URL 패턴/문자열
-    try:
-        s = extract_url_features_minimal(url)
-        feats.update(s.to_dict())
-    except Exception:
+    if run["lexical"] is not None:
+        feats.update(run["lexical"])
+    else:
         keys = ["is_punycode","url_length","domain_length","tld_length","path_length","query_length",
                 "subdomain_count","char_ratio","digit_ratio","dot_count","hyphen_count","slash_count",
                 "question_count","has_hash","has_at_symbol","is_https","encoding","contains_port",
@@ -123,19 +122,13 @@ def build_raw_features(url: str) -> pd.DataFrame:
             feats.setdefault(k, np.nan if k not in ("has_hash","has_at_symbol","is_https") else 0)
 
     # WHOIS
-    try:
-        who = extract_whois_features(url) or {}
-        feats["Domain"] = who.get("Domain", netloc)
-        feats["created_date"] = who.get("Created Date")
-        feats["expiry_date"]  = who.get("Expiry Date")
-        feats["Registrar"]    = who.get("Registrar")
-        feats["whois_available"] = who.get("WHOIS Available", False)
-    except Exception:
-        feats.setdefault("Domain", netloc)
-        feats.setdefault("created_date", None)
-        feats.setdefault("expiry_date", None)
-        feats.setdefault("Registrar", None)
-        feats.setdefault("whois_available", False)
+    who = run["whois"] or {}
+    feats["Domain"] = who.get("Domain", netloc)
+    feats["created_date"] = who.get("Created Date")
+    feats["expiry_date"]  = who.get("Expiry Date")
+    feats["Registrar"]    = who.get("Registrar")
+    # 시간 초과로 조회하지 못한 경우는 '비공개(False)'가 아니라 '모름(None)'입니다.
+    feats["whois_available"] = who.get("WHOIS Available", None if "whois" in run.incomplete else False)
 
     # 파생: 나이/만료D-일
     feats["domain_age_days"] = np.nan
@@ -150,43 +143,23 @@ def build_raw_features(url: str) -> pd.DataFrame:
     except Exception:
         pass
 
-    # ─────────────────────────────────────────────────────────────
-    # 크롤링 지표 (환경변수 DISABLE_CRAWL 로 토글 + DNS 가드)
-    # ─────────────────────────────────────────────────────────────
-    if os.getenv("DISABLE_CRAWL", "0") == "1":
-        # 크롤링 OFF: 기본값(0.0)으로 고정
-        feats["extUrlRatio"]         = 0.0
-        feats["externalAnchorRatio"] = 0.0
-        feats["invalidAnchorRatio"]  = 0.0
-    else:
-        host = netloc
-        if _can_resolve(host):
-            try:
-                cr = extract_crawler_features(url) or {}
-                feats["extUrlRatio"]         = cr.get("extUrlRatio", 0.0)
-                feats["externalAnchorRatio"] = cr.get("externalAnchorRatio", 0.0)
-                feats["invalidAnchorRatio"]  = cr.get("invalidAnchorRatio", 0.0)
-            except Exception:
-                feats["extUrlRatio"]         = 0.0
-                feats["externalAnchorRatio"] = 0.0
-                feats["invalidAnchorRatio"]  = 0.0
-        else:
-            feats["extUrlRatio"]         = 0.0
-            feats["externalAnchorRatio"] = 0.0
-            feats["invalidAnchorRatio"]  = 0.0
-    # ─────────────────────────────────────────────────────────────
+    # 크롤링 지표
+    cr = run["crawl"] or {}
+    feats["extUrlRatio"]         = cr.get("extUrlRatio", 0.0)
+    feats["externalAnchorRatio"] = cr.get("externalAnchorRatio", 0.0)
+    feats["invalidAnchorRatio"]  = cr.get("invalidAnchorRatio", 0.0)
 
     # SSL
-    try:
-        _, cert_days, issuer = get_ssl_cert_info(netloc)
-        feats["cert_total_days"] = cert_days if cert_days is not None else np.nan
-        feats["cert_issuer"]     = issuer or ""
-    except Exception:
-        feats["cert_total_days"] = np.nan
-        feats["cert_issuer"]     = ""
+    ssl_info = run["ssl"] or {}
+    cert_days = ssl_info.get("cert_total_days")
+    feats["cert_total_days"] = cert_days if cert_days is not None else np.nan
+    feats["cert_issuer"]     = ssl_info.get("cert_issuer") or ""
 
+    feats["incomplete_stages"] = ",".join(run.incomplete)
     feats = _canonicalize_keys(feats)
-    return pd.DataFrame([feats])
+    df = pd.DataFrame([feats])
+    df.attrs["stage_timings"] = run.timings
+    return df
 
 # 2) 튜닝 임계값을 이용한 숫자형 점수화
 def _score_num_with_thresholds(key: str, val: float) -> Optional[Tuple[float, str, str]]:
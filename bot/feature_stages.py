@@ -0,0 +1,83 @@
+# bot/feature_stages.py
+# URL 원시 특징 수집 단계 (urlbert.urlbert2.core.stage_graph 위에서 실행)
+#
+#   lexical            (URL 문자열, 네트워크 없음)
+#   whois              ┐
+#   ssl                ├ 서로 독립 → 공유 풀에서 동시에 실행
+#   dns ──→ crawl      ┘ (크롤링만 DNS 결과에 의존)
+#
+# feature_extractor.build_raw_features(챗봇 설명용)와 extract_features.build_raw_features(XGBoost 입력용)가
+# 같은 단계를 씁니다. 전체 소요 시간은 단계 시간의 합이 아니라 가장 느린 경로(대개 WHOIS 또는 dns→crawl)에 가깝습니다.
+# DNS 확인/크롤링/SSL은 프로세스 공용 DNS 캐시(urlbert.urlbert2.core.dns_cache)를 함께 씁니다.
+from bot.processed_feature import extract_url_features_minimal
+from bot.test_whois import extract_whois_features
+from bot.feature_crawler import extract_crawler_features
+from bot.add_ssl import get_ssl_cert_info
+from urlbert.urlbert2.core.stage_graph import Stage, StageGraph
+from urlbert.urlbert2.core.dns_cache import dns_cache
+
+# 단계별 최대 대기 시간(초). 요청 마감 시간(deadline)이 있으면 남은 시간으로 줄어듭니다.
+WHOIS_TIMEOUT_SECONDS = 20   # 최대 3회 재시도 + 재시도 간 지터 백오프 (TLD 브레이커가 열려 있으면 즉시 실패)
+DNS_TIMEOUT_SECONDS = 5
+CRAWL_TIMEOUT_SECONDS = 10
+SSL_TIMEOUT_SECONDS = 3
+
+CRAWL_DEFAULTS = {"extUrlRatio": 0.0, "externalAnchorRatio": 0.0, "invalidAnchorRatio": 0.0}
+
+
+def _can_resolve(host: str, deadline) -> bool:
+    # 캐시에 있으면(풀리지 않는 이름 포함) 리졸버에 묻지 않습니다.
+    return dns_cache.resolvable(host, deadline.clamp(DNS_TIMEOUT_SECONDS))
+
+
+def _lexical_stage(url: str) -> dict:
+    return extract_url_features_minimal(url).to_dict()
+
+
+def _whois_stage(url: str, deadline) -> dict:
+    return extract_whois_features(url, deadline) or {}
+
+
+def _crawl_stage(url: str, resolvable: bool, deadline) -> dict:
+    if not resolvable:
+        return dict(CRAWL_DEFAULTS)
+    return extract_crawler_features(url, deadline.clamp(CRAWL_TIMEOUT_SECONDS), deadline) or dict(CRAWL_DEFAULTS)
+
+
+def _ssl_stage(host: str, deadline) -> dict:
+    _, days, issuer = get_ssl_cert_info(host, deadline.clamp(SSL_TIMEOUT_SECONDS))
+    return {"cert_total_days": days, "cert_issuer": issuer}
+
+
+LEXICAL_STAGE = Stage("lexical", _lexical_stage, inputs=("url",), outputs=("lexical",))
+WHOIS_STAGE = Stage("whois", _whois_stage, inputs=("url", "deadline"), outputs=("whois",),
+                    timeout=WHOIS_TIMEOUT_SECONDS, defaults={"whois": {}})
+DNS_STAGE = Stage("dns", _can_resolve, inputs=("host", "deadline"), outputs=("resolvable",),
+                  timeout=DNS_TIMEOUT_SECONDS, defaults={"resolvable": False})
+CRAWL_STAGE = Stage("crawl", _crawl_stage, inputs=("url", "resolvable", "deadline"), outputs=("crawl",),
+                    timeout=CRAWL_TIMEOUT_SECONDS, defaults={"crawl": dict(CRAWL_DEFAULTS)})
+SSL_STAGE = Stage("ssl", _ssl_stage, inputs=("host", "deadline"), outputs=("ssl",),
+                  timeout=SSL_TIMEOUT_SECONDS, defaults={"ssl": {"cert_total_days": None, "cert_issuer": None}})
+
+_GRAPHS = {
+    # (crawl, dns_guard)
+    (True, True): StageGraph([LEXICAL_STAGE, WHOIS_STAGE, DNS_STAGE, CRAWL_STAGE, SSL_STAGE]),
+    (True, False): StageGraph([LEXICAL_STAGE, WHOIS_STAGE, CRAWL_STAGE, SSL_STAGE]),
+    (False, True): StageGraph([LEXICAL_STAGE, WHOIS_STAGE, SSL_STAGE]),
+    (False, False): StageGraph([LEXICAL_STAGE, WHOIS_STAGE, SSL_STAGE]),
+}
+
+
+def run_feature_stages(url: str, host: str, deadline=None, crawl: bool = True, dns_guard: bool = True):
+    """
+    특징 수집 단계를 실행하고 StageRun을 반환합니다.
+    run["lexical"], run["whois"], run["crawl"], run["ssl"] / run.incomplete / run.timings
+    dns_guard=False 이면 DNS 확인 없이 바로 크롤링합니다.
+    """
+    initial = {"url": url, "host": host}
+    if crawl and not dns_guard:
+        initial["resolvable"] = True
+    run = _GRAPHS[(crawl, dns_guard)].run(initial, deadline=deadline)
+    if not crawl:
+        run.values["crawl"] = dict(CRAWL_DEFAULTS)
+    return run
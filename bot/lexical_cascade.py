@@ -0,0 +1,154 @@
+# bot/lexical_cascade.py
+# 2단계 캐스케이드: URL 문자열만 보는 가벼운 모델(1단계)로 먼저 판정하고,
+# 점수가 불확실 구간(CASCADE_LOW < p < CASCADE_HIGH)에 들어올 때만 URLBERT(헤더 요청 포함, 2단계)를 호출합니다.
+#
+# 1단계 모델은 bot/train_lexical_model.py로 학습한 models/lexical_url_model.pkl 입니다.
+# (extract_features.py의 xgb_final_model.pkl은 WHOIS/크롤링/SSL 피처가 필요해서 1단계로 쓰기엔 느립니다)
+#
+# 확정된 요청 중 CASCADE_SHADOW_RATE 비율은 백그라운드에서 URLBERT도 돌려 일치율을 집계합니다.
+# 집계는 cascade_stats()로 조회하며 Flask에서는 /metrics/cascade 로 노출됩니다.
+import os
+import pickle
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from bot.processed_feature import extract_url_features_minimal, extract_url_features_batch
+
+BASE_DIR = os.path.dirname(__file__)
+LEXICAL_MODEL_PATH = os.path.join(BASE_DIR, "models", "lexical_url_model.pkl")
+
+CASCADE_ENABLED = os.getenv("URL_CASCADE", "0") == "1"
+CASCADE_LOW = float(os.getenv("URL_CASCADE_LOW", "0.05"))    # 악성 확률이 이 값 이하면 정상으로 확정
+CASCADE_HIGH = float(os.getenv("URL_CASCADE_HIGH", "0.98"))  # 이 값 이상이면 악성으로 확정
+CASCADE_SHADOW_RATE = float(os.getenv("URL_CASCADE_SHADOW_RATE", "0.02"))
+
+# 판정 결과의 "model" 값: 1단계에서 확정한 판정은 LEXICAL_MODEL, URLBERT로 넘긴 판정은 URLBERT_MODEL
+LEXICAL_MODEL = "lexical"
+URLBERT_MODEL = "urlbert"
+
+_model = None
+_feature_order = None
+_model_lock = threading.Lock()
+_model_missing = False
+
+_stats = {
+    "total": 0,
+    "short_benign": 0,       # 1단계에서 정상 확정
+    "short_malicious": 0,    # 1단계에서 악성 확정
+    "escalated": 0,          # 불확실 구간 → URLBERT
+    "no_model": 0,           # 1단계 모델이 없어 URLBERT로 넘긴 요청
+    "shadow_checked": 0,     # 확정된 요청 중 URLBERT로 다시 확인한 수
+    "shadow_agree": 0,       # 그중 판정이 같았던 수
+}
+_stats_lock = threading.Lock()
+_shadow_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cascade-shadow")
+
+
+def _count(key: str, n: int = 1):
+    with _stats_lock:
+        _stats[key] += n
+
+
+def _load_model():
+    """models/lexical_url_model.pkl ({"model", "feature_order"})을 처음 필요할 때 한 번만 로드합니다."""
+    global _model, _feature_order, _model_missing
+    if _model is not None or _model_missing:
+        return _model
+    with _model_lock:
+        if _model is None and not _model_missing:
+            if not os.path.exists(LEXICAL_MODEL_PATH):
+                print(f"⚠️ 1단계 URL 모델이 없습니다({LEXICAL_MODEL_PATH}). 모든 요청을 URLBERT로 보냅니다.")
+                _model_missing = True
+                return None
+            with open(LEXICAL_MODEL_PATH, "rb") as f:
+                bundle = pickle.load(f)
+            _feature_order = bundle["feature_order"]
+            _model = bundle["model"]
+    return _model
+
+
+def lexical_features(urls: list) -> pd.DataFrame:
+    """
+    URL마다 extract_url_features_minimal 피처를 한 행으로 만듭니다 (네트워크 요청 없음).
+    여러 건(학습/일괄 채점)은 벡터화된 extract_url_features_batch 를 쓰고,
+    한 건은 DataFrame 구성 비용이 더 작은 기존 함수를 그대로 씁니다. (두 결과는 같음)
+    """
+    if len(urls) > 1:
+        return extract_url_features_batch(urls).astype(float)
+    df = pd.DataFrame([extract_url_features_minimal(u) for u in urls])
+    return df.astype(float)
+
+
+def lexical_score(url: str):
+    """악성 확률(0~1). 1단계 모델이 없으면 None."""
+    model = _load_model()
+    if model is None:
+        return None
+    X = lexical_features([url])[_feature_order].values
+    return float(model.predict_proba(X)[0][1])
+
+
+def decide(score, low: float = CASCADE_LOW, high: float = CASCADE_HIGH):
+    """점수로 확정 가능한지 판단합니다: 0(정상 확정) / 1(악성 확정) / None(불확실 → URLBERT)."""
+    if score is None:
+        return None
+    if score <= low:
+        return 0
+    if score >= high:
+        return 1
+    return None
+
+
+def _shadow_check(url: str, verdict: int, full_classifier):
+    try:
+        full = full_classifier(url)
+    except Exception as e:
+        print(f"⚠️ 캐스케이드 shadow 검증 실패({url}): {e}")
+        return
+    _count("shadow_checked")
+    if int(full.get("is_malicious", 0)) == verdict:
+        _count("shadow_agree")
+
+
+def classify_with_cascade(url: str, full_classifier, deadline=None) -> dict:
+    """
+    full_classifier(url)와 같은 형식의 dict(url, header_info, is_malicious, confidence, true_label)에
+    판정한 모델("model": LEXICAL_MODEL / URLBERT_MODEL)을 붙여 반환합니다.
+    1단계에서 확정되면 헤더 요청/URLBERT 없이 바로 반환하며 header_info는 None 입니다.
+    이 판정은 URLBERT 결과가 아니므로 호출부는 urlbert_analysis 테이블이나 판정 캐시에 넣지 않아야 합니다.
+    deadline은 URLBERT로 넘길 때만 사용합니다 (shadow 검증은 마감 시간 없이 수행).
+    """
+    _count("total")
+    score = lexical_score(url)
+    verdict = decide(score)
+    if verdict is None:
+        _count("no_model" if score is None else "escalated")
+        result = full_classifier(url, deadline=deadline) if deadline is not None else full_classifier(url)
+        return {**result, "model": URLBERT_MODEL}
+
+    _count("short_malicious" if verdict == 1 else "short_benign")
+    if CASCADE_SHADOW_RATE > 0 and random.random() < CASCADE_SHADOW_RATE:
+        _shadow_pool.submit(_shadow_check, url, verdict, full_classifier)
+    return {
+        "url": url,
+        "header_info": None,
+        "is_malicious": verdict,
+        "confidence": score if verdict == 1 else 1.0 - score,
+        "true_label": None,
+        "model": LEXICAL_MODEL,
+    }
+
+
+def cascade_stats() -> dict:
+    """단축 처리 비율과 URLBERT 판정과의 일치율(shadow 표본 기준)."""
+    with _stats_lock:
+        out = dict(_stats)
+    shorted = out["short_benign"] + out["short_malicious"]
+    out["short_circuit_rate"] = shorted / out["total"] if out["total"] else 0.0
+    out["shadow_agreement"] = out["shadow_agree"] / out["shadow_checked"] if out["shadow_checked"] else None
+    out["band"] = [CASCADE_LOW, CASCADE_HIGH]
+    out["enabled"] = CASCADE_ENABLED
+    return out
@@ -1,9 +1,21 @@
+import numpy as np
 import pandas as pd
 import re
 from urllib.parse import urlparse
 import idna
 from difflib import SequenceMatcher
 
+PHISHING_KEYWORDS = ["secure", "security", "login", "verify", "account", "update", "bank", "paypal", "mail", "free", "email", "amazon", "app"]
+FREE_DOMAINS = [".tk", ".ml", ".cf", ".ga", ".gq"]
+SHORTENING_SERVICES = [
+    "bit.ly", "goo.gl", "tinyurl.com", "ow.ly", "t.co", "is.gd",
+    "buff.ly", "adf.ly", "bit.do", "mcaf.ee", "shorturl.at"
+]
+BRAND_LIST = [
+    "naver", "kakao", "google", "youtube", "facebook", "instagram", "twitter", "wikipedia", "amazon",
+    "apple", "microsoft", "whatsapp", "bing", "yahoo"
+]
+
 def extract_url_features_minimal(url):
     parsed = urlparse(url)
 
@@ -71,25 +83,19 @@ def extract_url_features_minimal(url):
     contains_ip = 1 if re.match(r'^(?:http[s]?://)?(?:[0-9]{1,3}\.){3}[0-9]{1,3}', url) else 0
 
     # 피싱 관련 단어 포함 여부
-    phishing_keywords = ["secure", "security", "login", "verify", "account", "update", "bank", "paypal", "mail", "free", "email", "amazon", "app"]
+    phishing_keywords = PHISHING_KEYWORDS
     contains_phishing_words = 1 if any(re.search(rf'\b{re.escape(word)}\b', url.lower()) for word in phishing_keywords) else 0
 
     # 무료 도메인 사용 여부
-    free_domains = [".tk", ".ml", ".cf", ".ga", ".gq"]
+    free_domains = FREE_DOMAINS
     is_free_domain = 1 if any(url.endswith(fd) for fd in free_domains) else 0
 
     # 단축 URL 여부
-    shortening_services = [
-        "bit.ly", "goo.gl", "tinyurl.com", "ow.ly", "t.co", "is.gd",
-        "buff.ly", "adf.ly", "bit.do", "mcaf.ee", "shorturl.at"
-    ]
+    shortening_services = SHORTENING_SERVICES
     is_shortened = 1 if any(service in domain for service in shortening_services) else 0
 
     # 타이포스쿼팅 탐지 (도메인에 대한 유사도 측정)
-    brand_list = [
-        "naver", "kakao", "google", "youtube", "facebook", "instagram", "twitter", "wikipedia", "amazon",
-        "apple", "microsoft", "whatsapp", "bing", "yahoo"
-    ]
+    brand_list = BRAND_LIST
     domain_main = domain.split('.')[-2] if len(domain.split('.')) >= 2 else domain
     typosquatting_detected = 0
     for brand in brand_list:
@@ -124,10 +130,256 @@ def extract_url_features_minimal(url):
         "shortened_url": is_shortened,
         "typosquatting": typosquatting_detected
     })
+
+
+# ---------------------------------------------------------------------------
+# 배치 버전: URL 목록을 받아 extract_url_features_minimal 과 같은 24개 피처를 컬럼 단위로 계산합니다.
+# - URL들을 구분자(\x00)로 이어 붙인 문자열 하나와 그 문자 배열(numpy)을 만들고,
+#   문자 종류별 개수와 scheme/netloc/path/query 경계(urlparse와 같은 규칙)를 배열 연산으로 구합니다.
+# - 정규식은 미리 컴파일해 두고 이어 붙인 문자열에서 한 번만 검색한 뒤, 매치 위치로 URL(과 netloc/path 구간)을 찾습니다.
+#   (어느 패턴도 \x00, '/', '?', '#'를 넘어 매치될 수 없으므로 매치가 URL이나 구간 경계를 넘지 않습니다)
+# - 공백/제어문자, '[', ']', ';', 비ASCII 문자가 있는 URL은 urlparse의 예외 규칙(제거, IPv6, params, IDNA 검사)을
+#   따라야 하므로 스칼라 함수로 계산합니다.
+# - 타이포스쿼팅은 이름(domain_main)별로 한 번만 보고, 문자 구성으로 구한 유사도 상한(difflib의 quick_ratio와 같은 값)을
+#   numpy로 먼저 계산해 0.8을 넘는 쌍만 SequenceMatcher.ratio()로 확인합니다.
+# 스칼라 버전과 값 비교 및 처리량 측정: python -m bot.bench_url_features
+FEATURE_COLUMNS = [
+    "is_punycode", "url_length", "domain_length", "tld_length", "path_length", "query_length", "subdomain_count",
+    "char_ratio", "digit_ratio", "dot_count", "hyphen_count", "slash_count", "question_count", "has_hash",
+    "has_at_symbol", "is_https", "encoding", "contains_port", "file_extension", "contains_ip",
+    "phishing_keywords", "free_domain", "shortened_url", "typosquatting",
+]
+
+_SEP = "\x00"
+_ENCODING_RE = re.compile(r'%[0-9A-Fa-f]{2}|base64')
+_FILE_EXTENSION_RE = re.compile(r'\.(php|html|htm|doc|docx|xls|xlsx|ppt|pptx|hwp|exe|apk|zip)')
+_IP_RE = re.compile(r'^(?:http[s]?://)?(?:[0-9]{1,3}\.){3}[0-9]{1,3}')
+_SHORTENING_RE = re.compile('|'.join(re.escape(service) for service in SHORTENING_SERVICES))
+_FREE_DOMAIN_TAILS = np.array([ord(fd[1]) * 256 + ord(fd[2]) for fd in FREE_DOMAINS])   # 모두 '.' + 두 글자
+
+
+def _keyword_pattern(words):
+    r"""
+    any(re.search(rf'\b{w}\b', text) for w in words) 와 같은 결과를 한 번의 검색으로 냅니다.
+    가지마다 첫 글자가 리터럴이라 re가 그 글자들로 빠르게 건너뛰며, 앞쪽 \b는 (?<!\w.)로 확인합니다.
+    """
+    by_first = {}
+    for word in sorted(words, key=len, reverse=True):
+        by_first.setdefault(word[0], []).append(re.escape(word[1:]))
+    branches = (f"{re.escape(first)}(?<!\\w.)(?:{'|'.join(rests)})" for first, rests in by_first.items())
+    return re.compile(r"(?s)(?:" + "|".join(branches) + r")\b")
+
+
+_PHISHING_RE = _keyword_pattern(PHISHING_KEYWORDS)
+
+# 문자 종류 (코드포인트 128 이상은 128번 칸)
+_LETTER, _DIGIT, _DOT, _HYPHEN, _SLASH, _QUESTION, _HASH, _AT, _PLUS, _COLON, _OTHER, _UNSAFE = range(12)
+_KIND_COUNT = 12
+_CHAR_KINDS = np.full(129, _OTHER, dtype=np.int64)
+_CHAR_KINDS[:0x21] = _UNSAFE                 # 제어문자, 공백 (구분자 \x00 포함)
+_CHAR_KINDS[0x7f:] = _UNSAFE                 # DEL, 비ASCII
+_CHAR_KINDS[ord('a'):ord('z') + 1] = _LETTER
+_CHAR_KINDS[ord('A'):ord('Z') + 1] = _LETTER
+_CHAR_KINDS[ord('0'):ord('9') + 1] = _DIGIT
+for _kind, _char in zip((_DOT, _HYPHEN, _SLASH, _QUESTION, _HASH, _AT, _PLUS, _COLON), ".-/?#@+:"):
+    _CHAR_KINDS[ord(_char)] = _kind
+for _char in "[];":
+    _CHAR_KINDS[ord(_char)] = _UNSAFE
+
+
+class _Joined:
+    """구분자로 이어 붙인 URL들과 문자 배열, URL별 시작/끝 위치와 문자 종류별 개수."""
+
+    def __init__(self, texts):
+        n = len(texts)
+        self.lengths = np.fromiter(map(len, texts), dtype=np.int64, count=n)
+        self.text = _SEP.join(texts) + _SEP
+        if self.text.isascii():
+            self.codes = np.frombuffer(self.text.encode("ascii"), dtype=np.uint8)
+        else:
+            self.codes = np.frombuffer(self.text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+        self.kinds = _CHAR_KINDS[np.minimum(self.codes, 128)]
+        self.starts = np.cumsum(self.lengths + 1) - (self.lengths + 1)
+        self.ends = self.starts + self.lengths          # 각 URL 뒤의 구분자 위치
+        rows = np.repeat(np.arange(n, dtype=np.int64) * _KIND_COUNT, self.lengths + 1)
+        self.counts = np.bincount(rows + self.kinds, minlength=n * _KIND_COUNT).reshape(n, _KIND_COUNT)
+        self.counts[:, _UNSAFE] -= 1                   # 구분자
+
+    def positions(self, mask):
+        # 끝에 문자열 길이(어느 URL에도 속하지 않는 위치)를 붙여, "다음 위치" 조회가 항상 유효하도록 합니다.
+        return np.append(np.flatnonzero(mask), len(self.codes))
+
+    def rows_of(self, positions):
+        return np.searchsorted(self.starts, positions, side="right") - 1
+
+    def match_flags(self, pattern, text=None, lo=None, hi=None):
+        """URL마다 pattern 매치가 있는지 (lo, hi를 주면 그 구간 안에 완전히 들어간 매치만)."""
+        spans = np.array([m.span() for m in pattern.finditer(text or self.text)], dtype=np.int64).reshape(-1, 2)
+        rows = self.rows_of(spans[:, 0])
+        if lo is not None:
+            rows = rows[(spans[:, 0] >= lo[rows]) & (spans[:, 1] <= hi[rows])]
+        flags = np.zeros(len(self.starts), dtype=np.int64)
+        flags[rows] = 1
+        return flags
+
+
+def _split_urls(joined):
+    """urlsplit과 같은 규칙으로 (scheme이 https인지, netloc 시작/끝, path 끝, query 길이)를 구합니다. (안전한 URL만)"""
+    codes, kinds, starts, ends = joined.codes, joined.kinds, joined.starts, joined.ends
+    last = len(codes) - 1
+    # scheme: 첫 ':' 앞이 영문자로 시작하고 scheme 문자(영숫자 + - .)로만 되어 있을 때
+    colons = joined.positions(kinds == _COLON)
+    non_scheme = joined.positions((kinds >= _SLASH) & (kinds != _PLUS))
+    colon = colons[np.searchsorted(colons, starts)]
+    has_scheme = ((colon < ends) & (colon > starts) & (kinds[starts] == _LETTER)
+                  & (non_scheme[np.searchsorted(non_scheme, starts)] == colon))
+    is_https = has_scheme & (colon - starts == 5)
+    for offset, char in enumerate(b"https"):
+        is_https &= (codes[np.minimum(starts + offset, last)] | 32) == char
+    # netloc: 나머지가 '//'로 시작하면 다음 '/', '?', '#' 전까지
+    rest = np.where(has_scheme, colon + 1, starts)
+    has_netloc = (rest + 1 < ends) & (kinds[rest] == _SLASH) & (kinds[np.minimum(rest + 1, last)] == _SLASH)
+    delims = joined.positions((kinds == _SLASH) | (kinds == _QUESTION) | (kinds == _HASH))
+    netloc_start = np.where(has_netloc, rest + 2, rest)
+    netloc_end = np.where(has_netloc, np.minimum(delims[np.searchsorted(delims, netloc_start)], ends), rest)
+    # fragment는 첫 '#'부터, query는 그 앞의 첫 '?'부터
+    hashes, questions = joined.positions(kinds == _HASH), joined.positions(kinds == _QUESTION)
+    fragment = np.minimum(hashes[np.searchsorted(hashes, netloc_end)], ends)
+    question = questions[np.searchsorted(questions, netloc_end)]
+    has_query = question < fragment
+    path_end = np.where(has_query, question, fragment)
+    query_length = np.where(has_query, fragment - question - 1, 0)
+    return is_https.astype(np.int64), netloc_start, netloc_end, path_end, query_length
+
+
+def _typosquatting(names):
+    """
+    names(소문자)마다 extract_url_features_minimal 과 같은 타이포스쿼팅 여부.
+    SequenceMatcher.ratio()는 공통 문자 수(멀티셋 교집합)로 구한 상한(quick_ratio)을 넘지 못하므로,
+    상한이 0.8 이하인 쌍은 계산하지 않아도 결과가 같습니다. (브랜드 이름은 모두 a-z)
+    """
+    flags = np.zeros(len(names), dtype=np.int64)
+    if not names:
+        return flags
+    joined = _Joined(names)
+    codes = joined.codes.astype(np.int64)
+    letters = (joined.kinds == _LETTER) & (codes >= 97)
+    rows = joined.rows_of(np.flatnonzero(letters))
+    counts = np.bincount(rows * 26 + (codes[letters] - 97), minlength=len(names) * 26)
+    counts = np.minimum(counts, 255).astype(np.uint8).reshape(-1, 26)
+    for brand in BRAND_LIST:
+        brand_counts = np.bincount(np.frombuffer(brand.encode(), dtype=np.uint8) - 97, minlength=26)
+        common = np.minimum(counts, brand_counts).sum(axis=1)
+        for i in np.flatnonzero(2.0 * common / (joined.lengths + len(brand)) > 0.8):
+            if not flags[i] and names[i] != brand and SequenceMatcher(None, names[i], brand).ratio() > 0.8:
+                flags[i] = 1
+    return flags
+
+
+def _domain_columns(joined, lowered, netloc_start, netloc_end):
+    """netloc 구간으로 도메인 피처 열들을 구합니다."""
+    dots = joined.positions(joined.kinds == _DOT)
+    colons = joined.positions(joined.kinds == _COLON)
+    first_dot, end_dot = np.searchsorted(dots, netloc_start), np.searchsorted(dots, netloc_end)
+    dot_count = end_dot - first_dot
+    # 마지막 '.'와 그 앞 '.'의 위치 (없으면 netloc 시작 바로 앞)
+    last_dot = np.where(dot_count >= 1, dots[np.maximum(end_dot - 1, 0)], netloc_start - 1)
+    prev_dot = np.where(dot_count >= 2, dots[np.maximum(end_dot - 2, 0)], netloc_start - 1)
+    # domain.split('.')[-2].lower() (라벨이 하나뿐이면 domain 전체)
+    main_from = np.where(dot_count >= 1, prev_dot + 1, netloc_start)
+    main_to = np.where(dot_count >= 1, last_dot, netloc_end)
+    main_names = [lowered[a:b] for a, b in zip(main_from.tolist(), main_to.tolist())]
+    main_codes, unique_names = pd.factorize(np.array(main_names, dtype=object))
+    return {
+        "domain_length": netloc_end - netloc_start,
+        "tld_length": np.where(dot_count >= 1, netloc_end - last_dot - 1, 0),
+        "subdomain_count": np.where(dot_count >= 2, dot_count - 1, 0),
+        "contains_port": (np.searchsorted(colons, netloc_end) > np.searchsorted(colons, last_dot + 1)).astype(np.int64),
+        "shortened_url": joined.match_flags(_SHORTENING_RE, lo=netloc_start, hi=netloc_end),
+        "typosquatting": _typosquatting(list(unique_names))[main_codes],
+    }
+
+
+def _is_punycode(url):
+    try:
+        return url != idna.decode(url)
+    except:
+        return False
+
+
+def extract_url_features_batch(urls) -> pd.DataFrame:
+    """
+    URL 목록(list, numpy 배열, pd.Series)의 피처를 한 번에 계산해 DataFrame(행: 입력 순서, 열: FEATURE_COLUMNS)으로 반환합니다.
+    각 행의 값은 extract_url_features_minimal(url)과 같습니다.
+    """
+    urls = list(urls)
+    n = len(urls)
+    if n == 0:
+        return pd.DataFrame(columns=FEATURE_COLUMNS)
+
+    joined = _Joined(urls)
+    unsafe = np.flatnonzero(joined.counts[:, _UNSAFE] > 0)
+    if len(unsafe):
+        # 예외 규칙이 필요한 URL은 빈 문자열로 바꿔 계산하고, 나중에 스칼라 결과로 덮어씁니다.
+        unsafe_set = set(unsafe.tolist())
+        joined = _Joined(["" if i in unsafe_set else url for i, url in enumerate(urls)])
+    counts, lengths = joined.counts, joined.lengths
+    lowered = joined.text.lower()   # 모두 ASCII라 길이가 그대로
+
+    special_count = lengths - counts[:, _LETTER] - counts[:, _DIGIT]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        char_ratio = np.where(lengths > 0, special_count / lengths, 0.0)
+        digit_ratio = np.where(lengths > 0, counts[:, _DIGIT] / lengths, 0.0)
+
+    is_https, netloc_start, netloc_end, path_end, query_length = _split_urls(joined)
+
+    # idna.decode는 영숫자, '-', '.' 밖의 문자가 있으면 항상 실패하므로 (→ False) 그런 URL만 직접 확인합니다.
+    is_punycode = np.zeros(n, dtype=bool)
+    hostname_like = counts[:, _LETTER] + counts[:, _DIGIT] + counts[:, _DOT] + counts[:, _HYPHEN] == lengths
+    for i in np.flatnonzero(hostname_like):
+        is_punycode[i] = _is_punycode(urls[i])
+    # IP 패턴은 숫자 4개와 '.' 3개 이상이 있어야 맞을 수 있습니다.
+    contains_ip = np.zeros(n, dtype=np.int64)
+    for i in np.flatnonzero((counts[:, _DIGIT] >= 4) & (counts[:, _DOT] >= 3)):
+        contains_ip[i] = 1 if _IP_RE.match(urls[i]) else 0
+    tail = joined.codes[np.maximum(joined.ends - 3, 0)], joined.codes[np.maximum(joined.ends - 2, 0)], joined.codes[np.maximum(joined.ends - 1, 0)]
+    free_domain = (lengths >= 3) & (tail[0] == ord('.')) & np.isin(tail[1].astype(np.int64) * 256 + tail[2], _FREE_DOMAIN_TAILS)
+
+    result = pd.DataFrame({
+        "is_punycode": is_punycode,
+        "url_length": lengths,
+        "path_length": path_end - netloc_end,
+        "query_length": query_length,
+        "char_ratio": char_ratio,
+        "digit_ratio": digit_ratio,
+        "dot_count": counts[:, _DOT],
+        "hyphen_count": counts[:, _HYPHEN],
+        "slash_count": counts[:, _SLASH],
+        "question_count": counts[:, _QUESTION],
+        "has_hash": (counts[:, _HASH] > 0).astype(np.int64),
+        "has_at_symbol": (counts[:, _AT] > 0).astype(np.int64),
+        "is_https": is_https,
+        "encoding": joined.match_flags(_ENCODING_RE),
+        "file_extension": joined.match_flags(_FILE_EXTENSION_RE, lo=netloc_end, hi=path_end),
+        "contains_ip": contains_ip,
+        "phishing_keywords": joined.match_flags(_PHISHING_RE, text=lowered),
+        "free_domain": free_domain.astype(np.int64),
+        **_domain_columns(joined, lowered, netloc_start, netloc_end),
+    }, columns=FEATURE_COLUMNS)
+
+    if len(unsafe):
+        scalar = pd.DataFrame([extract_url_features_minimal(urls[i]) for i in unsafe.tolist()], columns=FEATURE_COLUMNS)
+        for column in FEATURE_COLUMNS:
+            values = result[column].to_numpy(copy=True)
+            values[unsafe] = scalar[column].to_numpy().astype(values.dtype)
+            result[column] = values
+    return result
+
+
 # 예측 시에는 아래 코드가 실행되지 않도록 막아둠
 if __name__ == "__main__":
     df = pd.read_csv("/home/injeolmi/myproject/sQanAR/whois_data/analyzed_url.csv")
-    df_features = df["url"].apply(extract_url_features_minimal)
+    df_features = extract_url_features_batch(df["url"].tolist())
     df_processed = pd.concat([df, df_features], axis=1)
     df_processed.to_csv("/home/injeolmi/myproject/sQanAR/feature.csv", index=False)
 
@@ -1,32 +1,69 @@
 # bot/qr_analysis.py (이전 analysis_logic.py에서 이름 변경 및 로직 수정)
 
-from urlbert.urlbert2.core.urlbert_analyzer import classify_url_and_explain
+import os
+from urllib.parse import urlparse
+
+from urlbert.urlbert2.core.sidecar import classify_url
+from urlbert.urlbert2.core.deadline import deadline_from_seconds
 from Server.db_manager import get_urlbert_info_from_db, save_urlbert_to_db
-from urlbert.urlbert2.core.model_loader import load_inference_model
+from bot.lexical_cascade import CASCADE_ENABLED, URLBERT_MODEL, classify_with_cascade
+from bot.verdict_cache import verdict_cache
 
 # --- 모델 로딩 ---
-urlbert_model, urlbert_tokenizer = load_inference_model()
+# 모델은 URLBERT 사이드카 프로세스가 들고 있습니다. 사이드카가 없을 때만 이 프로세스에서 로드합니다.
+
+# 분석 1건의 마감 시간(초). 헤더를 이 시간 안에 받지 못하면 URL만으로 판정하고 incomplete로 표시합니다. 0이면 제한 없음.
+ANALYZE_DEADLINE_SECONDS = float(os.getenv("ANALYZE_DEADLINE_SECONDS", "1.5"))
 
 def get_analysis_for_qr_scan(url: str) -> dict:
     """
     URL을 받아 DB에 이력이 있는지 먼저 확인하고, '항상' 모델 분석을 수행한 뒤,
     결과를 DB에 저장/업데이트하고, 출처('source')를 포함하여 반환합니다.
+    같은 URL을 여러 스레드가 동시에 요청하면 분석은 한 번만 수행하고 결과를 공유합니다.
     """
+    return verdict_cache.coalesce(url, lambda: _analyze_and_store(url))
+
+def _analyze_and_store(url: str) -> dict:
     # 1. DB에 이력이 있는지 '먼저' 확인해서, 이 URL이 처음인지 아닌지만 기록합니다.
     is_existing_in_db = get_urlbert_info_from_db(url) is not None
     
     # 2. DB에 있든 없든 '항상' 모델로 최신 분석을 수행합니다.
-    model_result = classify_url_and_explain(url, urlbert_model, urlbert_tokenizer)
+    #    (URL_CASCADE=1 이면 URL 문자열 모델로 먼저 판정하고, 애매할 때만 URLBERT를 호출)
+    deadline = deadline_from_seconds(ANALYZE_DEADLINE_SECONDS)
+    if CASCADE_ENABLED:
+        model_result = classify_with_cascade(url, classify_url, deadline=deadline)
+    else:
+        model_result = classify_url(url, deadline=deadline)
+    incomplete = bool(model_result.get("incomplete"))
+    model_name = model_result.get("model", URLBERT_MODEL)
     
     # 3. 분석 결과를 DB에 저장합니다 (없으면 INSERT, 있으면 UPDATE).
-    save_urlbert_to_db(model_result)
+    #    마감 시간 때문에 헤더 없이 낸 판정은 저장하지 않습니다 (다음 요청에서 다시 분석).
+    #    URL 문자열 모델(캐스케이드 1단계)이 확정한 판정도 URLBERT 결과가 아니므로 urlbert_analysis 테이블과
+    #    판정 캐시에 넣지 않습니다 (그 테이블은 1단계 모델의 학습 라벨로도 쓰임).
+    storable = not incomplete and model_name == URLBERT_MODEL
+    if storable:
+        save_urlbert_to_db(model_result)
     
     # 4. 프론트엔드에 전달할 결과와 함께 'source'를 결정하여 반환합니다.
     label = "MALICIOUS" if model_result.get("is_malicious") == 1 else "LEGITIMATE"
+
+    # 5. 판정 캐시에 넣어 둡니다 (/analyze, /board, 챗봇 도구가 DB/모델보다 먼저 조회).
+    if storable:
+        verdict_cache.put(url, {
+            "url": url,
+            "label": label,
+            "domain": urlparse(url).hostname or "-",
+            "is_malicious": 1 if label == "MALICIOUS" else 0,
+            "confidence": model_result.get("confidence"),
+            "header_info": model_result.get("header_info"),
+        })
     
     return {
         "url": model_result.get("url"),
         "label": label,
         "confidence": model_result.get("confidence"),
-        "source": "database" if is_existing_in_db else "new" # 출처 명시 (database / new)
-    }
\ No newline at end of file
+        "source": "database" if is_existing_in_db else "new", # 출처 명시 (database / new)
+        "incomplete": incomplete,  # True면 헤더 없이 URL만으로 판정
+        "model": model_name        # 판정한 모델 (urlbert / lexical)
+    }
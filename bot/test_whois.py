@@ -3,10 +3,30 @@
 import pandas as pd
 import whois
 import time
+import inspect
 import concurrent.futures
-from urllib.parse import urlparse
 from datetime import datetime
 
+from bot.whois_cache import whois_cache, registrable_domain
+from bot.whois_breaker import whois_breaker, whois_server_key, jittered_backoff
+
+try:
+    from whois.exceptions import WhoisQuotaExceededError
+except ImportError:  # 예전 python-whois
+    WhoisQuotaExceededError = None
+
+WHOIS_QUERY_TIMEOUT_SECONDS = 10
+WHOIS_RETRIES = 3
+
+# 연결 실패/시간 초과/조회 제한: 서버 문제 → 재시도 대상이고 브레이커 실패로 셉니다.
+# 그 밖의 예외("도메인 없음", 파싱 실패 등)는 서버가 응답한 것이므로 재시도하지 않습니다.
+_TRANSIENT_ERRORS = (OSError,) + ((WhoisQuotaExceededError,) if WhoisQuotaExceededError else ())
+
+try:
+    _WHOIS_PARAMS = set(inspect.signature(whois.whois).parameters)
+except (TypeError, ValueError):
+    _WHOIS_PARAMS = set()
+
 # 날짜 형식을 YYYY-MM-DD로 변환하는 함수
 def format_date(date):
     if date in ('Unknown', 'Error', None):
@@ -22,37 +42,85 @@ def format_date(date):
             pass
     return 'Unknown'
 
-# WHOIS 데이터 조회 함수
-def get_whois_info(domain):
-    """WHOIS 정보를 조회하고 실패 시 재시도 (최대 3회)"""
-    for _ in range(3):
+def _whois_kwargs(deadline) -> dict:
+    # 지원하는 버전이면 소켓 오류를 예외로 받고(브레이커 판단용) 소켓 timeout을 남은 시간으로 줄입니다.
+    kwargs = {}
+    if "ignore_socket_errors" in _WHOIS_PARAMS:
+        kwargs["ignore_socket_errors"] = False
+        kwargs["quiet"] = True
+    if "timeout" in _WHOIS_PARAMS:
+        timeout = WHOIS_QUERY_TIMEOUT_SECONDS if deadline is None else deadline.clamp(WHOIS_QUERY_TIMEOUT_SECONDS)
+        kwargs["timeout"] = max(timeout, 0.1)
+    return kwargs
+
+
+def _lookup_whois(domain, deadline=None):
+    """
+    ((생성일, 만료일, 등록기관, 성공 여부), answered)를 반환합니다.
+    answered=False 이면 서버가 응답하지 않은 실패(브레이커 open, 시간 초과 등)라 캐시하면 안 됩니다.
+    """
+    key = whois_server_key(domain)
+    for attempt in range(WHOIS_RETRIES):
+        token = whois_breaker.acquire(key, deadline)
+        if token is None:
+            break  # 이 TLD 서버는 쉬는 중이거나 동시 조회가 꽉 참 → 기다리지 않고 실패
+        answered = False
         try:
-            w = whois.whois(domain)
-            return (
-                w.creation_date,
-                w.expiration_date,
-                w.registrar,
-                True
-            )
-        except Exception as e:
-            time.sleep(2)
-    return None, None, None, False
+            w = whois.whois(domain, **_whois_kwargs(deadline))
+            answered = True
+            return (w.creation_date, w.expiration_date, w.registrar, True), True
+        except _TRANSIENT_ERRORS:
+            pass
+        except Exception:
+            answered = True
+            return (None, None, None, False), True
+        finally:
+            whois_breaker.release(token, answered)
+
+        if attempt + 1 < WHOIS_RETRIES:
+            delay = jittered_backoff(attempt, 1.0, 4.0)
+            if deadline is not None:
+                if deadline.clamp(delay) < delay or deadline.wait(delay):
+                    break  # 재시도 대기를 마치기 전에 마감 시간이 지남 / 단계가 버려짐(cancel)
+            else:
+                time.sleep(delay)
+    return (None, None, None, False), False
+
+
+# WHOIS 데이터 조회 함수
+def get_whois_info(domain, deadline=None):
+    """
+    WHOIS 정보를 조회하고 서버 오류면 재시도 (최대 3회, 지터 백오프)
+    deadline(urlbert.urlbert2.core.deadline.Deadline)을 주면 남은 시간 안에서만 재시도합니다.
+    TLD 서버의 브레이커가 열려 있으면 조회하지 않고 바로 실패를 반환합니다.
+    """
+    info, _ = _lookup_whois(domain, deadline)
+    return info
 
 # 단일 URL에서 WHOIS 피처 추출 함수
-def extract_whois_features(url: str) -> dict:
+def extract_whois_features(url: str, deadline=None, use_cache: bool = True) -> dict:
     """
     URL 하나를 받아서 WHOIS 관련 피처를 dict 로 반환합니다.
+    WHOIS는 등록 도메인(예: m.shop.example.co.kr → example.co.kr) 단위로 조회하고 결과를 디스크 캐시에 저장합니다.
     """
-    parsed = urlparse(url)
-    domain = parsed.netloc.split(':')[0].lstrip("www.")
-    created, expiry, registrar, available = get_whois_info(domain)
-    return {
+    domain = registrable_domain(url)
+    if use_cache:
+        cached = whois_cache.get(domain)
+        if cached is not None:
+            return cached
+
+    (created, expiry, registrar, available), answered = _lookup_whois(domain, deadline)
+    features = {
         "Domain": domain,
         "Created Date": format_date(created),
         "Expiry Date": format_date(expiry),
         "Registrar": registrar,
         "WHOIS Available": available
     }
+    # 서버가 응답하지 않은 실패(브레이커 open, 시간 초과, 마감 시간)는 도메인 문제가 아니므로 캐시에 남기지 않습니다.
+    if use_cache and answered:
+        whois_cache.put(domain, features)
+    return features
 
 # ---- 아래부터는 "대량 처리" 스크립트로만 사용할 코드 ----
 if __name__ == "__main__":
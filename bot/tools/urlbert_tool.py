@@ -1,14 +1,30 @@
 from langchain.agents import Tool
 from Server.db_manager import get_urlbert_info_from_db, save_urlbert_to_db
-from urlbert.urlbert2.core.urlbert_analyzer import classify_url_and_explain
+from urlbert.urlbert2.core.sidecar import classify_url
+from bot.verdict_cache import verdict_cache
 
-def load_urlbert_tool(model, tokenizer) -> Tool:
+def load_urlbert_tool(model=None, tokenizer=None) -> Tool:
     """
     URL-BERT 분석 전용 LangChain Tool 반환
-    :param model: 학습된 BERT 모델 객체
-    :param tokenizer: BERT 토크나이저 객체
+    분석은 URLBERT 사이드카로 보내고, 사이드카가 없으면 프로세스 내에서 추론합니다.
+    :param model: 학습된 BERT 모델 객체 (선택, 사이드카가 없을 때 사용)
+    :param tokenizer: BERT 토크나이저 객체 (선택)
     """
-    def _analyze(url: str) -> str:
+    def _analyze(url: str, deadline=None) -> str:
+        # deadline(urlbert.urlbert2.core.deadline.Deadline): 헤더는 남은 시간까지만 기다립니다.
+
+        # 0) 판정 캐시: 방금(TTL 안에) 분석된 URL이면 DB/모델 없이 바로 답합니다.
+        cached = verdict_cache.get(url)
+        if cached is not None:
+            malicious = "🔴 악성" if int(cached.get("is_malicious", 0)) else "🟢 정상"
+            confidence = f"{float(cached['confidence'])*100:.2f}%" if cached.get("confidence") is not None else "-"
+            header_str = f"헤더: {cached['header_info']}" if cached.get("header_info") else ""
+            return (
+                f"[최근 분석] 최근에 분석된 URL({url})의 결과입니다.\n"
+                f"{header_str}\n"
+                f"악성 여부: {malicious}\n"
+                f"신뢰도: {confidence}\n"
+            )
         
         # 1) DB 조회 (기존 정보 확인용)
         db_res = None
@@ -18,7 +34,8 @@ def load_urlbert_tool(model, tokenizer) -> Tool:
             print(f"⚠️ DB 조회 오류 ({e}), 계속 진행합니다.")
 
         # 2) 모델 분석 (DB 존재 여부와 상관없이 무조건 수행)
-        result = classify_url_and_explain(url, model, tokenizer)
+        result = classify_url(url, model, tokenizer, deadline=deadline)
+        incomplete = bool(result.get("incomplete"))
         rec = {
             "url":              url,
             "header_info":      result.get("header_info"),
@@ -27,16 +44,27 @@ def load_urlbert_tool(model, tokenizer) -> Tool:
             "true_label":       result.get("true_label", None)
         }
 
-        # 3) DB 저장 (기존 정보 업데이트)
-        try:
-            save_urlbert_to_db(rec)
-        except Exception as e:
-            print(f"⚠️ DB 저장 오류 ({e}), 계속 진행합니다.")
+        # 3) DB 저장 (기존 정보 업데이트). 마감 시간 때문에 헤더 없이 낸 판정은 저장하지 않습니다.
+        if not incomplete:
+            try:
+                save_urlbert_to_db(rec)
+            except Exception as e:
+                print(f"⚠️ DB 저장 오류 ({e}), 계속 진행합니다.")
+            verdict_cache.put(url, {
+                **rec,
+                "label": "MALICIOUS" if rec["is_malicious"] else "LEGITIMATE",
+            })
 
         # 4) 결과 반환
         malicious = "🔴 악성" if rec["is_malicious"] else "🟢 정상"
         confidence = f"{rec['confidence']*100:.2f}%"
         header_str = f"헤더: {rec['header_info']}" if rec["header_info"] else ""
+        if incomplete:
+            return (
+                f"[빠른 분석] 시간 제한 안에 응답 헤더를 받지 못해 URL({url})만으로 판정했습니다.\n"
+                f"악성 여부: {malicious}\n"
+                f"신뢰도: {confidence}\n"
+            )
         
         # DB에 기존 정보가 있었는지 여부에 따라 메시지 변경
         if db_res:
@@ -57,5 +85,5 @@ def load_urlbert_tool(model, tokenizer) -> Tool:
     return Tool(
         name="URLBERT_ThreatAnalyzer",
         func=_analyze,
-        description="지정한 URL을 URL-BERT 모델로 분석하여 악성 여부를 판단하고, DB와 연동된 설명을 제공합니다. 이미 저장된 URL도 재분석하여 정보를 업데이트합니다."
+        description="지정한 URL을 URL-BERT 모델로 분석하여 악성 여부를 판단하고, DB와 연동된 설명을 제공합니다. 이미 저장된 URL도 재분석하여 정보를 업데이트합니다(최근 분석된 URL은 판정 캐시 결과를 사용)."
     )
\ No newline at end of file
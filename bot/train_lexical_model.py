@@ -0,0 +1,90 @@
+# bot/train_lexical_model.py
+# 2단계 캐스케이드의 1단계(URL 문자열만 보는) XGBoost 모델 학습 + 불확실 구간별 단축 비율/일치율 리포트
+#
+# 사용 예 (프로젝트 루트에서):
+#   python -m bot.train_lexical_model --csv data/urls.csv
+#   python -m bot.train_lexical_model --csv data/urlbert_analysis.csv --verdict-col is_malicious
+# CSV에는 'url', 'label'(malicious/benign 또는 1/0) 컬럼이 필요합니다.
+# --verdict-col 로 URLBERT 판정 컬럼(예: urlbert_analysis 테이블의 is_malicious)을 주면
+# 단축 처리된 URL이 URLBERT 판정과 얼마나 일치하는지도 함께 계산합니다.
+import argparse
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+from xgboost import XGBClassifier
+
+from bot.lexical_cascade import LEXICAL_MODEL_PATH, lexical_features, CASCADE_LOW, CASCADE_HIGH
+
+LABEL_MAP = {"malicious": 1, "benign": 0, "1": 1, "0": 0}
+BANDS = [(0.01, 0.99), (0.02, 0.98), (0.05, 0.95), (0.05, 0.98), (0.1, 0.9), (0.2, 0.8)]
+
+
+def band_report(scores: np.ndarray, labels: np.ndarray, verdicts, low: float, high: float) -> dict:
+    """불확실 구간 (low, high)에서 단축 처리 비율과 단축된 URL의 정답/URLBERT 일치율."""
+    short = (scores <= low) | (scores >= high)
+    pred = (scores >= high).astype(int)
+    out = {
+        "band": (low, high),
+        "short_circuit_rate": float(short.mean()),
+        "label_accuracy": float((pred[short] == labels[short]).mean()) if short.any() else None,
+        # 악성을 정상으로 확정해 버린 비율 (캐스케이드에서 가장 피해야 하는 오류)
+        "missed_malicious": int(((scores <= low) & (labels == 1)).sum()),
+    }
+    if verdicts is not None:
+        out["urlbert_agreement"] = float((pred[short] == verdicts[short]).mean()) if short.any() else None
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", required=True)
+    parser.add_argument("--verdict-col", default=None, help="URLBERT 판정(0/1) 컬럼 이름")
+    parser.add_argument("--output", default=LEXICAL_MODEL_PATH)
+    parser.add_argument("--test-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)
+    df["label"] = df["label"].map(lambda y: LABEL_MAP.get(str(y).strip().lower()))
+    df = df[df["label"].notna()].reset_index(drop=True)
+
+    X = lexical_features(df["url"].tolist())
+    feature_order = list(X.columns)
+    y = df["label"].astype(int).values
+
+    order = np.random.RandomState(42).permutation(len(df))
+    cut = int(len(df) * (1 - args.test_ratio))
+    train_idx, test_idx = order[:cut], order[cut:]
+
+    model = XGBClassifier(n_estimators=300, max_depth=6, learning_rate=0.1,
+                          subsample=0.9, colsample_bytree=0.9, eval_metric="logloss")
+    model.fit(X.values[train_idx], y[train_idx])
+
+    scores = model.predict_proba(X.values[test_idx])[:, 1]
+    labels = y[test_idx]
+    verdicts = None
+    if args.verdict_col:
+        verdicts = df[args.verdict_col].astype(int).values[test_idx]
+
+    print(f"학습 {len(train_idx)}건 / 평가 {len(test_idx)}건")
+    for low, high in sorted(set(BANDS + [(CASCADE_LOW, CASCADE_HIGH)])):
+        r = band_report(scores, labels, verdicts, low, high)
+        acc = f"{r['label_accuracy']:.4f}" if r["label_accuracy"] is not None else "-"
+        line = (f"[{low:.2f}, {high:.2f}] 단축 {r['short_circuit_rate'] * 100:5.1f}%, "
+                f"단축분 정확도 {acc}, 놓친 악성 {r['missed_malicious']}")
+        if verdicts is not None and r["urlbert_agreement"] is not None:
+            line += f", URLBERT 일치율 {r['urlbert_agreement']:.4f}"
+        print(line)
+
+    # 최종 모델은 전체 데이터로 다시 학습
+    model.fit(X.values, y)
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "wb") as f:
+        pickle.dump({"model": model, "feature_order": feature_order}, f)
+    print(f"1단계 URL 모델 저장: {args.output}")
+    print("URL_CASCADE_LOW / URL_CASCADE_HIGH 환경변수로 위 표에서 고른 구간을 지정하세요.")
+
+
+if __name__ == "__main__":
+    main()
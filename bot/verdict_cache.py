@@ -0,0 +1,139 @@
+# bot/verdict_cache.py
+# 프로세스 내 URL 판정 캐시 (LRU + TTL)
+#
+# /analyze, /board 신고 심사, 챗봇 URLBERT 도구가 DB/모델을 건드리기 전에 먼저 조회합니다.
+# - 키: 정규화한 URL (스킴/호스트 소문자, 기본 포트·fragment 제거, 빈 경로 → "/")
+# - 값: UrlBertDAO.find_by_url 과 같은 모양의 dict (label, is_malicious, confidence, header_info, domain, url)
+# - 같은 URL에 대한 동시 분석 요청(바이럴 QR)은 coalesce()로 한 번만 실행하고 결과를 나눠 씁니다.
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from urllib.parse import urlsplit, urlunsplit
+
+VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", "10000"))
+VERDICT_CACHE_TTL_SECONDS = float(os.getenv("VERDICT_CACHE_TTL_SECONDS", "600"))
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    url = (url or "").strip()
+    if "://" not in url:
+        url = "http://" + url
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    try:
+        host = (parts.hostname or "").rstrip(".")
+        port = parts.port
+    except ValueError:
+        # 포트가 숫자가 아닌 등 깨진 URL은 netloc을 소문자로만 맞춥니다.
+        host, port = parts.netloc.lower(), None
+    netloc = host
+    if port is not None and port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+    if parts.username is not None:
+        userinfo = parts.username + (f":{parts.password}" if parts.password is not None else "")
+        netloc = f"{userinfo}@{netloc}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+class VerdictCache:
+    """크기 상한(LRU)과 TTL이 있는 스레드 안전 판정 캐시."""
+
+    def __init__(self, maxsize: int = VERDICT_CACHE_SIZE, ttl_seconds: float = VERDICT_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self._data = OrderedDict()   # key -> (만료 시각, verdict)
+        self._inflight = {}          # key -> Future (분석 진행 중)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "coalesced": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, url: str):
+        """유효한 판정이 있으면 dict 사본, 없으면 None."""
+        if not self.enabled:
+            return None
+        key = normalize_url(url)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._data[key]
+                self._counters["expired"] += 1
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self._counters["hits"] += 1
+            return dict(entry[1])
+
+    def put(self, url: str, verdict: dict):
+        if not self.enabled:
+            return
+        key = normalize_url(url)
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, dict(verdict))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def invalidate(self, url: str):
+        with self._lock:
+            self._data.pop(normalize_url(url), None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def coalesce(self, url: str, compute):
+        """
+        같은 URL에 대해 compute()가 이미 실행 중이면 새로 실행하지 않고 그 결과를 기다립니다.
+        compute()가 예외를 내면 기다리던 호출도 같은 예외를 받습니다.
+        """
+        key = normalize_url(url)
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self._counters["coalesced"] += 1
+        if not owner:
+            result = future.result()
+            return dict(result) if isinstance(result, dict) else result
+
+        try:
+            result = compute()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._counters)
+            out["size"] = len(self._data)
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = out["hits"] / lookups if lookups else 0.0
+        out["maxsize"] = self.maxsize
+        out["ttl_seconds"] = self.ttl
+        return out
+
+
+# 프로세스 전체에서 공유하는 캐시
+verdict_cache = VerdictCache()
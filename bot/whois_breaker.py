@@ -0,0 +1,179 @@
+# bot/whois_breaker.py
+# WHOIS 서버(TLD)별 서킷 브레이커 + 동시 조회 제한
+#
+# 일부 TLD의 WHOIS 서버는 조회를 제한하거나 응답 없이 멈춥니다. 그 서버 하나 때문에 모든 요청 스레드가
+# 재시도 대기에 묶이지 않도록 TLD 단위로 상태를 둡니다. (.com/.net은 Verisign, .kr은 KISA ... TLD마다 서버가 하나)
+#   closed    : 정상. 연속 실패가 WHOIS_BREAKER_FAILURES 번 쌓이면 open
+#   open      : 조회하지 않고 바로 실패를 돌려줌. 지터를 섞은 지수 백오프 시간이 지나면 half_open
+#   half_open : 탐침 조회 1건만 통과. 성공하면 closed, 실패하면 백오프를 두 배로 늘려 다시 open
+# 서버가 "도메인 없음"처럼 응답 자체는 한 경우는 서버 장애가 아니므로 실패로 세지 않습니다.
+# 상태: whois_breaker.stats(), Flask에서는 /metrics/whois-breaker
+import os
+import random
+import threading
+import time
+
+WHOIS_BREAKER_FAILURES = int(os.getenv("WHOIS_BREAKER_FAILURES", "5"))
+WHOIS_BREAKER_BASE_SECONDS = float(os.getenv("WHOIS_BREAKER_BASE_SECONDS", "30"))
+WHOIS_BREAKER_MAX_SECONDS = float(os.getenv("WHOIS_BREAKER_MAX_SECONDS", "600"))
+WHOIS_MAX_CONCURRENT_PER_SERVER = int(os.getenv("WHOIS_MAX_CONCURRENT_PER_SERVER", "4"))
+WHOIS_SLOT_WAIT_SECONDS = float(os.getenv("WHOIS_SLOT_WAIT_SECONDS", "2"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def whois_server_key(domain: str) -> str:
+    """브레이커를 나눌 키. WHOIS 서버는 TLD마다 정해지므로 마지막 라벨을 씁니다."""
+    domain = (domain or "").strip(".").lower()
+    if not domain:
+        return ""
+    tld = domain.rsplit(".", 1)[-1]
+    return "ip" if tld.isdigit() or ":" in domain else tld
+
+
+def jittered_backoff(attempt: int, base: float, cap: float) -> float:
+    """base * 2^attempt (cap 이하)에 0.5~1.5배 지터. 여러 워커가 같은 순간에 다시 몰리지 않게 합니다."""
+    return min(cap, base * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+
+class _Server:
+    def __init__(self, max_concurrent: int):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0              # 연속으로 open된 횟수 (백오프 지수)
+        self.open_until = 0.0
+        self.probe_in_flight = False
+        self.in_flight = 0
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.counters = {"calls": 0, "successes": 0, "failures": 0,
+                         "rejected_open": 0, "rejected_busy": 0, "opened": 0}
+
+
+class WhoisBreaker:
+    def __init__(self, failure_threshold: int = WHOIS_BREAKER_FAILURES,
+                 base_seconds: float = WHOIS_BREAKER_BASE_SECONDS,
+                 max_seconds: float = WHOIS_BREAKER_MAX_SECONDS,
+                 max_concurrent: int = WHOIS_MAX_CONCURRENT_PER_SERVER,
+                 slot_wait_seconds: float = WHOIS_SLOT_WAIT_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self.max_concurrent = max(1, max_concurrent)
+        self.slot_wait_seconds = slot_wait_seconds
+        self._servers = {}
+        self._lock = threading.Lock()
+
+    def _server(self, key: str) -> _Server:
+        with self._lock:
+            server = self._servers.get(key)
+            if server is None:
+                server = self._servers[key] = _Server(self.max_concurrent)
+            return server
+
+    def acquire(self, key: str, deadline=None):
+        """
+        조회를 시작해도 되면 토큰(release에 넘김)을, 바로 실패해야 하면 None을 반환합니다.
+        open 상태이거나, 동시 조회 슬롯을 (남은 시간 안에) 얻지 못하면 None입니다.
+        """
+        server = self._server(key)
+        now = time.monotonic()
+        with self._lock:
+            probe = False
+            if server.state == OPEN:
+                if now < server.open_until:
+                    server.counters["rejected_open"] += 1
+                    return None
+                server.state = HALF_OPEN
+            if server.state == HALF_OPEN:
+                if server.probe_in_flight:
+                    server.counters["rejected_open"] += 1
+                    return None
+                server.probe_in_flight = probe = True
+
+        wait = self.slot_wait_seconds if deadline is None else deadline.clamp(self.slot_wait_seconds)
+        if not server.slots.acquire(timeout=max(0.0, wait)):
+            with self._lock:
+                server.counters["rejected_busy"] += 1
+                if probe:
+                    server.probe_in_flight = False
+            return None
+        with self._lock:
+            server.in_flight += 1
+            server.counters["calls"] += 1
+        return (key, probe)
+
+    def release(self, token, ok: bool):
+        """
+        ok=True: 서버가 응답함 (도메인 없음 등 포함), ok=False: 연결 실패/시간 초과/조회 제한.
+        """
+        key, probe = token
+        server = self._server(key)
+        with self._lock:
+            server.in_flight -= 1
+            if probe:
+                server.probe_in_flight = False
+            if ok:
+                server.counters["successes"] += 1
+                server.consecutive_failures = 0
+                if server.state != CLOSED:
+                    print(f"✅ WHOIS 서버(.{key}) 복구, 브레이커를 닫습니다.")
+                server.state = CLOSED
+                server.trips = 0
+            else:
+                server.counters["failures"] += 1
+                server.consecutive_failures += 1
+                if server.state == HALF_OPEN or (
+                        server.state == CLOSED and server.consecutive_failures >= self.failure_threshold):
+                    self._trip(key, server)
+        server.slots.release()
+
+    def _trip(self, key: str, server: _Server):
+        # self._lock을 잡은 상태에서 호출
+        backoff = jittered_backoff(server.trips, self.base_seconds, self.max_seconds)
+        server.state = OPEN
+        server.open_until = time.monotonic() + backoff
+        server.trips += 1
+        server.counters["opened"] += 1
+        print(f"⚠️ WHOIS 서버(.{key}) 연속 실패 {server.consecutive_failures}회, {backoff:.0f}초 동안 조회를 멈춥니다.")
+
+    def state(self, key: str) -> str:
+        with self._lock:
+            server = self._servers.get(key)
+            if server is None:
+                return CLOSED
+            if server.state == OPEN and time.monotonic() >= server.open_until:
+                return HALF_OPEN
+            return server.state
+
+    def reset(self, key: str = None):
+        with self._lock:
+            if key is None:
+                self._servers.clear()
+            else:
+                self._servers.pop(key, None)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        out = {}
+        with self._lock:
+            for key, server in sorted(self._servers.items()):
+                state = server.state
+                if state == OPEN and now >= server.open_until:
+                    state = HALF_OPEN
+                out[key] = {
+                    "state": state,
+                    "consecutive_failures": server.consecutive_failures,
+                    "open_for_seconds": round(max(0.0, server.open_until - now), 1) if state == OPEN else 0.0,
+                    "in_flight": server.in_flight,
+                    **server.counters,
+                }
+        return {
+            "servers": out,
+            "open": sorted(k for k, v in out.items() if v["state"] != CLOSED),
+            "failure_threshold": self.failure_threshold,
+            "max_concurrent_per_server": self.max_concurrent,
+        }
+
+
+# 프로세스 전체에서 공유하는 브레이커
+whois_breaker = WhoisBreaker()
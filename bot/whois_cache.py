@@ -0,0 +1,227 @@
+# bot/whois_cache.py
+# WHOIS 결과 디스크 캐시 (등록 도메인 단위, 프로세스 간 공유)
+#
+# WHOIS 정보는 며칠 단위로만 바뀌므로 같은 등록 도메인(eTLD+1)은 한 번만 조회합니다.
+# - 키: registrable_domain(url)  예) https://m.shop.example.co.kr/a → example.co.kr
+# - 저장소: SQLite 파일(WAL 모드) 하나를 gunicorn 워커 등 여러 프로세스가 같이 씁니다.
+# - TTL: 조회 성공은 WHOIS_CACHE_TTL_SECONDS(기본 7일), 실패는 WHOIS_NEGATIVE_TTL_SECONDS(기본 15분)
+# - 적중률: whois_cache.stats() (프로세스별 집계), Flask에서는 /metrics/whois-cache
+import ipaddress
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+try:
+    import tldextract
+except ImportError:
+    tldextract = None
+
+BASE_DIR = os.path.dirname(__file__)
+WHOIS_CACHE_PATH = os.getenv("WHOIS_CACHE_PATH", os.path.join(BASE_DIR, "cache", "whois_cache.sqlite3"))
+WHOIS_CACHE_TTL_SECONDS = float(os.getenv("WHOIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+WHOIS_NEGATIVE_TTL_SECONDS = float(os.getenv("WHOIS_NEGATIVE_TTL_SECONDS", "900"))
+_PURGE_EVERY_PUTS = 500
+
+# tldextract가 없을 때 쓰는 2단계 공개 접미사 (자주 보는 것만; 나머지는 마지막 라벨을 접미사로 봄)
+_FALLBACK_SUFFIXES = {
+    "co.kr", "or.kr", "go.kr", "ac.kr", "ne.kr", "re.kr", "pe.kr", "mil.kr", "hs.kr", "ms.kr", "es.kr", "sc.kr", "kg.kr",
+    "seoul.kr", "busan.kr", "incheon.kr", "daegu.kr", "gwangju.kr", "daejeon.kr", "ulsan.kr", "gyeonggi.kr",
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "me.uk", "ltd.uk", "plc.uk",
+    "co.jp", "ne.jp", "or.jp", "ac.jp", "go.jp",
+    "com.cn", "net.cn", "org.cn", "gov.cn", "com.hk", "com.tw", "com.sg", "com.my", "com.vn", "co.id", "co.th",
+    "com.au", "net.au", "org.au", "co.nz", "com.br", "com.mx", "com.ar", "com.tr", "co.in", "co.za",
+}
+
+_extractor = None
+if tldextract is not None:
+    # 번들된 공개 접미사 목록만 사용 (처음 호출 시 네트워크로 목록을 받지 않음)
+    _extractor = tldextract.TLDExtract(suffix_list_urls=())
+
+
+def _host_of(url_or_host: str) -> str:
+    text = (url_or_host or "").strip()
+    if "://" not in text:
+        text = "http://" + text
+    try:
+        host = urlsplit(text).hostname or ""
+    except ValueError:
+        host = ""
+    return host.rstrip(".").lower()
+
+
+def registrable_domain(url_or_host: str) -> str:
+    """
+    공개 접미사(public suffix)를 고려한 등록 도메인(eTLD+1).
+    www.example.com / m.example.com → example.com, a.b.example.co.kr → example.co.kr
+    IP 주소나 접미사만 있는 호스트는 그대로 반환합니다.
+    """
+    host = _host_of(url_or_host)
+    if not host:
+        return ""
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    if _extractor is not None:
+        ext = _extractor(host)
+        if ext.domain and ext.suffix:
+            return f"{ext.domain}.{ext.suffix}"
+        return host
+    labels = host.split(".")
+    if len(labels) <= 2:
+        return host
+    suffix_len = 2 if ".".join(labels[-2:]) in _FALLBACK_SUFFIXES else 1
+    return ".".join(labels[-(suffix_len + 1):])
+
+
+class WhoisCache:
+    """SQLite에 저장하는 도메인별 WHOIS 결과 캐시. 연결은 스레드마다 따로 엽니다."""
+
+    def __init__(self, path: str = WHOIS_CACHE_PATH, ttl_seconds: float = WHOIS_CACHE_TTL_SECONDS,
+                 negative_ttl_seconds: float = WHOIS_NEGATIVE_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl_seconds
+        self.negative_ttl = negative_ttl_seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._broken = False
+        self._puts = 0
+        self._counters = {"hits": 0, "negative_hits": 0, "misses": 0, "expired": 0, "stores": 0, "errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and not self._broken
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS whois_cache ("
+                " domain TEXT PRIMARY KEY, payload TEXT NOT NULL, ok INTEGER NOT NULL,"
+                " stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counters[key] += 1
+
+    def _fail(self, e: Exception):
+        # 디스크/권한 문제로 캐시를 못 쓰면 이 프로세스에서는 캐시 없이 동작합니다.
+        self._count("errors")
+        if not self._broken:
+            self._broken = True
+            print(f"⚠️ WHOIS 캐시({self.path})를 사용할 수 없어 캐시 없이 조회합니다: {e}")
+
+    def get(self, domain: str):
+        """유효한 결과가 있으면 extract_whois_features와 같은 dict, 없으면 None."""
+        if not self.enabled or not domain:
+            return None
+        try:
+            row = self._conn().execute(
+                "SELECT payload, ok, expires_at FROM whois_cache WHERE domain = ?", (domain,)
+            ).fetchone()
+        except (sqlite3.Error, OSError) as e:
+            self._fail(e)
+            return None
+        if row is None:
+            self._count("misses")
+            return None
+        payload, ok, expires_at = row
+        if expires_at <= time.time():
+            self._count("expired")
+            self._count("misses")
+            return None
+        self._count("hits" if ok else "negative_hits")
+        return json.loads(payload)
+
+    def put(self, domain: str, features: dict):
+        """조회 성공("WHOIS Available")이면 긴 TTL, 실패면 짧은 TTL로 저장합니다."""
+        if not self.enabled or not domain:
+            return
+        ok = bool(features.get("WHOIS Available"))
+        ttl = self.ttl if ok else self.negative_ttl
+        if ttl <= 0:
+            return
+        now = time.time()
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO whois_cache (domain, payload, ok, stored_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (domain, json.dumps(features, ensure_ascii=False, default=str), int(ok), now, now + ttl),
+            )
+            conn.commit()
+        except (sqlite3.Error, OSError) as e:
+            self._fail(e)
+            return
+        self._count("stores")
+        with self._lock:
+            self._puts += 1
+            purge = self._puts % _PURGE_EVERY_PUTS == 0
+        if purge:
+            self.purge_expired()
+
+    def invalidate(self, domain: str):
+        if self._broken:
+            return
+        try:
+            conn = self._conn()
+            conn.execute("DELETE FROM whois_cache WHERE domain = ?", (domain,))
+            conn.commit()
+        except (sqlite3.Error, OSError) as e:
+            self._fail(e)
+
+    def purge_expired(self) -> int:
+        if self._broken:
+            return 0
+        try:
+            conn = self._conn()
+            n = conn.execute("DELETE FROM whois_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            conn.commit()
+            return n
+        except (sqlite3.Error, OSError) as e:
+            self._fail(e)
+            return 0
+
+    def clear(self):
+        if self._broken:
+            return
+        try:
+            conn = self._conn()
+            conn.execute("DELETE FROM whois_cache")
+            conn.commit()
+        except (sqlite3.Error, OSError) as e:
+            self._fail(e)
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._counters)
+        lookups = out["hits"] + out["negative_hits"] + out["misses"]
+        out["hit_rate"] = (out["hits"] + out["negative_hits"]) / lookups if lookups else 0.0
+        out["size"] = None
+        if not self._broken:
+            try:
+                out["size"] = self._conn().execute(
+                    "SELECT COUNT(*) FROM whois_cache WHERE expires_at > ?", (time.time(),)
+                ).fetchone()[0]
+            except (sqlite3.Error, OSError) as e:
+                self._fail(e)
+        out["path"] = self.path
+        out["ttl_seconds"] = self.ttl
+        out["negative_ttl_seconds"] = self.negative_ttl
+        out["public_suffix"] = "tldextract" if _extractor is not None else "builtin"
+        return out
+
+
+# 프로세스 전체에서 공유하는 캐시 (파일은 프로세스 간 공유)
+whois_cache = WhoisCache()
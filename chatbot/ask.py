@@ -24,8 +24,7 @@ from urllib.parse import urlsplit, urlunsplit  # [ADD] URL 정규화용
 # [ADD] 캐시용 DB 함수
 from Server.db_manager import get_urlbert_info_from_db, save_urlbert_to_db
 # URL 분류 함수 임포트 (네 함수가 들어있는 파일 경로에 맞춰 조정)
-from urlbert.urlbert2.core.urlbert_analyzer import classify_url_and_explain
-from urlbert.urlbert2.core.model_loader import load_inference_model
+from urlbert.urlbert2.core.sidecar import classify_url
 
 from langchain.agents import Tool
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -42,8 +41,8 @@ llm = ChatGoogleGenerativeAI(
 )
 
 try:
-    urlbert_model, urlbert_tokenizer = load_inference_model()
-    url_tool = load_urlbert_tool(urlbert_model, urlbert_tokenizer)
+    # 모델은 URLBERT 사이드카가 보유, 사이드카가 없으면 첫 분석 때 프로세스 내에서 로드
+    url_tool = load_urlbert_tool()
 except Exception as e:
     url_tool = Tool(
         name="URLBERT_ThreatAnalyzer",
@@ -140,7 +139,7 @@ def handle_ask(query: str) -> AskResponse:
 
         # [ADD] 2) 모델 실행
         try:
-            result = classify_url_and_explain(url, urlbert_model, urlbert_tokenizer)
+            result = classify_url(url)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"URL 분석 중 오류: {e}")
 
@@ -0,0 +1,59 @@
+# bench_cold_start.py
+# 원본 체크포인트 2개 로드 vs 추론용 통합 체크포인트(mmap) 로드 콜드 스타트 비교
+#
+# 사용 예 (urlbert2 디렉토리에서 실행):
+#   python bench_cold_start.py --convert --repeat 3
+# 각 측정은 새 프로세스에서 수행하며, 모델 로드 시간 / 첫 추론 시간 / 최대 RSS를 출력합니다.
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+_CHILD = r"""
+import json, resource, time
+t0 = time.perf_counter()
+from core.model_loader import load_fp32_model
+from core.urlbert_analyzer import preprocess_url_for_inference
+from core.fast_tokenizer import UrlTokenizer
+import torch
+t1 = time.perf_counter()
+model = load_fp32_model().eval()
+t2 = time.perf_counter()
+x = preprocess_url_for_inference("http://example.com/login", "NOHEADER", UrlTokenizer(), None)
+with torch.no_grad():
+    model(list(x))
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "load": t2 - t1, "first_forward": t3 - t2,
+                  "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def _measure(consolidated: bool) -> dict:
+    env = dict(os.environ, URLBERT_CONSOLIDATED_CHECKPOINT="1" if consolidated else "0")
+    out = subprocess.run([sys.executable, "-c", _CHILD], env=env, capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--convert", action="store_true", help="통합 체크포인트를 먼저 (다시) 만듭니다")
+    args = parser.parse_args()
+
+    if args.convert:
+        from core.model_loader import convert_to_inference_checkpoint
+        convert_to_inference_checkpoint()
+
+    for name, consolidated in (("원본 2파일", False), ("통합(mmap)", True)):
+        runs = [_measure(consolidated) for _ in range(args.repeat)]
+        avg = {k: sum(r[k] for r in runs) / len(runs) for k in runs[0]}
+        print(f"[{name}] 로드 {avg['load']:.2f}s, 첫 추론 {avg['first_forward']:.2f}s, "
+              f"import {avg['import']:.2f}s, 최대 RSS {avg['max_rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# bench_memory.py
+# 요청(배치)당 추론 peak 메모리 / 지연시간 비교
+#   legacy: output_hidden_states=True로 전 층 출력 보관 + no_grad + 요청마다 새 입력 텐서
+#   lean  : [CLS] 벡터만 사용하는 forward + inference_mode + (배치 크기, 길이)별 입력 버퍼 재사용
+#
+# 사용 예 (urlbert2 디렉토리에서 실행):
+#   python bench_memory.py --csv dataset/test.csv --limit 500
+#   python bench_memory.py --csv dataset/test.csv --batch-size 16
+# CPU에서는 모드마다 별도 프로세스를 띄우고, 요청 직전에 최대 RSS(VmHWM)를 초기화한 뒤 증가분을 잽니다.
+# (해제된 메모리가 바로 OS로 반환되도록 MALLOC_MMAP_THRESHOLD_를 낮추고 요청마다 malloc_trim을 호출)
+# GPU에서는 torch.cuda.max_memory_allocated 증가분을 잽니다.
+import argparse
+import ctypes
+import json
+import os
+import subprocess
+import sys
+import time
+
+import torch
+import torch.nn.functional as F
+
+from config import DEVICE, VOCAB_FILE_PATH
+from core.fast_tokenizer import UrlTokenizer
+from core.model_loader import load_fp32_model
+from core.padding import bucket_length, pad_batch, get_input_buffers
+from bench_utils import load_samples, encode_samples
+
+MODES = ("legacy", "lean")
+
+
+def _read_status_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _reset_peak():
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except OSError:
+        pass
+    if DEVICE.type == "cuda":
+        torch.cuda.synchronize()
+        torch.cuda.reset_peak_memory_stats()
+        return torch.cuda.memory_allocated()
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")  # VmHWM을 현재 RSS로 초기화
+    return _read_status_kb("VmRSS") * 1024
+
+
+def _peak_since(baseline: int) -> int:
+    if DEVICE.type == "cuda":
+        torch.cuda.synchronize()
+        return torch.cuda.max_memory_allocated() - baseline
+    return _read_status_kb("VmHWM") * 1024 - baseline
+
+
+def legacy_forward(model, chunk: list, pad_size: int):
+    ids, types, masks = pad_batch(chunk, pad_size)
+    with torch.no_grad():
+        out = model.bert(ids, attention_mask=masks, token_type_ids=types, output_hidden_states=True)
+        logits = model.classifier(model.dropout(out.hidden_states[-1][:, 0, :]))
+        return F.softmax(logits, dim=1)
+
+
+def lean_forward(model, chunk: list, pad_size: int):
+    ids, types, masks = get_input_buffers().fill(chunk, pad_size)
+    with torch.inference_mode():
+        return F.softmax(model([ids, types, masks]), dim=1)
+
+
+def run_child(args):
+    """한 가지 모드만 측정하고 결과를 JSON 한 줄로 출력합니다."""
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    tokenizer = UrlTokenizer(VOCAB_FILE_PATH)
+    df = load_samples(args.csv, args.limit)
+    encoded = encode_samples(df, tokenizer)
+    model = load_fp32_model().to(DEVICE).eval()
+    forward = legacy_forward if args.child == "legacy" else lean_forward
+
+    chunks = [encoded[i:i + args.batch_size] for i in range(0, len(encoded), args.batch_size)]
+    forward(model, chunks[0], bucket_length(max(len(x) for x in chunks[0])))  # 첫 호출(지연 초기화) 제외
+
+    peaks, elapsed, probs = [], 0.0, []
+    for chunk in chunks:
+        pad_size = bucket_length(max(len(x) for x in chunk))
+        baseline = _reset_peak()
+        start = time.perf_counter()
+        out = forward(model, chunk, pad_size)
+        elapsed += time.perf_counter() - start
+        peaks.append(_peak_since(baseline))
+        probs.extend(out[:, 1].tolist())
+    print(json.dumps({
+        "mode": args.child,
+        "requests": len(chunks),
+        "peak_mb_max": max(peaks) / (1024 * 1024),
+        "peak_mb_mean": sum(peaks) / len(peaks) / (1024 * 1024),
+        "ms_per_request": elapsed / len(chunks) * 1000,
+        "probs": probs,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", required=True, help="'url' 컬럼이 있는 CSV")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=1, help="요청 1건당 URL 수")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op 스레드 수")
+    parser.add_argument("--child", choices=MODES, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args)
+        return
+
+    env = dict(os.environ, MALLOC_MMAP_THRESHOLD_="65536", URLBERT_WARMUP="0")
+    results = {}
+    for mode in MODES:
+        cmd = [sys.executable, os.path.abspath(__file__), "--csv", args.csv, "--limit", str(args.limit),
+               "--batch-size", str(args.batch_size), "--child", mode]
+        if args.threads:
+            cmd += ["--threads", str(args.threads)]
+        out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True).stdout
+        results[mode] = json.loads(out.strip().splitlines()[-1])
+
+    for mode in MODES:
+        r = results[mode]
+        print(f"[{mode}] 요청 {r['requests']}건 (배치 {args.batch_size}): peak 최대 {r['peak_mb_max']:.1f} MB, "
+              f"평균 {r['peak_mb_mean']:.1f} MB, {r['ms_per_request']:.2f} ms/요청")
+    legacy, lean = results["legacy"], results["lean"]
+    drift = max(abs(a - b) for a, b in zip(legacy["probs"], lean["probs"]))
+    print(f"\npeak 메모리 x{legacy['peak_mb_max'] / max(lean['peak_mb_max'], 1e-6):.2f} 감소, "
+          f"속도 x{legacy['ms_per_request'] / lean['ms_per_request']:.2f}, 최대 확률 차이 {drift:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# bench_padding.py
+# 고정 PAD_SIZE=512 패딩 vs 길이 버킷/동적 패딩 지연시간 비교 리포트
+#
+# 사용 예 (urlbert2 디렉토리에서 실행):
+#   python bench_padding.py --csv dataset/traffic_sample.csv --batch-size 1 --batch-size 8
+# CSV에는 'url' 컬럼이 필요하며, 'header_info' 컬럼(urlbert_analysis 덤프)이 있으면 그대로 사용합니다.
+import argparse
+from collections import Counter
+
+from config import PAD_SIZE, PAD_BUCKETS
+from core.model_loader import load_inference_model
+from core.padding import bucket_length
+from bench_utils import load_samples, encode_samples, timed_forward
+
+PAD_MODES = {
+    "fixed":   lambda chunk: PAD_SIZE,
+    "bucket":  lambda chunk: bucket_length(max(len(x) for x in chunk)),
+    "dynamic": lambda chunk: bucket_length(max(len(x) for x in chunk), buckets=()),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", required=True, help="실제 트래픽 URL 샘플 CSV")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, action="append", dest="batch_sizes")
+    parser.add_argument("--fetch-headers", action="store_true", help="header_info가 없으면 직접 요청해서 채움")
+    args = parser.parse_args()
+    batch_sizes = args.batch_sizes or [1, 8]
+
+    model, tokenizer = load_inference_model()
+    df = load_samples(args.csv, args.limit, args.fetch_headers)
+    encoded = encode_samples(df, tokenizer)
+
+    # 1) 트래픽 길이 분포
+    lengths = [len(x) for x in encoded]
+    hist = Counter(bucket_length(n) for n in lengths)
+    print(f"샘플 수: {len(encoded)}, 평균 길이: {sum(lengths) / len(lengths):.1f}, 최대 길이: {max(lengths)}")
+    print("버킷 분포:", ", ".join(f"{b}: {hist.get(b, 0)}" for b in (PAD_BUCKETS or (PAD_SIZE,))))
+
+    # 2) 배치 크기별 지연시간 / logits 일치 여부
+    for bs in batch_sizes:
+        base_t, base_logits = timed_forward(model, encoded, bs, PAD_MODES["fixed"])
+        print(f"\n[batch_size={bs}] fixed(512): {base_t / len(encoded) * 1000:.2f} ms/url")
+        for mode in ("bucket", "dynamic"):
+            t, logits = timed_forward(model, encoded, bs, PAD_MODES[mode])
+            drift = (logits - base_logits).abs().max().item()
+            print(f"  {mode:<8}: {t / len(encoded) * 1000:.2f} ms/url "
+                  f"(절감 {(1 - t / base_t) * 100:.1f}%, x{base_t / t:.2f}), max|Δlogit|={drift:.2e}")
+
+
+if __name__ == "__main__":
+    main()
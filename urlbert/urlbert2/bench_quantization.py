@@ -0,0 +1,52 @@
+# bench_quantization.py
+# fp32 모델 vs INT8 동적 양자화 모델 정확도/지연시간/크기 비교
+#
+# 사용 예 (urlbert2 디렉토리에서 실행):
+#   python bench_quantization.py --csv dataset/test.csv --limit 2000
+# CSV에는 'url', 'label'(malicious/benign 또는 1/0) 컬럼이 필요합니다.
+import argparse
+
+import torch
+
+from core.model_loader import load_inference_model, load_fp32_model, load_int8_model
+from bench_utils import load_samples, encode_samples, timed_forward, classification_metrics, model_size_mb
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", required=True, help="라벨이 있는 평가용 CSV")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op 스레드 수")
+    args = parser.parse_args()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    _, tokenizer = load_inference_model()
+    df = load_samples(args.csv, args.limit)
+    if "label" not in df.columns:
+        raise ValueError("CSV에 'label' 컬럼이 없습니다.")
+    encoded = encode_samples(df, tokenizer)
+    y_true = df["label"].astype(int).tolist()
+
+    fp32 = load_fp32_model().to("cpu").eval()
+    int8 = load_int8_model().eval()
+
+    results = {}
+    for name, model in (("fp32", fp32), ("int8", int8)):
+        t, logits = timed_forward(model, encoded, args.batch_size)
+        preds = logits.argmax(dim=1).tolist()
+        results[name] = (t, logits, preds)
+        m = classification_metrics(y_true, preds)
+        print(f"[{name}] {t / len(encoded) * 1000:.2f} ms/url, 크기 {model_size_mb(model):.1f} MB, "
+              f"acc={m['accuracy']:.4f} P={m['precision']:.4f} R={m['recall']:.4f} F1={m['f1']:.4f}")
+
+    t32, l32, p32 = results["fp32"]
+    t8, l8, p8 = results["int8"]
+    agree = sum(1 for a, b in zip(p32, p8) if a == b) / len(p32)
+    prob_drift = (torch.softmax(l32, dim=1) - torch.softmax(l8, dim=1)).abs().max().item()
+    print(f"\n속도 x{t32 / t8:.2f}, 예측 일치율 {agree * 100:.2f}%, 최대 확률 차이 {prob_drift:.4f}")
+
+
+if __name__ == "__main__":
+    main()
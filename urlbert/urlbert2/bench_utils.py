@@ -0,0 +1,86 @@
+# bench_utils.py
+# 벤치마크/비교 스크립트에서 같이 쓰는 샘플 로딩, 시간 측정, 지표 계산 함수
+import time
+
+import pandas as pd
+import torch
+
+from config import PAD_SIZE
+from core.urlbert_analyzer import encode_url_for_inference, get_header_info
+from core.padding import bucket_length, pad_batch
+
+LABEL_MAP = {"malicious": 1, "benign": 0, "1": 1, "0": 0, 1: 1, 0: 0}
+
+
+def load_samples(csv_path: str, limit: int = None, fetch_headers: bool = False) -> pd.DataFrame:
+    """
+    'url' 컬럼(필수), 'header_info'/'label' 컬럼(선택)을 가진 CSV를 읽습니다.
+    header_info가 없으면 fetch_headers=True일 때만 실제로 요청하고, 아니면 NOHEADER로 둡니다.
+    """
+    df = pd.read_csv(csv_path)
+    if "url" not in df.columns:
+        raise ValueError("CSV에 'url' 컬럼이 없습니다.")
+    if limit:
+        df = df.head(limit)
+    df = df.reset_index(drop=True)
+
+    headers = []
+    for i, url in enumerate(df["url"]):
+        h = df["header_info"][i] if "header_info" in df.columns else None
+        if not isinstance(h, str) or not h:
+            h = get_header_info(url) if fetch_headers else "NOHEADER"
+        headers.append(h)
+    df["header_info"] = headers
+
+    if "label" in df.columns:
+        df["label"] = df["label"].map(lambda y: LABEL_MAP.get(y, LABEL_MAP.get(str(y).strip().lower())))
+        df = df[df["label"].notna()].reset_index(drop=True)
+    return df
+
+
+def encode_samples(df: pd.DataFrame, tokenizer) -> list:
+    return [encode_url_for_inference(u, h, tokenizer, PAD_SIZE) for u, h in zip(df["url"], df["header_info"])]
+
+
+def timed_forward(model, encoded: list, batch_size: int = 1, pad_size_fn=None):
+    """
+    encoded(토큰 id 리스트들)를 batch_size씩 forward합니다.
+    pad_size_fn(chunk) -> int 로 배치 패딩 길이를 정하며, 기본은 길이 버킷입니다.
+    (forward 총 소요 초, logits [N, 2]) 반환
+    """
+    if pad_size_fn is None:
+        pad_size_fn = lambda chunk: bucket_length(max(len(x) for x in chunk))
+    logits = []
+    elapsed = 0.0
+    for i in range(0, len(encoded), batch_size):
+        chunk = encoded[i:i + batch_size]
+        ids, types, masks = pad_batch(chunk, pad_size_fn(chunk))
+        start = time.perf_counter()
+        with torch.no_grad():
+            out = model([ids, types, masks])
+        elapsed += time.perf_counter() - start
+        logits.append(out.float().cpu())
+    return elapsed, torch.cat(logits, dim=0)
+
+
+def classification_metrics(y_true, y_pred) -> dict:
+    tp = sum(1 for t, p in zip(y_true, y_pred) if t == 1 and p == 1)
+    tn = sum(1 for t, p in zip(y_true, y_pred) if t == 0 and p == 0)
+    fp = sum(1 for t, p in zip(y_true, y_pred) if t == 0 and p == 1)
+    fn = sum(1 for t, p in zip(y_true, y_pred) if t == 1 and p == 0)
+    n = max(1, len(y_true))
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"accuracy": (tp + tn) / n, "precision": precision, "recall": recall, "f1": f1}
+
+
+def model_size_mb(model) -> float:
+    """state_dict 기준 파라미터/버퍼 크기(MB). 양자화 모델의 packed 가중치도 포함합니다."""
+    total = 0
+    for v in model.state_dict().values():
+        if isinstance(v, torch.Tensor):
+            total += v.numel() * v.element_size()
+        elif isinstance(v, tuple):
+            total += sum(t.numel() * t.element_size() for t in v if isinstance(t, torch.Tensor))
+    return total / (1024 * 1024)
@@ -0,0 +1,67 @@
+# check_tokenizer_parity.py
+# 기존 pytorch_pretrained_bert 토크나이저와 UrlTokenizer(fast + 구성요소 캐시)의 토큰 id가 같은지 확인합니다.
+#
+# 사용 예 (urlbert2 디렉토리에서 실행):
+#   python check_tokenizer_parity.py dataset/train.csv dataset/test.csv
+# 'url' 컬럼(필수), 'header_info' 컬럼(선택)을 사용합니다. 불일치가 하나라도 있으면 종료 코드 1.
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from config import VOCAB_FILE_PATH
+from core.fast_tokenizer import UrlTokenizer
+
+# CSV와 별개로 항상 검사하는 경계 사례: str.split()과 BERT의 공백/제어문자 규칙이 다른 문자들
+EDGE_CASES = [
+    "http://example.com/a\x0bb\x0cc?q=1",
+    "http://example.com/\x1c\x1d\x1e\x1flogin",
+    "http://ex\x00am\x7fple.com/\x08path",
+    "https://bank.com/verify\u200baccount\ufeff [SEP] server: nginx\x1f",
+    "http://example.com/a\u3000b\xa0c\u2028d\x85e\ufffdf",
+    "http://example.com/\tpath\r\nnext",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("csv", nargs="+", help="학습/평가 URL CSV")
+    parser.add_argument("--show", type=int, default=5, help="출력할 불일치 예시 수")
+    args = parser.parse_args()
+
+    tok = UrlTokenizer(VOCAB_FILE_PATH)
+    legacy = tok.legacy
+    if tok.fast is None:
+        print("⚠️ fast 토크나이저를 불러오지 못해 캐시 경로만 검사합니다.")
+
+    texts = list(EDGE_CASES)
+    for path in args.csv:
+        df = pd.read_csv(path)
+        texts.extend(df["url"].astype(str).tolist())
+        if "header_info" in df.columns:
+            texts.extend(f"{u} [SEP] {h}" for u, h in zip(df["url"].astype(str), df["header_info"].fillna("NOHEADER")))
+
+    mismatches = 0
+    t_legacy = t_fast = 0.0
+    for text in texts:
+        start = time.perf_counter()
+        expected = legacy.convert_tokens_to_ids(legacy.tokenize(text))
+        t_legacy += time.perf_counter() - start
+
+        start = time.perf_counter()
+        got = tok.encode_ids(text)
+        t_fast += time.perf_counter() - start
+
+        if got != expected:
+            mismatches += 1
+            if mismatches <= args.show:
+                print(f"불일치: {text!r}\n  legacy={expected}\n  fast  ={got}")
+
+    print(f"\n검사 {len(texts)}건, 불일치 {mismatches}건")
+    print(f"legacy {t_legacy:.2f}s vs fast+cache {t_fast:.2f}s, 캐시 {tok.cache_info()}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,9 @@ PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 
 BERT_TOKENIZER_DIR = os.path.join(PROJECT_ROOT, 'bert_tokenizer')
 VOCAB_FILE_PATH = os.path.join(BERT_TOKENIZER_DIR, 'vocab.txt')
+# 토크나이저: fast WordPiece + URL 구성요소(호스트/경로 세그먼트/헤더 값) 단위 LRU 캐시
+USE_FAST_TOKENIZER = os.getenv("URLBERT_FAST_TOKENIZER", "1") == "1"
+TOKEN_CACHE_SIZE = int(os.getenv("URLBERT_TOKEN_CACHE_SIZE", 50000))
 
 BERT_CONFIG_DIR = os.path.join(PROJECT_ROOT, 'bert_config')
 
@@ -19,11 +22,35 @@ BERT_PRETRAINED_MODEL_PATH = os.path.join(BERT_MODEL_DIR, 'urlBERT (1).pt')
 
 CLASSIFIER_CHECKPOINTS_DIR = os.path.join(PROJECT_ROOT, 'finetune', 'phishing', 'checkpoints')
 CLASSIFIER_MODEL_PATH = os.path.join(CLASSIFIER_CHECKPOINTS_DIR, 'modelx_URLBERT_82.pth')
+# 추론 전용 통합 체크포인트 (BERT 본체 + classifier만, MLM 헤드 제외, mmap 로드)
+# 최초 1회 원본 두 파일(urlBERT (1).pt + modelx_URLBERT_82.pth)에서 변환해 저장합니다.
+USE_CONSOLIDATED_CHECKPOINT = os.getenv("URLBERT_CONSOLIDATED_CHECKPOINT", "1") == "1"
+CONSOLIDATED_MODEL_PATH = os.path.join(CLASSIFIER_CHECKPOINTS_DIR, 'modelx_URLBERT_82.inference.pt')
+# 증류(distillation)로 만든 4~6층 학생 모델 (finetune/phishing/distill_student.py 가 생성)
+# URLBERT_MODEL_VARIANT=student 이면 교사(12층) 대신 학생 모델을 로드합니다.
+MODEL_VARIANT = os.getenv("URLBERT_MODEL_VARIANT", "teacher").lower()
+STUDENT_MODEL_PATH = os.path.join(CLASSIFIER_CHECKPOINTS_DIR, 'modelx_URLBERT_82.student.pt')
+# INT8 동적 양자화 결과 캐시 (최초 1회 양자화 후 재사용)
+QUANTIZED_MODEL_PATH = os.path.join(
+    CLASSIFIER_CHECKPOINTS_DIR,
+    'modelx_URLBERT_82.student.int8.pt' if MODEL_VARIANT == "student" else 'modelx_URLBERT_82.int8.pt'
+)
 
 # --- 2. 모델 및 학습 관련 설정 ---
 PAD_SIZE=512
+# 추론 시 동적 패딩: 배치 최장 길이를 아래 버킷 중 가장 작은 크기로 올려 패딩합니다.
+# URLBERT_PAD_BUCKETS="" 로 두면 버킷 없이 배치 최장 길이에 딱 맞춰 패딩합니다.
+DYNAMIC_PADDING = os.getenv("URLBERT_DYNAMIC_PADDING", "1") == "1"
+PAD_BUCKETS = tuple(int(b) for b in os.getenv("URLBERT_PAD_BUCKETS", "64,128,256,512").split(",") if b.strip())
 SEED = 42 
 DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+# 추론 정밀도: "fp32"(기본) 또는 "int8"(CPU 전용, Linear 레이어 동적 양자화)
+INFERENCE_PRECISION = os.getenv("URLBERT_PRECISION", "fp32").lower()
+# 추론 백엔드: "torch"(기본) / "onnx"(onnxruntime) / "torchscript"
+# onnx/torchscript는 CLASSIFIER_MODEL_PATH 옆에 EXPORT_VERSION이 붙은 파일로 내보낸 뒤 재사용합니다.
+INFERENCE_BACKEND = os.getenv("URLBERT_BACKEND", "torch").lower()
+EXPORT_VERSION = "v2"             # 내보내기 그래프가 바뀌면 올려서 기존 파일을 무효화 (v2: [CLS]만 쓰는 forward)
+EXPORT_PARITY_ATOL = 1e-3         # 내보낸 모델과 torch 모델의 logits 허용 오차
 
 # BERT 모델 설정 시 필요한 kwargs 
 BERT_CONFIG_KWARTS = {
@@ -42,5 +69,71 @@ IMPORTANT_HEADERS = ["Server", "Content-Type", "Set-Cookie", "Location", "Date"]
 
 # --- 3. 기타 설정 ---
 REQUEST_TIMEOUT_SECONDS = 5 # requests.get의 timeout
+# 헤더 수집: asyncio(aiohttp) 이벤트 루프 스레드 하나 + 공유 커넥션 풀 (core/header_fetcher.py)
+# aiohttp가 없거나 URLBERT_ASYNC_HEADERS=0 이면 기존 requests.get 방식으로 동작합니다.
+HEADER_FETCH_ASYNC = os.getenv("URLBERT_ASYNC_HEADERS", "1") == "1"
+HEADER_MAX_CONCURRENCY = int(os.getenv("URLBERT_HEADER_CONCURRENCY", 256))  # 동시에 진행하는 헤더 요청 상한
+HEADER_POOL_SIZE = int(os.getenv("URLBERT_HEADER_POOL_SIZE", 100))          # 전체 커넥션 수 상한
+HEADER_PER_HOST_LIMIT = int(os.getenv("URLBERT_HEADER_PER_HOST", 4))        # 호스트당 커넥션 수 상한
+# 헤더 프로브: 응답 헤더만 받고 본문은 읽지 않은 채 연결을 닫습니다. 리다이렉트는 직접 따라가며 경로를 기록합니다.
+HEADER_MAX_REDIRECTS = int(os.getenv("URLBERT_HEADER_MAX_REDIRECTS", 10))   # 초과하면 NOHEADER (requests의 TooManyRedirects와 동일)
+# 본문 읽기 상한(byte). Content-Length가 이 값 이하인 작은 응답만 끝까지 읽어 커넥션을 재사용하고, 나머지는 바로 닫습니다.
+HEADER_MAX_BODY_BYTES = int(os.getenv("URLBERT_HEADER_MAX_BODY_BYTES", 16384))
 
 
+
+# --- 4. 추론 배칭 설정 ---
+# 동시에 들어온 요청을 잠깐 모아 한 번의 forward로 처리합니다.
+MICRO_BATCH_ENABLED = os.getenv("URLBERT_MICRO_BATCH", "1") == "1"
+MICRO_BATCH_MAX_SIZE = int(os.getenv("URLBERT_MICRO_BATCH_MAX_SIZE", 16))      # 한 배치 최대 요청 수
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("URLBERT_MICRO_BATCH_WAIT_MS", 5))   # 첫 요청 이후 최대 대기 시간(ms)
+
+# --- 5. 대량(batch) 분류 설정 (classify_urls_batch) ---
+BATCH_HEADER_WORKERS = int(os.getenv("URLBERT_BATCH_HEADER_WORKERS", 32))     # 헤더 동시 요청 수
+BATCH_CHUNK_MAX_SIZE = int(os.getenv("URLBERT_BATCH_CHUNK_MAX_SIZE", 64))     # 청크 최대 URL 수
+BATCH_CHUNK_MEMORY_MB = float(os.getenv("URLBERT_BATCH_CHUNK_MEMORY_MB", 512)) # 청크당 추정 활성값 메모리 상한(MB)
+
+# --- 6. 추론 사이드카 (모델을 가진 별도 프로세스, Unix 도메인 소켓) ---
+# 실행: python -m urlbert.urlbert2.core.sidecar_server  (프로젝트 루트에서)
+SIDECAR_ENABLED = os.getenv("URLBERT_SIDECAR", "1") == "1"
+SIDECAR_SOCKET_PATH = os.getenv("URLBERT_SIDECAR_SOCKET", "/tmp/urlbert_sidecar.sock")
+SIDECAR_TIMEOUT_SECONDS = float(os.getenv("URLBERT_SIDECAR_TIMEOUT", 15))       # 헤더 요청 포함 응답 대기 시간
+SIDECAR_RETRY_SECONDS = float(os.getenv("URLBERT_SIDECAR_RETRY", 10))           # 연결 실패 후 재시도까지 프로세스 내 추론 사용
+
+# --- 7. 지연 로드 / 워밍업 ---
+# 서버 시작 시 백그라운드로 모델을 로드하고 더미 배치를 돌려 둘지 여부 (Flask: Server/app.py)
+WARMUP_ON_START = os.getenv("URLBERT_WARMUP", "1") == "1"
+WARMUP_ROUNDS = int(os.getenv("URLBERT_WARMUP_ROUNDS", 2))
+
+# --- 8. 추측 추론 (헤더 대기 중 "url [SEP] NOHEADER"로 먼저 추론) ---
+# 헤더 요청과 동시에 URL만으로 추론하고, 확신도가 SPECULATIVE_CONFIDENCE 이상이면 헤더를 기다리지 않고 바로 반환합니다.
+SPECULATIVE_INFERENCE = os.getenv("URLBERT_SPECULATIVE", "0") == "1"
+SPECULATIVE_CONFIDENCE = float(os.getenv("URLBERT_SPECULATIVE_CONFIDENCE", 0.99))
+
+# --- 9. 요청 마감 시간 / 단계 실행 (core/deadline.py, core/stage_graph.py) ---
+# 마감 시간은 호출부(/analyze, 챗봇 등)가 정하고, 여기서는 단계 실행용 공유 스레드 수와 사이드카 여유 시간만 정합니다.
+STAGE_POOL_WORKERS = int(os.getenv("URLBERT_STAGE_WORKERS", 32))
+# 시간 초과로 버렸지만 아직 풀 스레드를 잡고 있는 실행이 단계별로 이만큼 쌓이면, 그 단계는 새로 실행하지 않고 기본값을 씁니다.
+# (느린 WHOIS/크롤링/SSL이 공유 풀을 다 차지해 이후 요청이 줄 서는 것을 막음. 0 이하면 제한 없음)
+STAGE_MAX_ABANDONED = int(os.getenv("URLBERT_STAGE_MAX_ABANDONED", 4))
+SIDECAR_DEADLINE_GRACE_SECONDS = float(os.getenv("URLBERT_SIDECAR_DEADLINE_GRACE", 0.5))  # 마감 후 forward/전송에 더 기다려 주는 시간
+
+# --- 10. DNS 캐시 (core/dns_cache.py) ---
+# 헤더 프로브, DNS 확인, 크롤링, SSL 조회가 함께 쓰는 프로세스 공용 캐시입니다.
+# aiodns가 설치되어 있으면 레코드 TTL을 따르고, 없으면 getaddrinfo 결과를 DNS_CACHE_TTL_SECONDS 동안 씁니다.
+DNS_CACHE_SIZE = int(os.getenv("URLBERT_DNS_CACHE_SIZE", 50000))
+DNS_CACHE_TTL_SECONDS = float(os.getenv("URLBERT_DNS_TTL", os.getenv("URLBERT_HEADER_DNS_TTL", 300)))
+DNS_MIN_TTL_SECONDS = float(os.getenv("URLBERT_DNS_MIN_TTL", 10))          # TTL 0~수 초 레코드도 이만큼은 재사용
+DNS_MAX_TTL_SECONDS = float(os.getenv("URLBERT_DNS_MAX_TTL", 3600))
+DNS_NEGATIVE_TTL_SECONDS = float(os.getenv("URLBERT_DNS_NEGATIVE_TTL", 300))  # NXDOMAIN / 레코드 없음
+DNS_FAILURE_TTL_SECONDS = float(os.getenv("URLBERT_DNS_FAILURE_TTL", 30))     # 리졸버 시간 초과 / SERVFAIL
+DNS_RESOLVE_TIMEOUT_SECONDS = float(os.getenv("URLBERT_DNS_TIMEOUT", 3))      # 호출부 기본 대기 시간
+DNS_RESOLVER_WORKERS = int(os.getenv("URLBERT_DNS_WORKERS", 16))              # getaddrinfo 스레드 수
+DNS_USE_AIODNS = os.getenv("URLBERT_DNS_AIODNS", "1") == "1"
+
+# --- 11. 페이지 수집 (core/page_fetcher.py) ---
+# 헤더 추출과 크롤링 지표(bot/feature_crawler)가 URL 한 건을 한 번만 받아 같이 씁니다.
+PAGE_MAX_BODY_BYTES = int(os.getenv("URLBERT_PAGE_MAX_BODY_BYTES", 1024 * 1024))   # 본문 읽기 상한(byte)
+PAGE_FETCH_TIMEOUT_SECONDS = float(os.getenv("URLBERT_PAGE_TIMEOUT", 10))          # 리다이렉트+본문 포함 전체 시간
+PAGE_CACHE_TTL_SECONDS = float(os.getenv("URLBERT_PAGE_CACHE_TTL", 30))             # 받은 결과를 재사용하는 시간
+PAGE_CACHE_MAX_MB = float(os.getenv("URLBERT_PAGE_CACHE_MAX_MB", 64))               # 캐시에 들고 있는 본문 총량 상한
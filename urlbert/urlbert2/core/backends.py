@@ -0,0 +1,151 @@
+# urlbert/urlbert2/core/backends.py
+# 분류 모델 내보내기(ONNX / TorchScript) 및 추론 백엔드 래퍼
+#
+# 모든 백엔드는 기존 모델과 같은 호출 규약을 따릅니다.
+#   logits = model([input_ids, input_types, input_masks])   # [B, 2] torch.Tensor
+# 따라서 predict_url / 배치 실행기 등 호출부는 바꿀 필요가 없습니다.
+import json
+import os
+
+import torch
+import torch.nn as nn
+
+SUPPORTED_BACKENDS = ("torch", "onnx", "torchscript")
+ARTIFACT_EXT = {"onnx": ".onnx", "torchscript": ".ts"}
+ONNX_OPSET = 14
+
+
+class _ExportWrapper(nn.Module):
+    """리스트 입력을 받는 분류 모델을 (ids, types, masks) 위치 인자 형태로 감쌉니다."""
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, token_type_ids, attention_mask):
+        return self.model([input_ids, token_type_ids, attention_mask])
+
+
+class TorchScriptClassifier:
+    def __init__(self, path: str, device):
+        self.device = device
+        self.module = torch.jit.load(path, map_location=device)
+        self.module.eval()
+
+    def __call__(self, x):
+        with torch.no_grad():
+            return self.module(x[0].to(self.device), x[1].to(self.device), x[2].to(self.device))
+
+    def eval(self):
+        return self
+
+
+class OnnxClassifier:
+    def __init__(self, path: str):
+        try:
+            import onnxruntime as ort
+        except Exception as e:
+            raise RuntimeError("onnxruntime 패키지가 필요합니다. `pip install onnxruntime` 해주세요.") from e
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+
+    def __call__(self, x):
+        feeds = {
+            "input_ids": x[0].cpu().numpy(),
+            "token_type_ids": x[1].cpu().numpy(),
+            "attention_mask": x[2].cpu().numpy(),
+        }
+        logits = self.session.run(["logits"], feeds)[0]
+        return torch.from_numpy(logits)
+
+    def eval(self):
+        return self
+
+
+def artifact_paths(checkpoint_path: str, backend: str, version: str):
+    """
+    modelx_URLBERT_82.pth 옆에 버전이 붙은 내보내기 파일 경로를 만듭니다.
+    예) modelx_URLBERT_82.v1.onnx / modelx_URLBERT_82.v1.onnx.json(매니페스트)
+    """
+    base = os.path.splitext(checkpoint_path)[0]
+    artifact = f"{base}.{version}{ARTIFACT_EXT[backend]}"
+    return artifact, artifact + ".json"
+
+
+def _dummy_inputs(seq_lens=(16, 64, 128), batch_size: int = 2, vocab_size: int = 5000, seed: int = 0):
+    """패리티 검사용 입력. 길이/배치가 다른 여러 조합으로 동적 축까지 확인합니다."""
+    g = torch.Generator().manual_seed(seed)
+    out = []
+    for L in seq_lens:
+        ids = torch.randint(1, vocab_size, (batch_size, L), generator=g)
+        masks = torch.ones(batch_size, L, dtype=torch.long)
+        types = torch.zeros(batch_size, L, dtype=torch.long)
+        # 두 번째 샘플은 뒤쪽 절반을 패딩 처리
+        masks[1:, L // 2:] = 0
+        types[1:, L // 2:] = 1
+        ids[1:, L // 2:] = 0
+        out.append((ids, types, masks))
+    return out
+
+
+def check_parity(reference: nn.Module, candidate, atol: float) -> float:
+    """reference(torch 모델)와 candidate 백엔드의 logits 최대 차이를 계산하고, atol을 넘으면 거부합니다."""
+    reference = reference.to("cpu").eval()
+    drift = 0.0
+    with torch.no_grad():
+        for ids, types, masks in _dummy_inputs():
+            ref = reference([ids, types, masks]).float()
+            got = candidate([ids, types, masks]).float().cpu()
+            drift = max(drift, (ref - got).abs().max().item())
+    if drift > atol:
+        raise RuntimeError(f"내보낸 모델의 logits 차이({drift:.2e})가 허용치({atol:.0e})를 넘어 사용하지 않습니다.")
+    return drift
+
+
+def export_classifier(model: nn.Module, backend: str, path: str):
+    """MaskedLM 헤드가 제거된 분류 모델(BERT 본체 + classifier)을 ONNX 또는 TorchScript로 저장합니다."""
+    wrapper = _ExportWrapper(model.to("cpu").eval()).eval()
+    example = _dummy_inputs(seq_lens=(32,))[0]
+
+    if backend == "torchscript":
+        with torch.no_grad():
+            traced = torch.jit.trace(wrapper, example, strict=False)
+        traced = torch.jit.freeze(traced)
+        traced.save(path)
+    elif backend == "onnx":
+        dynamic = {0: "batch", 1: "seq"}
+        torch.onnx.export(
+            wrapper, example, path,
+            input_names=["input_ids", "token_type_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={"input_ids": dynamic, "token_type_ids": dynamic,
+                          "attention_mask": dynamic, "logits": {0: "batch"}},
+            opset_version=ONNX_OPSET,
+            do_constant_folding=True,
+        )
+    else:
+        raise ValueError(f"지원하지 않는 백엔드입니다: {backend}")
+
+
+def load_backend(backend: str, path: str, device):
+    if backend == "torchscript":
+        return TorchScriptClassifier(path, device)
+    if backend == "onnx":
+        return OnnxClassifier(path)
+    raise ValueError(f"지원하지 않는 백엔드입니다: {backend}")
+
+
+def read_manifest(manifest_path: str) -> dict:
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def write_manifest(manifest_path: str, manifest: dict):
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
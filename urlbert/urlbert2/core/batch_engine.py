@@ -0,0 +1,110 @@
+# urlbert/urlbert2/core/batch_engine.py
+# 동시 요청을 모아 한 번의 forward로 처리하는 마이크로 배칭 실행기
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import torch
+import torch.nn.functional as F
+
+from config import MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS
+from .padding import get_input_buffers
+
+
+class _BatchItem:
+    __slots__ = ("input_ids", "input_types", "input_masks", "future")
+
+    def __init__(self, input_ids, input_types, input_masks):
+        self.input_ids = input_ids
+        self.input_types = input_types
+        self.input_masks = input_masks
+        self.future = Future()
+
+
+class MicroBatchExecutor:
+    """
+    모델 앞단에 위치하는 추론 실행기.
+    - 첫 요청이 들어오면 max_wait_ms 동안(또는 max_batch_size가 찰 때까지) 요청을 모읍니다.
+    - 모인 요청을 하나의 배치로 묶어 forward 1회 수행 후, 각 호출자에게 결과를 돌려줍니다.
+    - forward는 전용 워커 스레드 하나에서만 실행되므로 Flask 스레드끼리 모델을 두고 경쟁하지 않습니다.
+    """
+
+    def __init__(self, model, max_batch_size: int = MICRO_BATCH_MAX_SIZE,
+                 max_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS):
+        self.model = model
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue: "queue.Queue[_BatchItem]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="urlbert-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, input_ids, input_types, input_masks) -> Future:
+        """
+        전처리된 입력([1, L] 텐서 3개)을 큐에 넣고 Future를 반환합니다.
+        Future 결과는 softmax 확률 텐서([1, num_classes])입니다.
+        """
+        item = _BatchItem(input_ids, input_types, input_masks)
+        self._queue.put(item)
+        return item.future
+
+    def predict(self, input_ids, input_types, input_masks) -> torch.Tensor:
+        """submit() 후 결과가 나올 때까지 기다리는 동기 버전."""
+        return self.submit(input_ids, input_types, input_masks).result()
+
+    # --- 내부 구현 ---
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+
+    def _run_batch(self, batch: list):
+        # 요청마다 버킷 길이가 다를 수 있으므로 배치 최장 길이에 맞춰 다시 패딩
+        # (새 텐서를 만들지 않고 워커 스레드의 (배치 크기, 길이)별 버퍼에 유효 구간만 복사)
+        pad_size = max(item.input_ids.size(1) for item in batch)
+        rows = [item.input_ids[0, :int(item.input_masks[0].sum())] for item in batch]
+        input_ids, input_types, input_masks = get_input_buffers(batch[0].input_ids.device).fill(rows, pad_size)
+
+        with torch.inference_mode():
+            outputs = self.model([input_ids, input_types, input_masks])
+            probabilities = F.softmax(outputs, dim=1)
+
+        for i, item in enumerate(batch):
+            item.future.set_result(probabilities[i:i + 1])
+
+
+# 모델별 실행기 (모델 하나당 워커 스레드 하나)
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_batch_executor(model) -> MicroBatchExecutor:
+    """주어진 모델에 연결된 실행기를 반환합니다. 없으면 생성합니다."""
+    key = id(model)
+    executor = _executors.get(key)
+    if executor is not None and executor.model is model:
+        return executor
+    with _executors_lock:
+        executor = _executors.get(key)
+        if executor is None or executor.model is not model:
+            executor = MicroBatchExecutor(model)
+            _executors[key] = executor
+    return executor
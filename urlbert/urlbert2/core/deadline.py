@@ -0,0 +1,82 @@
+# urlbert/urlbert2/core/deadline.py
+# 요청 단위 마감 시간(deadline)
+#
+# 분석 한 건이 쓸 수 있는 전체 시간을 정해 두고, 단계(헤더, WHOIS, 크롤링, SSL ...)마다 남은 시간만 씁니다.
+# 시간이 다 되면 각 단계는 기다리지 않고 기본값을 돌려주며, 호출부는 그 단계를 "incomplete"로 표시합니다.
+# 단계 실행은 core/stage_graph.py가 담당하고, 단계마다 child()로 만든 마감 시간을 받습니다.
+# Deadline(None) 또는 deadline=None 이면 제한 없이 기존처럼 동작합니다.
+import threading
+import time
+
+
+class Deadline:
+    """monotonic 시계 기준 마감 시각. seconds=None 이면 제한 없음."""
+
+    def __init__(self, seconds: float = None):
+        self.budget = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+        self._cancelled = False
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.expires_at is None and not self._cancelled
+
+    def remaining(self):
+        """남은 시간(초, 0 이상). 제한이 없으면 None."""
+        if self._cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self._cancelled or (self.expires_at is not None and time.monotonic() >= self.expires_at)
+
+    def clamp(self, timeout: float) -> float:
+        """단계별 timeout을 남은 시간 이하로 줄입니다."""
+        remaining = self.remaining()
+        return timeout if remaining is None else min(timeout, remaining)
+
+    def child(self, timeout: float = None) -> "Deadline":
+        """timeout과 이 마감 시간 중 더 이른 쪽으로 끝나는 하위 마감 시간 (단계별 timeout용)."""
+        remaining = self.remaining()
+        if timeout is None:
+            return Deadline(remaining)
+        return Deadline(timeout if remaining is None else min(timeout, remaining))
+
+    def cancel(self):
+        """즉시 만료시키고 on_cancel로 등록한 콜백(진행 중인 요청 취소 등)을 실행합니다."""
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        self._cancel_event.set()
+        for cb in callbacks:
+            try:
+                cb()
+            except Exception:
+                pass
+
+    def wait(self, seconds: float) -> bool:
+        """seconds(남은 시간 이하로 줄임) 동안 기다립니다. 그 사이 cancel()되면 바로 True를 반환합니다 (재시도 대기용)."""
+        return self._cancel_event.wait(self.clamp(seconds))
+
+    def on_cancel(self, callback):
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def __repr__(self):
+        remaining = self.remaining()
+        return "Deadline(unlimited)" if remaining is None else f"Deadline(remaining={remaining:.3f}s)"
+
+
+def deadline_from_seconds(seconds: float):
+    """환경변수 값처럼 0 이하이면 제한 없음(None)으로 취급합니다."""
+    return Deadline(seconds) if seconds and seconds > 0 else None
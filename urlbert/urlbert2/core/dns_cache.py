@@ -0,0 +1,315 @@
+# urlbert/urlbert2/core/dns_cache.py
+# 프로세스 공용 DNS 캐시
+#
+# 헤더 프로브(header_fetcher), DNS 확인/크롤링/SSL 조회(bot/feature_stages.py 등)가 같은 호스트를 각자 다시 풀지 않도록
+# 호스트 단위로 결과를 캐시합니다.
+#   - 성공: 레코드 TTL(aiodns) 또는 DNS_CACHE_TTL_SECONDS(getaddrinfo) 동안, DNS_MIN_TTL~DNS_MAX_TTL 범위로 보정
+#   - NXDOMAIN/레코드 없음: DNS_NEGATIVE_TTL_SECONDS, 시간 초과·SERVFAIL 같은 일시적 실패: DNS_FAILURE_TTL_SECONDS
+#   - 같은 호스트를 동시에 물으면 조회는 한 번만 합니다.
+# 조회는 호출 스레드를 막지 않는 리졸버에서 합니다. aiodns(c-ares)가 있으면 전용 이벤트 루프 스레드에서,
+# 없으면 getaddrinfo 전용 스레드 풀에서 돌리고, 호출부는 timeout까지만 기다립니다.
+# 호출부가 먼저 포기해도 조회는 끝까지 진행되어 결과가 캐시에 남습니다.
+#
+#   dns_cache.resolve(host, timeout)        -> [(family, ip), ...]  (풀리지 않으면 [])
+#   dns_cache.resolvable(host, timeout)     -> bool
+#   await dns_cache.resolve_async(host)     -> asyncio 코드용
+import asyncio
+import ipaddress
+import os
+import socket
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from urllib.parse import urlsplit
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config import (
+    DNS_CACHE_SIZE, DNS_CACHE_TTL_SECONDS, DNS_MIN_TTL_SECONDS, DNS_MAX_TTL_SECONDS,
+    DNS_NEGATIVE_TTL_SECONDS, DNS_FAILURE_TTL_SECONDS, DNS_RESOLVE_TIMEOUT_SECONDS,
+    DNS_RESOLVER_WORKERS, DNS_USE_AIODNS
+)
+
+try:
+    import aiodns
+except ImportError:
+    aiodns = None
+
+# c-ares / getaddrinfo 오류 중 "이 이름은 없다"로 보는 것 (나머지는 일시적 실패)
+_ARES_NOT_FOUND = {1, 4}   # ARES_ENODATA, ARES_ENOTFOUND
+_GAI_NOT_FOUND = {getattr(socket, name) for name in ("EAI_NONAME", "EAI_NODATA") if hasattr(socket, name)}
+
+
+def normalize_host(host: str) -> str:
+    """호스트명만 남깁니다. ("Example.COM.:8443" → "example.com", "[::1]" → "::1")"""
+    text = (host or "").strip()
+    if not text:
+        return ""
+    if "://" in text or ":" in text or "@" in text:
+        try:
+            parsed = urlsplit(text if "://" in text else "//" + text)
+            text = parsed.hostname or text
+        except ValueError:
+            pass
+    return text.strip("[]").rstrip(".").lower()
+
+
+def _ip_literal(host: str):
+    try:
+        ip = ipaddress.ip_address(host)
+    except ValueError:
+        return None
+    return [(socket.AF_INET6 if ip.version == 6 else socket.AF_INET, host)]
+
+
+class _AresLoop:
+    """aiodns 리졸버를 들고 있는 전용 이벤트 루프 스레드."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.error = None
+        self._ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="urlbert-dns-loop", daemon=True)
+        self.thread.start()
+        self._ready.wait()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.resolver = aiodns.DNSResolver(loop=self.loop, timeout=DNS_RESOLVE_TIMEOUT_SECONDS, tries=2)
+        except Exception as e:
+            self.error = e
+            self._ready.set()
+            self.loop.close()
+            return
+        self._ready.set()
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+class DnsCache:
+    def __init__(self, maxsize: int = DNS_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()   # host -> (만료 시각, [(family, ip), ...])
+        self._inflight = {}          # host -> concurrent.futures.Future
+        self._lock = threading.Lock()
+        self._pool = None
+        self._ares = None
+        self._ares_failed = False
+        self._pid = os.getpid()
+        self._counters = {"hits": 0, "negative_hits": 0, "misses": 0, "expired": 0, "coalesced": 0,
+                          "lookups": 0, "not_found": 0, "failures": 0, "caller_timeouts": 0}
+
+    @property
+    def backend(self) -> str:
+        return "aiodns" if self._use_ares() else "getaddrinfo"
+
+    def _use_ares(self) -> bool:
+        return DNS_USE_AIODNS and aiodns is not None and not self._ares_failed
+
+    def _count(self, key: str):
+        with self._lock:
+            self._counters[key] += 1
+
+    # --- 캐시 ---
+    def peek(self, host: str):
+        """캐시에 있으면 주소 목록(없는 이름이면 []), 없으면 None. 조회는 하지 않습니다."""
+        host = normalize_host(host)
+        literal = _ip_literal(host)
+        if literal is not None:
+            return literal
+        with self._lock:
+            entry = self._data.get(host)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._data[host]
+                self._counters["expired"] += 1
+                return None
+            self._data.move_to_end(host)
+            self._counters["hits" if entry[1] else "negative_hits"] += 1
+            return list(entry[1])
+
+    def _put(self, host: str, addresses: list, ttl: float):
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._data[host] = (time.monotonic() + ttl, list(addresses))
+            self._data.move_to_end(host)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    # --- 조회 ---
+    def _check_fork(self):
+        # fork된 워커(gunicorn 등)는 부모의 스레드/루프를 쓸 수 없으므로 새로 만듭니다.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._pool = None
+                    self._ares = None
+                    self._inflight = {}
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=DNS_RESOLVER_WORKERS, thread_name_prefix="urlbert-dns")
+        return self._pool
+
+    def _get_ares(self) -> _AresLoop:
+        if self._ares is None:
+            with self._lock:
+                if self._ares is None:
+                    self._ares = _AresLoop()
+        return self._ares
+
+    def _lookup_blocking(self, host: str):
+        """(주소 목록, TTL). getaddrinfo는 TTL을 알려 주지 않으므로 설정값을 씁니다."""
+        try:
+            infos = socket.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            if e.errno in _GAI_NOT_FOUND:
+                self._count("not_found")
+                return [], DNS_NEGATIVE_TTL_SECONDS
+            self._count("failures")
+            return [], DNS_FAILURE_TTL_SECONDS
+        except (OSError, UnicodeError):
+            self._count("failures")
+            return [], DNS_FAILURE_TTL_SECONDS
+        addresses = list(dict.fromkeys((family, sockaddr[0]) for family, _, _, _, sockaddr in infos))
+        return addresses, DNS_CACHE_TTL_SECONDS
+
+    async def _lookup_ares(self, host: str):
+        """(주소 목록, TTL). 여러 레코드 중 가장 짧은 TTL을 씁니다."""
+        try:
+            result = await self._get_ares().resolver.getaddrinfo(host, type=socket.SOCK_STREAM)
+        except aiodns.error.DNSError as e:
+            if e.args and e.args[0] in _ARES_NOT_FOUND:
+                self._count("not_found")
+                return [], DNS_NEGATIVE_TTL_SECONDS
+            self._count("failures")
+            return [], DNS_FAILURE_TTL_SECONDS
+        except (OSError, UnicodeError):
+            self._count("failures")
+            return [], DNS_FAILURE_TTL_SECONDS
+        addresses, ttls = [], []
+        for node in result.nodes:
+            ip = node.addr[0]
+            ip = ip.decode("ascii") if isinstance(ip, bytes) else ip
+            addresses.append((node.family, ip))
+            if getattr(node, "ttl", None) is not None:
+                ttls.append(node.ttl)
+        if not addresses:
+            self._count("not_found")
+            return [], DNS_NEGATIVE_TTL_SECONDS
+        ttl = min(ttls) if ttls else DNS_CACHE_TTL_SECONDS
+        return list(dict.fromkeys(addresses)), min(max(ttl, DNS_MIN_TTL_SECONDS), DNS_MAX_TTL_SECONDS)
+
+    def _finish(self, host: str, future: Future, addresses: list, ttl: float):
+        self._put(host, addresses, ttl)
+        with self._lock:
+            if self._inflight.get(host) is future:
+                del self._inflight[host]
+        future.set_result(addresses)
+
+    def _run_blocking(self, host: str, future: Future):
+        try:
+            addresses, ttl = self._lookup_blocking(host)
+        except BaseException:
+            addresses, ttl = [], 0
+        self._finish(host, future, addresses, ttl)
+
+    async def _run_ares(self, host: str, future: Future):
+        try:
+            addresses, ttl = await self._lookup_ares(host)
+        except BaseException:
+            addresses, ttl = [], 0
+        self._finish(host, future, addresses, ttl)
+
+    def submit(self, host: str) -> Future:
+        """
+        조회를 시작(또는 진행 중인 조회에 합류)하고 concurrent.futures.Future(결과: 주소 목록)를 반환합니다.
+        캐시 확인은 하지 않으므로 보통은 resolve()/resolve_async()를 씁니다.
+        """
+        self._check_fork()
+        host = normalize_host(host)
+        with self._lock:
+            future = self._inflight.get(host)
+            if future is not None:
+                self._counters["coalesced"] += 1
+                return future
+            future = self._inflight[host] = Future()
+            self._counters["lookups"] += 1
+        if self._use_ares():
+            try:
+                self._get_ares().submit(self._run_ares(host, future))
+                return future
+            except Exception as e:
+                self._ares_failed = True
+                print(f"⚠️ aiodns 리졸버 초기화 실패({e}), getaddrinfo로 조회합니다.")
+        self._get_pool().submit(self._run_blocking, host, future)
+        return future
+
+    def _miss(self, host: str):
+        """(캐시 결과, 없으면 None). 없으면 misses를 셉니다."""
+        host = normalize_host(host)
+        if not host:
+            return []
+        cached = self.peek(host)
+        if cached is None:
+            self._count("misses")
+        return cached
+
+    def resolve(self, host: str, timeout: float = DNS_RESOLVE_TIMEOUT_SECONDS) -> list:
+        """[(family, ip), ...]. 풀리지 않거나 timeout 안에 답이 없으면 []."""
+        cached = self._miss(host)
+        if cached is not None:
+            return cached
+        try:
+            return self.submit(host).result(timeout=max(0.0, timeout) if timeout is not None else None)
+        except FutureTimeout:
+            self._count("caller_timeouts")
+            return []
+
+    def resolvable(self, host: str, timeout: float = DNS_RESOLVE_TIMEOUT_SECONDS) -> bool:
+        return bool(self.resolve(host, timeout))
+
+    async def resolve_async(self, host: str, timeout: float = DNS_RESOLVE_TIMEOUT_SECONDS) -> list:
+        cached = self._miss(host)
+        if cached is not None:
+            return cached
+        # shield: 이 호출이 시간 초과로 포기해도 다른 호출자와 공유하는 조회는 취소하지 않습니다.
+        shared = asyncio.wrap_future(self.submit(host))
+        try:
+            return await asyncio.wait_for(asyncio.shield(shared), timeout)
+        except asyncio.TimeoutError:
+            self._count("caller_timeouts")
+            return []
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._counters)
+            out["size"] = len(self._data)
+            out["in_flight"] = len(self._inflight)
+        lookups = out["hits"] + out["negative_hits"] + out["misses"]
+        out["hit_rate"] = (out["hits"] + out["negative_hits"]) / lookups if lookups else 0.0
+        out["backend"] = self.backend
+        out["maxsize"] = self.maxsize
+        return out
+
+
+# 프로세스 전체에서 공유하는 DNS 캐시
+dns_cache = DnsCache()
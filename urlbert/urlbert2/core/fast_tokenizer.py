@@ -0,0 +1,108 @@
+# urlbert/urlbert2/core/fast_tokenizer.py
+# 빠른 WordPiece 토크나이저 + URL 구성요소 단위 토큰 캐시
+#
+# pytorch_pretrained_bert.BertTokenizer와 같은 vocab.txt / 같은 규칙(소문자화, 구두점 분리, WordPiece)을 쓰므로
+# 토큰 id가 동일합니다. (check_tokenizer_parity.py로 학습 URL 전체에 대해 확인)
+#
+# 캐시 원리: BERT의 기본 토크나이저는 공백과 구두점('/', '?', '&', '=', ',', ':' 등)에서 먼저 자르고
+# 잘린 조각마다 WordPiece를 적용합니다. 그래서 구두점 경계에서 자른 조각(호스트, 경로 세그먼트,
+# 쿼리 파라미터, 헤더 값)을 따로 토큰화해 이어붙여도 전체를 한 번에 토큰화한 결과와 같습니다.
+# 같은 호스트/헤더 값이 계속 반복되므로 조각 단위로 캐시하면 대부분 캐시에서 바로 나옵니다.
+import re
+import unicodedata
+from functools import lru_cache
+
+from pytorch_pretrained_bert import BertTokenizer
+
+from config import VOCAB_FILE_PATH, TOKEN_CACHE_SIZE
+
+# 구두점 경계 (모두 BERT 기준 punctuation) — 구분자 자체도 조각으로 남깁니다.
+_COMPONENT_SPLIT = re.compile(r"([/?&#=,;])")
+_NEVER_SPLIT = ("[UNK]", "[SEP]", "[PAD]", "[CLS]", "[MASK]")
+# BasicTokenizer._clean_text 가 지우는 ASCII 제어문자 (\t, \n, \r 은 공백으로 취급되어 남음)
+_ASCII_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+
+
+def _clean_text(text: str) -> str:
+    r"""
+    BasicTokenizer._clean_text 와 같은 정리: NUL, U+FFFD, 제어/서식 문자(유니코드 C*, 단 \t\n\r 제외)는 지우고
+    공백(' ', \t, \n, \r, Zs)은 ' '로 바꿉니다. str.split()은 \x0b, \x0c, \x1c~\x1f 도 공백으로 보므로
+    이 단계 없이 자르면 기존 토크나이저와 단어 경계가 달라집니다.
+    """
+    if text.isascii():
+        return _ASCII_CONTROL.sub("", text)
+    output = []
+    for char in text:
+        if char in "\t\n\r":
+            output.append(" ")
+            continue
+        category = unicodedata.category(char)
+        if char == "\ufffd" or category.startswith("C"):
+            continue
+        output.append(" " if category == "Zs" else char)
+    return "".join(output)
+
+
+class UrlTokenizer:
+    """
+    기존 BertTokenizer를 대체하는 토크나이저.
+    - tokenize / convert_tokens_to_ids 는 기존 API 그대로 제공합니다 (레거시 경로).
+    - encode_ids(text) 는 fast 토크나이저 + 구성요소 LRU 캐시로 토큰 id를 만듭니다 ([CLS]/[SEP] 미포함).
+    """
+
+    def __init__(self, vocab_file: str = VOCAB_FILE_PATH, cache_size: int = TOKEN_CACHE_SIZE, use_fast: bool = True):
+        self.legacy = BertTokenizer(vocab_file)
+        self.vocab = self.legacy.vocab
+        self.fast = None
+        if use_fast:
+            try:
+                from tokenizers import BertWordPieceTokenizer
+                self.fast = BertWordPieceTokenizer(vocab_file, lowercase=True)
+            except Exception as e:
+                print(f"fast 토크나이저 로드 실패({e}), 기존 토크나이저를 사용합니다.")
+        self._encode_component = lru_cache(maxsize=cache_size)(self._encode_component_uncached)
+
+    # --- 기존 BertTokenizer 호환 API ---
+    def tokenize(self, text: str) -> list:
+        return self.legacy.tokenize(text)
+
+    def convert_tokens_to_ids(self, tokens: list) -> list:
+        return self.legacy.convert_tokens_to_ids(tokens)
+
+    # --- 캐시 경로 ---
+    def _encode_component_uncached(self, piece: str) -> tuple:
+        if self.fast is not None:
+            ids = self.fast.encode(piece, add_special_tokens=False).ids
+        else:
+            ids = self.legacy.convert_tokens_to_ids(self.legacy.tokenize(piece))
+        return tuple(ids)
+
+    def encode_ids(self, text: str) -> list:
+        """text를 토큰 id 리스트로 변환합니다 (tokenize + convert_tokens_to_ids와 동일한 결과)."""
+        ids = []
+        for word in _clean_text(text).split():
+            if word in _NEVER_SPLIT:
+                ids.append(self.vocab[word])
+                continue
+            if "[" in word:
+                # "[SEP]," 처럼 특수 토큰 문자열이 섞인 단어는 조각으로 나누면 규칙이 달라지므로 기존 경로로 처리
+                ids.extend(self.legacy.convert_tokens_to_ids(self.legacy.tokenize(word)))
+                continue
+            for piece in _COMPONENT_SPLIT.split(word):
+                if piece:
+                    ids.extend(self._encode_component(piece))
+        return ids
+
+    def cache_info(self):
+        """구성요소 캐시 적중/미적중 통계 (functools.lru_cache 형식)."""
+        return self._encode_component.cache_info()
+
+    def cache_clear(self):
+        self._encode_component.cache_clear()
+
+
+def encode_text(tokenizer, text: str) -> list:
+    """UrlTokenizer면 캐시 경로를, 기존 BertTokenizer면 기존 경로를 사용합니다."""
+    if isinstance(tokenizer, UrlTokenizer):
+        return tokenizer.encode_ids(text)
+    return tokenizer.convert_tokens_to_ids(tokenizer.tokenize(text))
@@ -0,0 +1,422 @@
+# urlbert/urlbert2/core/header_fetcher.py
+# asyncio 기반 HTTP 헤더 수집기
+#
+# 이벤트 루프 스레드 하나가 aiohttp 세션(공유 커넥션 풀, 호스트당 커넥션 상한)을 들고 있고,
+# 전체 동시 요청 수는 세마포어로 제한합니다. 요청 수백 개가 몰려도 OS 스레드는 늘어나지 않습니다.
+#   - 동기 API: get_header_info(url), fetch_headers(urls)   ← 기존 호출부(Flask 스레드 등)
+#   - submit_probe(url): 백그라운드로 시작하고 Future를 받습니다 (추측 추론 중 취소 가능)
+#   - 비동기 API: fetch_header_info_async(url), fetch_headers_async(urls)   ← 배치 경로 / asyncio 코드
+# aiohttp가 없거나 HEADER_FETCH_ASYNC가 꺼져 있으면 requests로 같은 프로브를 수행합니다.
+#
+# 헤더 프로브: 본문은 받지 않습니다(최대 HEADER_MAX_BODY_BYTES). 헤더가 도착하면 연결을 닫고,
+# 리다이렉트는 HEADER_MAX_REDIRECTS 번까지 직접 따라가며 경로(redirect_chain)를 기록합니다.
+# 모델 입력(header_info)은 기존과 같이 최종 응답의 IMPORTANT_HEADERS 입니다.
+# max_body를 주면 최종 응답 본문을 그 크기까지 받아 "body"에 담습니다 (페이지 수집: core/page_fetcher.py).
+# 이때 headers_future를 넘기면 최종 응답 헤더가 도착하는 즉시 (본문 없이) 그 Future를 채우므로, 헤더만 필요한
+# 호출은 본문 다운로드를 기다리지 않습니다. 본문을 받다가 시간이 다 되면 받은 데까지(body_truncated=True) 돌려줍니다.
+# DNS는 프로세스 공용 캐시(core/dns_cache.py)로 풉니다. 풀리지 않는 호스트(NXDOMAIN)는 캐시된 동안 연결을 시도하지 않습니다.
+import asyncio
+import os
+import random
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, InvalidStateError
+from urllib.parse import urljoin, urlsplit
+
+import requests
+
+from config import (
+    IMPORTANT_HEADERS, REQUEST_TIMEOUT_SECONDS, BATCH_HEADER_WORKERS,
+    HEADER_FETCH_ASYNC, HEADER_MAX_CONCURRENCY, HEADER_POOL_SIZE,
+    HEADER_PER_HOST_LIMIT, HEADER_MAX_REDIRECTS, HEADER_MAX_BODY_BYTES
+)
+from .dns_cache import dns_cache
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/114 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 Version/14.0.3 Safari/605.1.15",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X) AppleWebKit/605.1.15 Version/14.0 Mobile/15E148 Safari/604.1"
+]
+
+
+def request_headers() -> dict:
+    return {
+        "User-Agent": random.choice(USER_AGENTS),
+        "Accept-Language": "en-US,en;q=0.9",
+        "Referer": "https://www.google.com/"
+    }
+
+
+def format_important_headers(resp_headers) -> str:
+    """IMPORTANT_HEADERS만 "키: 값, ..." 문자열로 만듭니다. 하나도 없으면 "NOHEADER"."""
+    important = {k: resp_headers.get(k, "") for k in IMPORTANT_HEADERS}
+    header_str = ", ".join(f"{k}: {v}" for k, v in important.items() if v)
+    return header_str if header_str else "NOHEADER"
+
+
+def _probe_result(url: str, resp_headers=None, status: int = None, chain: list = None,
+                  redirect_limit_hit: bool = False, body: bytes = None, body_truncated: bool = False) -> dict:
+    """
+    header_info: 모델 입력용 헤더 문자열 (실패/리다이렉트 초과 시 "NOHEADER")
+    final_url / status: 마지막으로 받은 응답
+    redirect_chain: 거쳐 온 URL 목록 (요청한 URL부터, 최종 URL 제외)
+    content_type / body / body_truncated: 최종 응답의 Content-Type, 본문(max_body를 준 경우만, 아니면 None)
+    """
+    return {
+        "header_info": format_important_headers(resp_headers) if resp_headers is not None else "NOHEADER",
+        "final_url": url,
+        "status": status,
+        "redirect_chain": list(chain or []),
+        "redirect_limit_hit": redirect_limit_hit,
+        "content_type": resp_headers.get("Content-Type") if resp_headers is not None else None,
+        "body": body,
+        "body_truncated": body_truncated,
+    }
+
+
+def _resolve_headers(headers_future, result: dict):
+    """헤더를 기다리는 Future를 본문 없는 결과로 채웁니다 (이미 채워졌거나 취소됐으면 무시)."""
+    if headers_future is None or headers_future.done():
+        return
+    try:
+        headers_future.set_result({**result, "body": None, "body_truncated": False})
+    except InvalidStateError:
+        pass
+
+
+def _partial_result(url: str, chain: list, headers_result: dict, chunks: list, max_body: int) -> dict:
+    """
+    도중에 실패/시간 초과된 프로브의 결과. 최종 응답 헤더까지 받았으면 그 헤더와 받은 데까지의 본문을,
+    아니면 NOHEADER 결과를 돌려줍니다.
+    """
+    if headers_result is None:
+        return _probe_result(url, chain=chain)
+    if not max_body:
+        return headers_result
+    return {**headers_result, "body": b"".join(chunks), "body_truncated": True}
+
+
+def _small_body(content_length) -> bool:
+    """본문을 끝까지 읽어도 되는 작은 응답인지 (커넥션 재사용 목적)."""
+    return content_length is not None and int(content_length) <= HEADER_MAX_BODY_BYTES
+
+
+# --- requests 방식 (호출 스레드에서 블로킹) ---
+def _discard_body_blocking(resp):
+    try:
+        if _small_body(resp.headers.get("Content-Length")):
+            resp.raw.read(HEADER_MAX_BODY_BYTES)
+    except Exception:
+        pass
+    resp.close()
+
+
+def _read_body_blocking(resp, limit: int, chunks: list, read_until: float):
+    """본문을 limit까지 chunks에 모읍니다. read_until(monotonic)이 지나면 거기서 멈추고 잘린 것으로 표시합니다."""
+    if getattr(resp.raw, "read1", None) is not None:
+        # urllib3 2.x: 도착한 만큼만 바로 돌려주므로 조금씩 흘려보내는 서버에서도 시간 확인이 늦지 않습니다.
+        source = iter(lambda: resp.raw.read1(16384, decode_content=True), b"")
+    else:
+        source = resp.iter_content(chunk_size=16384)
+    size = 0
+    for chunk in source:
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            break
+        if time.monotonic() >= read_until:
+            return b"".join(chunks), True
+    body = b"".join(chunks)
+    return body[:limit], size > limit
+
+
+def _unresolvable(url: str) -> bool:
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return False
+    return bool(host) and not dns_cache.resolvable(host, REQUEST_TIMEOUT_SECONDS)
+
+
+def probe_headers_blocking(url: str, max_body: int = 0, timeout: float = REQUEST_TIMEOUT_SECONDS,
+                           headers_future=None) -> dict:
+    read_until = time.monotonic() + timeout
+    chain, current, headers = [], url, request_headers()
+    headers_result, chunks = None, []
+    try:
+        with requests.Session() as session:
+            for _ in range(HEADER_MAX_REDIRECTS + 1):
+                if _unresolvable(current):
+                    result = _probe_result(current, chain=chain)
+                    break
+                resp = session.get(current, headers=headers, timeout=timeout,
+                                   allow_redirects=False, stream=True)
+                try:
+                    location = resp.headers.get("Location")
+                    if resp.status_code in _REDIRECT_STATUSES and location:
+                        chain.append(current)
+                        current = urljoin(current, location)
+                        continue
+                    headers_result = _probe_result(current, resp.headers, resp.status_code, chain)
+                    _resolve_headers(headers_future, headers_result)
+                    result = headers_result
+                    if max_body:
+                        body, truncated = _read_body_blocking(resp, max_body, chunks, read_until)
+                        if truncated:
+                            resp.close()  # 남은 본문을 비우려고 기다리지 않고 연결을 끊습니다.
+                        result = {**headers_result, "body": body, "body_truncated": truncated}
+                    break
+                finally:
+                    _discard_body_blocking(resp)
+            else:
+                result = _probe_result(current, chain=chain, redirect_limit_hit=True)
+    except Exception:
+        # 헤더까지 받았으면 그 헤더와 받은 데까지의 본문은 버리지 않습니다.
+        result = _partial_result(current, chain, headers_result, chunks, max_body)
+    _resolve_headers(headers_future, result)
+    return result
+
+
+def fetch_header_info_blocking(url: str) -> str:
+    return probe_headers_blocking(url)["header_info"]
+
+
+# --- asyncio 방식 ---
+if aiohttp is not None:
+    class _SharedDnsResolver(aiohttp.abc.AbstractResolver):
+        """aiohttp 커넥터가 공용 DNS 캐시를 쓰도록 연결합니다."""
+
+        async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> list:
+            hosts = [
+                {"hostname": host, "host": ip, "port": port, "family": fam, "proto": 0,
+                 "flags": socket.AI_NUMERICHOST | socket.AI_NUMERICSERV}
+                for fam, ip in await dns_cache.resolve_async(host, REQUEST_TIMEOUT_SECONDS)
+                if family in (socket.AF_UNSPEC, fam)
+            ]
+            if not hosts:
+                raise OSError(None, f"DNS lookup failed: {host}")
+            return hosts
+
+        async def close(self) -> None:
+            pass
+
+
+class _AsyncFetcher:
+    """전용 이벤트 루프 스레드 + 그 루프에 묶인 aiohttp 세션/세마포어."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        self.error = None
+        self._ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="urlbert-header-loop", daemon=True)
+        self.thread.start()
+        self._ready.wait()
+        if self.error is not None:
+            raise self.error
+
+    async def _setup(self):
+        # aiohttp 세션/커넥터는 실행 중인 루프 안에서 만들어야 합니다.
+        connector = aiohttp.TCPConnector(
+            limit=HEADER_POOL_SIZE,
+            limit_per_host=HEADER_PER_HOST_LIMIT,
+            resolver=_SharedDnsResolver(),
+            use_dns_cache=False,  # 캐시는 dns_cache가 담당 (TTL, 실패 캐시, 다른 프로브와 공유)
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS),
+        )
+        self.semaphore = asyncio.Semaphore(HEADER_MAX_CONCURRENCY)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._setup())
+        except Exception as e:
+            self.error = e
+            self._ready.set()
+            self.loop.close()
+            return
+        self._ready.set()
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+_async_failed = False
+
+
+def _get_fetcher() -> _AsyncFetcher:
+    global _fetcher
+    fetcher = _fetcher
+    # fork된 워커 프로세스(gunicorn 등)에서는 부모의 루프 스레드가 없으므로 새로 만듭니다.
+    if fetcher is not None and fetcher.pid == os.getpid():
+        return fetcher
+    with _fetcher_lock:
+        if _fetcher is None or _fetcher.pid != os.getpid():
+            _fetcher = _AsyncFetcher()
+        return _fetcher
+
+
+def async_enabled() -> bool:
+    """asyncio 경로를 쓸 수 있는지. 루프 초기화에 실패하면 이후로는 requests 방식으로 동작합니다."""
+    global _async_failed
+    if not HEADER_FETCH_ASYNC or aiohttp is None or _async_failed:
+        return False
+    try:
+        _get_fetcher()
+        return True
+    except Exception as e:
+        _async_failed = True
+        print(f"⚠️ 비동기 헤더 수집기 초기화 실패({e}), requests 방식으로 수집합니다.")
+        return False
+
+
+async def _discard_body(resp):
+    if _small_body(resp.content_length):
+        await resp.content.read(HEADER_MAX_BODY_BYTES)  # 끝까지 읽으면 커넥션이 풀로 돌아갑니다.
+    else:
+        resp.close()  # 본문을 받지 않고 연결을 끊습니다.
+
+
+async def _read_body(resp, limit: int, chunks: list):
+    size = 0
+    while size < limit:
+        chunk = await resp.content.read(limit - size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+    truncated = size >= limit and not resp.content.at_eof()
+    if truncated:
+        resp.close()  # 나머지 본문은 받지 않고 연결을 끊습니다.
+    return b"".join(chunks), truncated
+
+
+async def _probe_hops(fetcher: _AsyncFetcher, url: str, chain: list, partial: dict, max_body: int = 0,
+                      timeout: float = REQUEST_TIMEOUT_SECONDS, headers_future=None) -> dict:
+    current, headers = url, request_headers()
+    # 세션 기본값(REQUEST_TIMEOUT_SECONDS)이 본문까지 받는 요청의 timeout을 줄이지 않도록 요청마다 지정합니다.
+    request_timeout = aiohttp.ClientTimeout(total=timeout)
+    for _ in range(HEADER_MAX_REDIRECTS + 1):
+        async with fetcher.session.get(current, headers=headers, allow_redirects=False,
+                                       timeout=request_timeout) as resp:
+            location = resp.headers.get("Location")
+            if resp.status in _REDIRECT_STATUSES and location:
+                await _discard_body(resp)
+                chain.append(current)
+                current = urljoin(current, location)
+                continue
+            result = _probe_result(current, resp.headers, resp.status, chain)
+            partial["headers"] = result
+            _resolve_headers(headers_future, result)
+            if max_body:
+                body, truncated = await _read_body(resp, max_body, partial["chunks"])
+                return {**result, "body": body, "body_truncated": truncated}
+            await _discard_body(resp)
+            return result
+    return _probe_result(current, chain=chain, redirect_limit_hit=True)
+
+
+async def _probe(fetcher: _AsyncFetcher, url: str, max_body: int = 0,
+                 timeout: float = REQUEST_TIMEOUT_SECONDS, headers_future=None) -> dict:
+    chain, partial = [], {"headers": None, "chunks": []}
+    try:
+        async with fetcher.semaphore:
+            try:
+                # 리다이렉트를 여러 번 거쳐도 (본문 포함) 전체 시간은 timeout을 넘지 않습니다.
+                result = await asyncio.wait_for(
+                    _probe_hops(fetcher, url, chain, partial, max_body, timeout, headers_future), timeout)
+            except Exception:
+                # 헤더까지 받았으면 그 헤더와 받은 데까지의 본문은 버리지 않습니다.
+                result = _partial_result(chain[-1] if chain else url, chain, partial["headers"], partial["chunks"],
+                                         max_body)
+    except BaseException:
+        if headers_future is not None and not headers_future.done():
+            headers_future.cancel()   # 프로브가 취소됨 (헤더 전)
+        raise
+    _resolve_headers(headers_future, result)
+    return result
+
+
+async def probe_headers_async(url: str) -> dict:
+    """
+    어느 이벤트 루프에서든 await할 수 있습니다.
+    실제 요청은 항상 헤더 수집 루프(공유 커넥션 풀)에서 수행됩니다.
+    """
+    if not async_enabled():
+        return await asyncio.get_running_loop().run_in_executor(None, probe_headers_blocking, url)
+    fetcher = _get_fetcher()
+    if asyncio.get_running_loop() is fetcher.loop:
+        return await _probe(fetcher, url)
+    return await asyncio.wrap_future(fetcher.submit(_probe(fetcher, url)))
+
+
+async def fetch_header_info_async(url: str) -> str:
+    return (await probe_headers_async(url))["header_info"]
+
+
+async def fetch_headers_async(urls: list) -> list:
+    """여러 URL의 헤더를 동시에 수집합니다 (입력 순서 유지)."""
+    return list(await asyncio.gather(*(fetch_header_info_async(u) for u in urls)))
+
+
+# --- 동기 API ---
+def probe_headers(url: str) -> dict:
+    """헤더 프로브 결과 전체 (header_info, final_url, status, redirect_chain, redirect_limit_hit)."""
+    if not async_enabled():
+        return probe_headers_blocking(url)
+    fetcher = _get_fetcher()
+    return fetcher.submit(_probe(fetcher, url)).result()
+
+
+def get_header_info(url: str) -> str:
+    return probe_headers(url)["header_info"]
+
+
+_probe_pool = None
+_probe_pool_lock = threading.Lock()
+
+
+def submit_probe(url: str, max_body: int = 0, timeout: float = REQUEST_TIMEOUT_SECONDS, headers_future=None):
+    """
+    헤더 프로브를 백그라운드로 시작하고 concurrent.futures.Future(결과: probe_headers와 같은 dict)를 반환합니다.
+    max_body를 주면 최종 응답 본문도 그 크기까지 받습니다 (timeout 안에 다 못 받으면 받은 데까지).
+    headers_future(concurrent.futures.Future)를 주면 최종 응답 헤더가 오는 즉시 본문 없는 결과로 채웁니다
+    (실패하면 NOHEADER 결과, 헤더 전에 취소되면 cancel).
+    asyncio 경로에서는 future.cancel()이 진행 중인 요청까지 끊습니다.
+    (requests 방식은 이미 시작된 요청을 끊을 수 없어 타임아웃까지 백그라운드에서 마저 진행됩니다)
+    """
+    global _probe_pool
+    if async_enabled():
+        fetcher = _get_fetcher()
+        return fetcher.submit(_probe(fetcher, url, max_body, timeout, headers_future))
+    if _probe_pool is None:
+        with _probe_pool_lock:
+            if _probe_pool is None:
+                _probe_pool = ThreadPoolExecutor(max_workers=BATCH_HEADER_WORKERS, thread_name_prefix="urlbert-header")
+    return _probe_pool.submit(probe_headers_blocking, url, max_body, timeout, headers_future)
+
+
+def fetch_headers(urls: list, max_workers: int = BATCH_HEADER_WORKERS) -> list:
+    """get_header_info를 여러 URL에 대해 동시에 수행합니다 (입력 순서 유지)."""
+    urls = list(urls)
+    if not urls:
+        return []
+    if async_enabled():
+        fetcher = _get_fetcher()
+        return fetcher.submit(fetch_headers_async(urls)).result()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as pool:
+        return list(pool.map(fetch_header_info_blocking, urls))
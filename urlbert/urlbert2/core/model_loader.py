@@ -1,18 +1,27 @@
 # /home/kong/urlbert/url_bert/urlbert2/core/model_loader.py
+import os
+import json
+import threading
 import torch
 import torch.nn as nn
 from transformers import AutoConfig, AutoModelForMaskedLM
-from pytorch_pretrained_bert import BertTokenizer 
 
 # config.py에서 필요한 모든 설정 값들을 임포트합니다.
 from config import (
-    VOCAB_FILE_PATH, BERT_CONFIG_DIR, BERT_PRETRAINED_MODEL_PATH,
-    CLASSIFIER_MODEL_PATH, DEVICE, BERT_CONFIG_KWARTS
+    USE_FAST_TOKENIZER, VOCAB_FILE_PATH, BERT_CONFIG_DIR, BERT_PRETRAINED_MODEL_PATH,
+    CLASSIFIER_MODEL_PATH, DEVICE, BERT_CONFIG_KWARTS,
+    INFERENCE_PRECISION, QUANTIZED_MODEL_PATH,
+    USE_CONSOLIDATED_CHECKPOINT, CONSOLIDATED_MODEL_PATH,
+    MODEL_VARIANT, STUDENT_MODEL_PATH,
+    INFERENCE_BACKEND, EXPORT_VERSION, EXPORT_PARITY_ATOL
 )
+from . import backends
+from .fast_tokenizer import UrlTokenizer
 
 # 전역 변수로 모델과 토크나이저 저장 
 global_tokenizer = None
 global_model = None
+_load_lock = threading.Lock()  # 여러 요청 스레드가 동시에 첫 로드를 시도해도 한 번만 로드
 
 # --- 모델 클래스 정의  ---
 class BertForSequenceClassification(nn.Module):
@@ -29,44 +38,275 @@ class BertForSequenceClassification(nn.Module):
         context = x[0]
         types = x[1]
         mask = x[2]
-        outputs = self.bert(context, attention_mask=mask, token_type_ids=types, output_hidden_states=True)
-        hidden_states = outputs.hidden_states[-1][:,0,:] # [CLS] 토큰 hidden state
+        # MaskedLM 래퍼를 거치지 않고 BERT 본체만 호출합니다.
+        # output_hidden_states=True로 13개 층 출력을 전부 들고 있을 필요 없이 마지막 층만 받고,
+        # 그중 [CLS] 벡터만 남깁니다 (학습 때의 hidden_states[-1][:,0,:]와 같은 값).
+        outputs = self.bert.bert(context, attention_mask=mask, token_type_ids=types)
+        hidden_states = outputs.last_hidden_state[:, 0, :] # [CLS] 토큰 hidden state
         out = self.dropout(hidden_states)
         out = self.classifier(out)
         return out
 
-def load_inference_model():
+def _build_model_skeleton(device: str = "cpu", num_hidden_layers: int = None) -> BertForSequenceClassification:
+    """
+    가중치 없이 분류 모델 구조만 만듭니다 (MaskedLM 헤드 제거 상태).
+    device="meta"면 메모리를 전혀 잡지 않는 껍데기만 만들고, 이후 텐서를 그대로 끼워 넣습니다.
+    num_hidden_layers를 주면 그 층 수로 만듭니다 (증류 학생 모델).
+    """
+    kwargs = dict(BERT_CONFIG_KWARTS)
+    if num_hidden_layers:
+        kwargs["num_hidden_layers"] = num_hidden_layers
+    with torch.device(device):
+        config = AutoConfig.from_pretrained(BERT_CONFIG_DIR, **kwargs)
+        bert_model_for_loading = AutoModelForMaskedLM.from_config(config=config)
+        bert_model_for_loading.resize_token_embeddings(BERT_CONFIG_KWARTS["vocab_size"])
+        model = BertForSequenceClassification(bert_model_for_loading)
+        model.bert.cls = nn.Sequential() # MaskedLM 헤드 제거
+    return model
+
+def _load_original_fp32_model() -> BertForSequenceClassification:
+    """원본 두 체크포인트(사전학습 BERT + 파인튜닝 분류기)를 차례로 올린 fp32 모델."""
+    # 1. BERT Config 로드 및 AutoModelForMaskedLM 생성
+    config = AutoConfig.from_pretrained(BERT_CONFIG_DIR, **BERT_CONFIG_KWARTS)
+    bert_model_for_loading = AutoModelForMaskedLM.from_config(config=config)
+    bert_model_for_loading.resize_token_embeddings(BERT_CONFIG_KWARTS["vocab_size"])
+
+    # 2. 기존 BERT 모델의 가중치 로드
+    bert_dict = torch.load(BERT_PRETRAINED_MODEL_PATH, map_location=torch.device("cpu"))
+    bert_model_for_loading.load_state_dict(bert_dict)
+
+    # 3. 분류 모델 초기화 및 학습된 가중치 로드
+    model = BertForSequenceClassification(bert_model_for_loading)
+    model.bert.cls = nn.Sequential() # MaskedLM 헤드 제거
+    model.load_state_dict(torch.load(CLASSIFIER_MODEL_PATH, map_location=DEVICE))
+    return model
+
+def convert_to_inference_checkpoint(model: nn.Module = None, path: str = CONSOLIDATED_MODEL_PATH) -> str:
+    """
+    추론에 실제로 쓰는 텐서(파라미터 + 버퍼)만 평탄한 dict 하나로 저장합니다.
+    MLM 헤드는 이미 제거된 상태라 포함되지 않으며, mmap 로드를 위해 텐서는 contiguous로 저장합니다.
+    """
+    model = model if model is not None else _load_original_fp32_model()
+    tensors = {n: p.detach().to("cpu").contiguous() for n, p in model.named_parameters()}
+    tensors.update({n: b.detach().to("cpu").contiguous() for n, b in model.named_buffers()})
+    torch.save({"fingerprint": _checkpoint_fingerprint(include_student=False), "tensors": tensors}, path)
+    print(f"추론용 통합 체크포인트 저장: {path}")
+    return path
+
+def _assign_tensors(model: nn.Module, tensors: dict):
+    """meta 껍데기 모델에 텐서를 복사 없이 그대로 꽂아 넣습니다."""
+    for name, t in tensors.items():
+        mod_name, _, attr = name.rpartition(".")
+        mod = model.get_submodule(mod_name)
+        if attr in mod._parameters:
+            mod._parameters[attr] = nn.Parameter(t, requires_grad=False)
+        else:
+            mod._buffers[attr] = t
+    missing = [n for n, t in list(model.named_parameters()) + list(model.named_buffers()) if t.is_meta]
+    if missing:
+        raise RuntimeError(f"통합 체크포인트에 없는 텐서가 있습니다: {missing[:5]}")
+
+def _load_consolidated_model(path: str = CONSOLIDATED_MODEL_PATH):
+    """통합 체크포인트를 mmap으로 열어 모델에 연결합니다. 쓸 수 없으면 None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        ckpt = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+        fingerprint = _checkpoint_fingerprint(include_student=False)
+        # 원본 파일이 남아 있고 내용이 바뀌었으면 다시 변환
+        if fingerprint and ckpt.get("fingerprint") != fingerprint:
+            print("원본 체크포인트가 변경되어 통합 체크포인트를 다시 만듭니다.")
+            return None
+        model = _build_model_skeleton(device="meta")
+        _assign_tensors(model, ckpt["tensors"])
+        print(f"추론용 통합 체크포인트 사용(mmap): {path}")
+        return model
+    except Exception as e:
+        print(f"통합 체크포인트 로드 실패({e}), 원본 체크포인트로 로드합니다.")
+        return None
+
+def save_student_checkpoint(model: nn.Module, path: str = STUDENT_MODEL_PATH,
+                            teacher_layers: list = None, metrics: dict = None) -> str:
+    """
+    증류한 학생 모델을 통합 체크포인트와 같은 형식(평탄한 텐서 dict)으로 저장합니다.
+    층 수를 함께 기록해 두므로 load_student_model이 구조를 그대로 다시 만들 수 있습니다.
+    """
+    tensors = {n: p.detach().to("cpu").contiguous() for n, p in model.named_parameters()}
+    tensors.update({n: b.detach().to("cpu").contiguous() for n, b in model.named_buffers()})
+    torch.save({
+        "num_hidden_layers": model.bert.config.num_hidden_layers,
+        "teacher_layers": teacher_layers,
+        "teacher_fingerprint": _checkpoint_fingerprint(include_student=False),
+        "metrics": metrics or {},
+        "tensors": tensors,
+    }, path)
+    print(f"학생 모델 저장: {path}")
+    return path
+
+def load_student_model(path: str = STUDENT_MODEL_PATH) -> BertForSequenceClassification:
+    """학생 체크포인트를 mmap으로 열어 층 수에 맞는 껍데기 모델에 연결합니다."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"학생 모델이 없습니다: {path} (finetune/phishing/distill_student.py로 먼저 만들어 주세요)")
+    ckpt = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    model = _build_model_skeleton(device="meta", num_hidden_layers=ckpt["num_hidden_layers"])
+    _assign_tensors(model, ckpt["tensors"])
+    print(f"학생 모델 사용({ckpt['num_hidden_layers']}층): {path}")
+    return model
+
+def load_fp32_model() -> BertForSequenceClassification:
+    """URLBERT_MODEL_VARIANT에 따라 교사(12층) 또는 증류 학생 fp32 모델을 로드합니다."""
+    if MODEL_VARIANT == "student":
+        return load_student_model()
+    return load_teacher_model()
+
+def load_teacher_model() -> BertForSequenceClassification:
+    """
+    fp32 교사 분류 모델. 통합 체크포인트가 있으면 mmap으로 바로 연결하고(가중치 1회, 지연 로드),
+    없으면 원본 두 파일로 로드한 뒤 다음 시작을 위해 통합 체크포인트로 변환해 둡니다.
+    """
+    if USE_CONSOLIDATED_CHECKPOINT:
+        model = _load_consolidated_model()
+        if model is not None:
+            return model
+
+    model = _load_original_fp32_model()
+    if USE_CONSOLIDATED_CHECKPOINT:
+        try:
+            convert_to_inference_checkpoint(model)
+        except OSError as e:
+            print(f"통합 체크포인트 저장 실패({e}), 원본 체크포인트만 사용합니다.")
+    return model
+
+def quantize_model(model: nn.Module) -> nn.Module:
+    """Linear 레이어를 INT8로 동적 양자화합니다 (CPU 전용)."""
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+def _checkpoint_fingerprint(include_student: bool = MODEL_VARIANT == "student") -> dict:
+    """원본 체크포인트가 바뀌면 캐시(양자화/내보내기/통합 체크포인트)를 다시 만들기 위한 식별 정보."""
+    out = {}
+    paths = [BERT_PRETRAINED_MODEL_PATH, CLASSIFIER_MODEL_PATH]
+    if include_student:
+        paths.append(STUDENT_MODEL_PATH)
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        st = os.stat(path)
+        out[os.path.basename(path)] = (st.st_size, int(st.st_mtime))
+    return out
+
+def load_int8_model() -> nn.Module:
+    """
+    양자화 캐시가 유효하면 구조만 만든 뒤 INT8 가중치를 바로 올리고,
+    없거나 오래됐으면 fp32 모델을 양자화해서 캐시로 저장합니다.
+    """
+    fingerprint = _checkpoint_fingerprint()
+    if os.path.exists(QUANTIZED_MODEL_PATH):
+        try:
+            cached = torch.load(QUANTIZED_MODEL_PATH, map_location="cpu")
+            if cached.get("fingerprint") == fingerprint:
+                model = quantize_model(_build_model_skeleton(num_hidden_layers=cached.get("num_hidden_layers")))
+                model.load_state_dict(cached["state_dict"])
+                print(f"INT8 양자화 캐시 사용: {QUANTIZED_MODEL_PATH}")
+                return model
+            print("원본 체크포인트가 변경되어 INT8 캐시를 다시 만듭니다.")
+        except Exception as e:
+            print(f"INT8 캐시 로드 실패({e}), 다시 양자화합니다.")
+
+    model = quantize_model(load_fp32_model().to("cpu"))
+    try:
+        torch.save({"fingerprint": fingerprint, "num_hidden_layers": model.bert.config.num_hidden_layers,
+                    "state_dict": model.state_dict()}, QUANTIZED_MODEL_PATH)
+        print(f"INT8 양자화 캐시 저장: {QUANTIZED_MODEL_PATH}")
+    except OSError as e:
+        print(f"INT8 캐시 저장 실패({e}), 메모리상의 양자화 모델만 사용합니다.")
+    return model
+
+def _export_source_path() -> str:
+    """내보내기 파일 이름의 기준이 되는 체크포인트 (학생 모델이면 학생 파일 옆에 만듭니다)."""
+    return STUDENT_MODEL_PATH if MODEL_VARIANT == "student" else CLASSIFIER_MODEL_PATH
+
+def export_model(backend: str, model: nn.Module = None) -> str:
+    """
+    fp32 분류 모델을 ONNX/TorchScript로 내보내고 패리티 검사를 통과하면 매니페스트와 함께 저장합니다.
+    logits 차이가 EXPORT_PARITY_ATOL을 넘으면 파일을 지우고 RuntimeError를 냅니다.
+    """
+    artifact, manifest_path = backends.artifact_paths(_export_source_path(), backend, EXPORT_VERSION)
+    reference = model if model is not None else load_fp32_model()
+    reference = reference.to("cpu").eval()
+
+    backends.export_classifier(reference, backend, artifact)
+    try:
+        drift = backends.check_parity(reference, backends.load_backend(backend, artifact, torch.device("cpu")),
+                                      EXPORT_PARITY_ATOL)
+    except Exception:
+        if os.path.exists(artifact):
+            os.remove(artifact)
+        raise
+
+    backends.write_manifest(manifest_path, {
+        "backend": backend,
+        "version": EXPORT_VERSION,
+        "source": os.path.basename(_export_source_path()),
+        "fingerprint": _checkpoint_fingerprint(),
+        "max_logit_drift": drift,
+        "torch_version": torch.__version__,
+    })
+    print(f"{backend} 내보내기 완료: {artifact} (max|Δlogit|={drift:.2e})")
+    return artifact
+
+def load_backend_model(backend: str):
+    """내보낸 파일이 현재 체크포인트와 일치하면 바로 로드하고, 아니면 다시 내보냅니다."""
+    artifact, manifest_path = backends.artifact_paths(_export_source_path(), backend, EXPORT_VERSION)
+    manifest = backends.read_manifest(manifest_path)
+    fingerprint = json.loads(json.dumps(_checkpoint_fingerprint()))
+    if not (os.path.exists(artifact) and manifest.get("fingerprint") == fingerprint):
+        export_model(backend)
+    device = DEVICE if backend == "torchscript" else torch.device("cpu")
+    return backends.load_backend(backend, artifact, device)
+
+def load_inference_model(precision: str = INFERENCE_PRECISION, backend: str = INFERENCE_BACKEND):
     """
     애플리케이션 시작 시 모델과 토크나이저를 한 번 로드하는 함수.
     이 함수는 global_tokenizer와 global_model을 초기화하고 반환합니다.
+    precision: "fp32"(기본) 또는 "int8"(CPU 동적 양자화, 디스크 캐시 사용)
+    backend: "torch"(기본) / "onnx" / "torchscript" — 어떤 것이든 model([ids, types, masks]) 형태로 호출됩니다.
     """
+    if global_model is not None and global_tokenizer is not None:
+        return global_model, global_tokenizer
+    with _load_lock:
+        return _load_inference_model_locked(precision, backend)
+
+def _load_inference_model_locked(precision: str, backend: str):
     global global_tokenizer, global_model
 
     if global_model is not None and global_tokenizer is not None:
         print("모델과 토크나이저가 이미 로드되어 있습니다.")
         return global_model, global_tokenizer 
 
-    print("모델 및 토크나이저 로드 시작 (앱 초기화)...")
+    print(f"모델 및 토크나이저 로드 시작 (앱 초기화, model={MODEL_VARIANT}, precision={precision}, backend={backend})...")
     
     # 1. Tokenizer 로드 
-    current_tokenizer = BertTokenizer(VOCAB_FILE_PATH) 
+    current_tokenizer = UrlTokenizer(VOCAB_FILE_PATH, use_fast=USE_FAST_TOKENIZER)
 
-    # 2. BERT Config 로드
-    config = AutoConfig.from_pretrained(BERT_CONFIG_DIR, **BERT_CONFIG_KWARTS)
+    # 2. 모델 로드
+    if precision == "int8" and DEVICE.type != "cpu":
+        print("INT8 양자화는 CPU에서만 지원됩니다. fp32로 로드합니다.")
+        precision = "fp32"
 
-    # 3. AutoModelForMaskedLM 로드
-    bert_model_for_loading = AutoModelForMaskedLM.from_config(config=config)
-    bert_model_for_loading.resize_token_embeddings(BERT_CONFIG_KWARTS["vocab_size"])
-
-    # 4. 기존 BERT 모델의 가중치 로드 
-    bert_dict = torch.load(BERT_PRETRAINED_MODEL_PATH, map_location=torch.device("cpu"))
-    bert_model_for_loading.load_state_dict(bert_dict)
+    if backend not in backends.SUPPORTED_BACKENDS:
+        raise ValueError(f"지원하지 않는 백엔드입니다: {backend}")
 
-    # 5. 분류 모델 초기화 및 학습된 가중치 로드
-    current_model = BertForSequenceClassification(bert_model_for_loading)
-    current_model.bert.cls = nn.Sequential() # MaskedLM 헤드 제거 
-    current_model.load_state_dict(torch.load(CLASSIFIER_MODEL_PATH, map_location=DEVICE))
-    current_model.to(DEVICE)
+    if backend != "torch":
+        if precision == "int8":
+            print(f"{backend} 백엔드는 fp32 내보내기를 사용합니다 (precision=int8 무시).")
+        current_model = load_backend_model(backend)
+    elif precision == "int8":
+        current_model = load_int8_model()
+    else:
+        current_model = load_fp32_model()
+        current_model.to(DEVICE)
     current_model.eval() # 추론 모드 설정 
 
     print("모델 로드 완료.")
@@ -75,4 +315,4 @@ def load_inference_model():
     global_tokenizer = current_tokenizer
     global_model = current_model
     
-    return global_model, global_tokenizer # 로드된 모델과 토크나이저를 반환
\ No newline at end of file
+    return global_model, global_tokenizer # 로드된 모델과 토크나이저를 반환
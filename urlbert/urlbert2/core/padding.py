@@ -0,0 +1,110 @@
+# urlbert/urlbert2/core/padding.py
+# 추론용 동적 패딩 / 길이 버킷 유틸
+import threading
+
+import torch
+
+from config import PAD_SIZE, PAD_BUCKETS, DEVICE
+
+
+def bucket_length(length: int, buckets=PAD_BUCKETS, max_len: int = PAD_SIZE) -> int:
+    """
+    시퀀스 길이를 담을 수 있는 가장 작은 버킷 크기를 반환합니다.
+    버킷이 비어 있으면 길이 그대로(최장 시퀀스 기준 패딩) 사용합니다.
+    """
+    length = min(length, max_len)
+    for b in buckets:
+        if length <= b:
+            return min(b, max_len)
+    return max_len if buckets else length
+
+
+def pad_encoded(ids: list, pad_size: int):
+    """
+    토큰 id 리스트를 pad_size로 자르거나 채워 (ids, types, masks) 리스트를 반환합니다.
+    학습 때와 동일하게 패딩 구간은 segment=1, mask=0, id=0 입니다.
+    """
+    ids = ids[:pad_size]
+    n = len(ids)
+    types = [0] * n + [1] * (pad_size - n)
+    masks = [1] * n + [0] * (pad_size - n)
+    ids = ids + [0] * (pad_size - n)
+    return ids, types, masks
+
+
+def pad_batch(ids_list: list, pad_size: int = None, device=DEVICE):
+    """
+    여러 시퀀스를 한 배치 텐서로 묶습니다.
+    pad_size가 None이면 배치 내 최장 시퀀스를 버킷 크기로 올려서 사용합니다.
+    마스크된 패딩 위치는 attention에서 제외되므로 [CLS] logits는 고정 길이 패딩과 동일합니다.
+    """
+    if pad_size is None:
+        pad_size = bucket_length(max(len(ids) for ids in ids_list))
+
+    all_ids, all_types, all_masks = [], [], []
+    for ids in ids_list:
+        i, t, m = pad_encoded(ids, pad_size)
+        all_ids.append(i)
+        all_types.append(t)
+        all_masks.append(m)
+
+    return (
+        torch.tensor(all_ids, dtype=torch.long).to(device),
+        torch.tensor(all_types, dtype=torch.long).to(device),
+        torch.tensor(all_masks, dtype=torch.long).to(device),
+    )
+
+
+class InputBuffers:
+    """
+    (배치 크기, 패딩 길이)마다 입력 텐서 3개를 한 번만 만들어 두고 매 요청마다 덮어씁니다.
+    버킷 패딩 덕분에 모양 조합이 몇 개로 한정되어 버퍼 수도 작게 유지됩니다.
+    반환된 텐서는 다음 fill() 호출 때 덮어써지므로 forward가 끝난 뒤에만 다시 채워야 하며,
+    스레드끼리 공유하지 말고 get_input_buffers()로 스레드별 인스턴스를 사용하세요.
+    """
+
+    def __init__(self, device=DEVICE):
+        self.device = torch.device(device)
+        self._buffers = {}
+
+    def _get(self, batch_size: int, pad_size: int) -> torch.Tensor:
+        key = (batch_size, pad_size)
+        buf = self._buffers.get(key)
+        if buf is None:
+            buf = torch.empty((3, batch_size, pad_size), dtype=torch.long, device=self.device)
+            self._buffers[key] = buf
+        return buf
+
+    def fill(self, ids_list: list, pad_size: int = None):
+        """
+        pad_batch와 같은 (ids, types, masks)를 버퍼에 채워 반환합니다.
+        ids_list의 원소는 토큰 id 리스트 또는 1차원 텐서(패딩 없는 유효 구간)입니다.
+        """
+        if pad_size is None:
+            pad_size = bucket_length(max(len(ids) for ids in ids_list))
+        buf = self._get(len(ids_list), pad_size)
+        ids, types, masks = buf[0], buf[1], buf[2]
+        ids.zero_()
+        types.fill_(1)
+        masks.zero_()
+        for row, seq in enumerate(ids_list):
+            n = min(len(seq), pad_size)
+            ids[row, :n] = torch.as_tensor(seq[:n], dtype=torch.long)
+            types[row, :n] = 0
+            masks[row, :n] = 1
+        return ids, types, masks
+
+    def num_buffers(self) -> int:
+        return len(self._buffers)
+
+
+_local = threading.local()
+
+def get_input_buffers(device=DEVICE) -> InputBuffers:
+    """현재 스레드 전용 InputBuffers (마이크로 배칭 워커, 사이드카 연결 스레드 등에서 재사용)."""
+    buffers = getattr(_local, "buffers", None)
+    if buffers is None or buffers.device != torch.device(device):
+        buffers = InputBuffers(device)
+        _local.buffers = buffers
+    return buffers
+
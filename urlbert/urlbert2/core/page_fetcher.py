@@ -0,0 +1,217 @@
+# urlbert/urlbert2/core/page_fetcher.py
+# URL 한 건을 한 번만 받는 페이지 수집 계층
+#
+# 헤더 추출(urlbert_analyzer의 헤더 단계, 사이드카 요청)과 크롤링 지표(bot/feature_crawler)가 같은 응답을 씁니다.
+# 실제 요청은 header_fetcher 프로브가 하며, 결과는 프로브 dict(header_info, final_url, status, redirect_chain ...)에
+# 최종 응답 본문(body, 최대 PAGE_MAX_BODY_BYTES)이 더해진 것입니다.
+#   fetch_page(url, timeout)        -> 본문까지 받은 결과 (없으면 None)
+#   submit_page(url, with_body)     -> concurrent.futures.Future, 다 쓴 뒤(또는 포기할 때) release(url, future)
+#   wait(url, future, timeout)      -> 결과를 기다린 뒤(받았든 포기했든) release까지 한 번에
+#   prefetch(url)                   -> 상세 분석처럼 본문이 곧 필요할 때 미리 시작
+# 결과는 URL별로 PAGE_CACHE_TTL_SECONDS 동안 재사용하고, 같은 URL 동시 요청은 한 번만 보냅니다.
+# 헤더만 필요한 요청은 본문을 받지 않는 프로브를 쓰되, 본문까지 받는(받은) 요청이 있으면 그 요청의 헤더를 씁니다.
+# 헤더용 Future는 최종 응답 헤더가 오는 즉시 채워지므로 (본문 없음) 본문 다운로드를 기다리지 않습니다.
+# 본문은 PAGE_FETCH_TIMEOUT_SECONDS 안에 받은 데까지만 씁니다 (못 다 받으면 body_truncated=True).
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout, CancelledError
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config import (
+    REQUEST_TIMEOUT_SECONDS, PAGE_MAX_BODY_BYTES, PAGE_FETCH_TIMEOUT_SECONDS,
+    PAGE_CACHE_TTL_SECONDS, PAGE_CACHE_MAX_MB
+)
+from . import header_fetcher
+
+_INFLIGHT = float("inf")
+
+
+def page_key(url: str) -> str:
+    return (url or "").strip().split("#", 1)[0]
+
+
+class _Entry:
+    __slots__ = ("future", "headers", "with_body", "expires_at", "size", "consumers", "pinned")
+
+    def __init__(self, future, headers, with_body: bool):
+        self.future = future          # 프로브 전체 결과 (본문 포함)
+        self.headers = headers        # 최종 응답 헤더가 오면 바로 채워지는 결과 (본문 없음)
+        self.with_body = with_body
+        self.expires_at = _INFLIGHT   # 완료되면 완료 시각 + TTL
+        self.size = 0
+        self.consumers = 0
+        self.pinned = False           # prefetch로 시작한 요청은 대기자가 없어도 끊지 않습니다.
+
+
+class PageCache:
+    def __init__(self, ttl_seconds: float = PAGE_CACHE_TTL_SECONDS, max_bytes: int = int(PAGE_CACHE_MAX_MB * 1024 * 1024)):
+        self.ttl = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> _Entry
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"fetches": 0, "body_fetches": 0, "hits": 0, "coalesced": 0, "cancelled": 0, "evictions": 0}
+
+    def _drop(self, key: str, entry: _Entry):
+        # self._lock을 잡은 상태에서 호출
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+            self._bytes -= entry.size
+
+    def submit_page(self, url: str, with_body: bool = False, pin: bool = False):
+        """
+        결과 Future를 반환합니다. 같은 결과를 기다리는 다른 호출이 있을 수 있으므로
+        직접 cancel()하지 말고 release(url, future)를 부르세요.
+        with_body=False 이면 헤더가 오는 즉시 채워지는 Future(body=None)를 반환합니다.
+        """
+        key = page_key(url)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry.expires_at <= now or entry.future.cancelled()):
+                self._drop(key, entry)
+                entry = None
+            if entry is not None and (entry.with_body or not with_body):
+                if pin:
+                    entry.pinned = True
+                else:
+                    entry.consumers += 1
+                self._entries.move_to_end(key)
+                wanted = entry.future if with_body else entry.headers
+                self._counters["hits" if wanted.done() else "coalesced"] += 1
+                return wanted
+
+            max_body = PAGE_MAX_BODY_BYTES if with_body else 0
+            timeout = PAGE_FETCH_TIMEOUT_SECONDS if with_body else REQUEST_TIMEOUT_SECONDS
+            headers = Future()
+            future = header_fetcher.submit_probe(url, max_body=max_body, timeout=timeout, headers_future=headers)
+            entry = _Entry(future, headers, with_body)
+            if pin:
+                entry.pinned = True
+            else:
+                entry.consumers = 1
+            if key in self._entries:
+                # 헤더만 받는 중이던 항목은 본문까지 받는 항목으로 바꿉니다 (기존 대기자는 자기 Future를 그대로 씀).
+                self._drop(key, self._entries[key])
+            self._entries[key] = entry
+            self._counters["body_fetches" if with_body else "fetches"] += 1
+        future.add_done_callback(lambda f, key=key, entry=entry: self._done(key, entry, f))
+        return future if with_body else headers
+
+    def _done(self, key: str, entry: _Entry, future):
+        if future.cancelled():
+            entry.headers.cancel()   # 헤더가 오기 전에 취소된 프로브 (이미 채워졌으면 영향 없음)
+        with self._lock:
+            if self._entries.get(key) is not entry:
+                return
+            if future.cancelled() or future.exception() is not None:
+                self._drop(key, entry)
+                return
+            entry.expires_at = time.monotonic() + self.ttl
+            entry.size = len(future.result().get("body") or b"")
+            self._bytes += entry.size
+            # 본문 총량 상한을 넘으면 오래된 것부터 비웁니다 (진행 중인 항목은 건드리지 않음).
+            for old_key, old in list(self._entries.items()):
+                if self._bytes <= self.max_bytes:
+                    break
+                if old is not entry and old.future.done():
+                    self._drop(old_key, old)
+                    self._counters["evictions"] += 1
+
+    def release(self, url: str, future):
+        """더 기다리지 않을 때 호출합니다 (submit_page가 준 Future). 아무도 기다리지 않는 진행 중 요청은 끊습니다."""
+        key = page_key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry.future is not future and entry.headers is not future):
+                return
+            entry.consumers -= 1
+            if entry.consumers > 0 or entry.pinned or entry.future.done():
+                return
+            if not entry.with_body and entry.headers.done():
+                return   # 헤더만 받는 프로브는 헤더가 오면 끝난 것 (남은 연결 정리만 진행 중)
+            self._drop(key, entry)
+            self._counters["cancelled"] += 1
+        entry.future.cancel()
+        entry.headers.cancel()
+
+    def fetch_page(self, url: str, timeout: float = PAGE_FETCH_TIMEOUT_SECONDS, deadline=None):
+        """
+        본문까지 받은 결과 dict. timeout 안에 못 받으면 None.
+        deadline(core.deadline.Deadline)이 cancel()되면 기다리기를 그만두고 release합니다 (단계 그래프에서 버려진 경우).
+        """
+        future = self.submit_page(url, with_body=True)
+        try:
+            return self.wait(url, future, max(0.0, timeout), deadline)
+        except (FutureTimeout, CancelledError):
+            return None
+
+    def wait(self, url: str, future, timeout: float = None, deadline=None):
+        """
+        submit_page/pending이 준 Future의 결과를 기다리고, 받았든(실패 포함) 포기했든 release를 한 번 부릅니다.
+        결과를 받은 대기자도 자리를 돌려줘야 남은 대기자가 없는 진행 중 요청(본문 다운로드 등)을 끊을 수 있습니다.
+        deadline(core.deadline.Deadline)이 cancel()되면 그때 바로 release합니다 (단계 그래프에서 버려진 경우).
+        시간 초과/취소는 FutureTimeout/CancelledError를 그대로 올립니다.
+        """
+        once = threading.Lock()   # release는 한 번만 (결과를 받은 뒤에 cancel되거나 둘이 겹치는 경우)
+
+        def settle():
+            if once.acquire(blocking=False):
+                self.release(url, future)
+
+        if deadline is not None:
+            deadline.on_cancel(settle)
+        try:
+            return future.result(timeout=timeout)
+        finally:
+            settle()
+
+    def prefetch(self, url: str):
+        """본문까지 받는 요청을 미리 시작합니다. (이후 헤더/크롤링 요청이 이 결과를 함께 씀)"""
+        return self.submit_page(url, with_body=True, pin=True)
+
+    def pending(self, url: str):
+        """
+        진행 중이거나 유효한 결과가 있으면 그 헤더 Future(대기자로 셈, 본문을 기다리지 않음), 없으면 None.
+        결과는 wait(url, future, timeout)로 받으세요 (대기자 자리를 돌려줌).
+        새 요청은 보내지 않습니다.
+        """
+        key = page_key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic() or entry.future.cancelled():
+                return None
+            entry.consumers += 1
+            self._counters["hits" if entry.headers.done() else "coalesced"] += 1
+            return entry.headers
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._counters)
+            out["size"] = len(self._entries)
+            out["body_bytes"] = self._bytes
+        sent = out["fetches"] + out["body_fetches"]
+        reused = out["hits"] + out["coalesced"]
+        out["reuse_rate"] = reused / (sent + reused) if sent + reused else 0.0
+        out["ttl_seconds"] = self.ttl
+        return out
+
+
+# 프로세스 전체에서 공유하는 페이지 캐시
+page_cache = PageCache()
+submit_page = page_cache.submit_page
+release = page_cache.release
+wait = page_cache.wait
+fetch_page = page_cache.fetch_page
+prefetch = page_cache.prefetch
@@ -0,0 +1,237 @@
+# urlbert/urlbert2/core/sidecar.py
+# 추론 사이드카 클라이언트 + 바이너리 프로토콜
+#
+# 모델은 사이드카 프로세스(sidecar_server.py) 하나만 들고 있고,
+# Flask / FastAPI / 챗봇 프로세스는 Unix 도메인 소켓으로 URL만 보내고 결과만 받습니다.
+# 사이드카가 꺼져 있으면 자동으로 프로세스 내 추론(load_inference_model)으로 대체합니다.
+#
+# 프레임 형식 (big-endian)
+#   요청: op(1B) | payload_len(4B) | payload(UTF-8 URL)
+#         op=3(마감 시간 있는 분석)이면 payload 앞에 남은 시간 budget_ms(4B)가 붙습니다.
+#         op=4(헤더를 함께 보내는 분석)이면 payload는 "URL\0header_info"이고 사이드카는 요청을 보내지 않습니다.
+#         (클라이언트 프로세스가 같은 URL 페이지를 이미 받았거나 받는 중일 때: core/page_fetcher.py)
+#   응답: status(1B) | is_malicious(1B) | confidence(float32, 4B) | text_len(4B) | text(UTF-8)
+#         status=0 이면 text는 header_info, status=1 이면 오류 메시지,
+#         status=2 이면 마감 시간 안에 헤더를 받지 못해 NOHEADER로 판정한 결과(incomplete)
+import os
+import sys
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config import (
+    SIDECAR_ENABLED, SIDECAR_SOCKET_PATH, SIDECAR_TIMEOUT_SECONDS, SIDECAR_RETRY_SECONDS,
+    SIDECAR_DEADLINE_GRACE_SECONDS, REQUEST_TIMEOUT_SECONDS
+)
+from . import page_fetcher
+
+OP_CLASSIFY = 1
+OP_PING = 2
+OP_CLASSIFY_DEADLINE = 3
+OP_CLASSIFY_HEADERS = 4
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+STATUS_INCOMPLETE = 2
+
+_REQ_HEADER = struct.Struct(">BI")
+_BUDGET = struct.Struct(">I")
+_RESP_HEADER = struct.Struct(">BBfI")
+
+
+class SidecarUnavailable(Exception):
+    """사이드카에 연결할 수 없거나 응답이 깨졌을 때."""
+
+
+# --- 프로토콜 ---
+def recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("연결이 끊어졌습니다.")
+        buf.extend(chunk)
+    return bytes(buf)
+
+def pack_request(op: int, url: str = "", budget_ms: int = 0, header_info: str = "") -> bytes:
+    payload = url.encode("utf-8")
+    if op == OP_CLASSIFY_DEADLINE:
+        payload = _BUDGET.pack(budget_ms) + payload
+    elif op == OP_CLASSIFY_HEADERS:
+        payload = payload + b"\0" + header_info.encode("utf-8")
+    return _REQ_HEADER.pack(op, len(payload)) + payload
+
+def read_request(sock: socket.socket):
+    """
+    반환: (op, url, budget_ms, header_info).
+    budget_ms는 OP_CLASSIFY_DEADLINE일 때만, header_info는 OP_CLASSIFY_HEADERS일 때만 값이 있고 나머지는 None.
+    """
+    op, n = _REQ_HEADER.unpack(recv_exact(sock, _REQ_HEADER.size))
+    payload = recv_exact(sock, n) if n else b""
+    budget_ms = header_info = None
+    if op == OP_CLASSIFY_DEADLINE:
+        (budget_ms,) = _BUDGET.unpack(payload[:_BUDGET.size])
+        payload = payload[_BUDGET.size:]
+    elif op == OP_CLASSIFY_HEADERS:
+        payload, _, header = payload.partition(b"\0")
+        header_info = header.decode("utf-8")
+    return op, payload.decode("utf-8"), budget_ms, header_info
+
+def pack_response(status: int, is_malicious: int = 0, confidence: float = 0.0, text: str = "") -> bytes:
+    data = (text or "").encode("utf-8")
+    return _RESP_HEADER.pack(status, is_malicious, confidence, len(data)) + data
+
+def read_response(sock: socket.socket):
+    status, is_mal, conf, n = _RESP_HEADER.unpack(recv_exact(sock, _RESP_HEADER.size))
+    return status, is_mal, conf, recv_exact(sock, n).decode("utf-8") if n else ""
+
+
+# --- 클라이언트 ---
+class SidecarClient:
+    """스레드마다 연결 하나를 유지하는 얇은 클라이언트."""
+
+    def __init__(self, socket_path: str = SIDECAR_SOCKET_PATH, timeout: float = SIDECAR_TIMEOUT_SECONDS):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _call(self, op: int, url: str = "", budget_ms: int = 0, timeout: float = None, header_info: str = ""):
+        try:
+            sock = self._connect()
+            # timeout=0은 논블로킹 소켓이 되므로 아주 짧은 대기로 바꿉니다.
+            sock.settimeout(self.timeout if timeout is None else max(timeout, 0.001))
+            sock.sendall(pack_request(op, url, budget_ms, header_info))
+            return read_response(sock)
+        except socket.timeout as e:
+            self._close()  # 늦게 도착한 응답이 다음 요청과 섞이지 않도록 연결을 버립니다.
+            if timeout is not None:
+                # 마감 시간 초과는 사이드카 장애가 아니므로 프로세스 내 추론으로 넘기지 않습니다.
+                raise TimeoutError(f"사이드카 응답이 마감 시간 안에 오지 않았습니다: {e}") from e
+            raise SidecarUnavailable(str(e)) from e
+        except (OSError, ConnectionError, struct.error) as e:
+            self._close()
+            raise SidecarUnavailable(str(e)) from e
+
+    def ping(self) -> bool:
+        try:
+            return self._call(OP_PING)[0] == STATUS_OK
+        except SidecarUnavailable:
+            return False
+
+    def classify(self, url: str, deadline=None, header_info: str = None) -> dict:
+        """
+        deadline이 있으면 응답은 남은 시간 + SIDECAR_DEADLINE_GRACE_SECONDS까지만 기다립니다.
+        그 안에 못 받으면 TimeoutError (사이드카 장애가 아니므로 SidecarUnavailable이 아님).
+        """
+        timeout = None
+        if deadline is not None and not deadline.unlimited:
+            timeout = min(self.timeout, deadline.remaining() + SIDECAR_DEADLINE_GRACE_SECONDS)
+        if header_info is not None:
+            # 헤더는 이미 있으므로 사이드카는 추론만 합니다.
+            status, is_mal, conf, text = self._call(OP_CLASSIFY_HEADERS, url, timeout=timeout, header_info=header_info)
+        elif timeout is None:
+            status, is_mal, conf, text = self._call(OP_CLASSIFY, url)
+        else:
+            # 사이드카도 같은 마감 시간 안에서 헤더를 기다리도록 남은 시간을 함께 보냅니다.
+            try:
+                status, is_mal, conf, text = self._call(
+                    OP_CLASSIFY_DEADLINE, url, int(deadline.remaining() * 1000), timeout=timeout
+                )
+            except TimeoutError:
+                # 프로세스 내 경로처럼 헤더 없이("NOHEADER") 추론한 결과를 incomplete로 돌려줍니다.
+                # 추론만 하는 요청이라 SIDECAR_DEADLINE_GRACE_SECONDS만 더 기다리고, 이것도 늦으면 TimeoutError를
+                # 그대로 올립니다 (마감이 지난 요청 안에서 프로세스 내 모델을 새로 로드하지 않도록).
+                status, is_mal, conf, text = self._call(
+                    OP_CLASSIFY_HEADERS, url, timeout=SIDECAR_DEADLINE_GRACE_SECONDS, header_info="NOHEADER"
+                )
+                if status == STATUS_OK:
+                    status = STATUS_INCOMPLETE
+        if status not in (STATUS_OK, STATUS_INCOMPLETE):
+            raise RuntimeError(f"사이드카 분석 오류: {text}")
+        return {
+            "url": url,
+            "header_info": text,
+            "is_malicious": is_mal,
+            "confidence": float(conf),
+            "true_label": None,
+            "incomplete": status == STATUS_INCOMPLETE
+        }
+
+
+_client = SidecarClient()
+_down_until = 0.0
+
+def _classify_in_process(url: str, model=None, tokenizer=None, deadline=None, header_info: str = None) -> dict:
+    from .urlbert_analyzer import classify_url_and_explain
+    if model is None or tokenizer is None:
+        from .model_loader import load_inference_model
+        model, tokenizer = load_inference_model()
+    return classify_url_and_explain(url, model, tokenizer, deadline=deadline, header_info=header_info)
+
+def _shared_header_info(url: str, deadline=None):
+    """
+    (header_info, incomplete). 이 프로세스가 같은 URL 페이지를 받는 중이거나 방금 받았으면(page_fetcher) 그 헤더,
+    아니면 (None, False).
+    본문이 아니라 헤더만 기다리며, 기다리는 시간은 헤더 단계와 같은 REQUEST_TIMEOUT_SECONDS(마감 시간이 있으면 그 이하)입니다.
+    그 안에 못 받으면 프로세스 내 헤더 단계가 시간 초과된 것과 같이 ("NOHEADER", True)입니다.
+    """
+    pending = page_fetcher.page_cache.pending(url)
+    if pending is None:
+        return None, False
+    wait = REQUEST_TIMEOUT_SECONDS if deadline is None else deadline.clamp(REQUEST_TIMEOUT_SECONDS)
+    try:
+        return page_fetcher.wait(url, pending, wait)["header_info"], False
+    except FutureTimeout:
+        return "NOHEADER", True
+    except Exception:
+        return None, False
+
+def classify_url(url: str, model=None, tokenizer=None, deadline=None) -> dict:
+    """
+    classify_url_and_explain과 같은 dict를 반환합니다.
+    사이드카가 살아 있으면 사이드카로 보내고, 연결이 안 되면 SIDECAR_RETRY_SECONDS 동안은
+    프로세스 내 추론을 사용합니다 (model/tokenizer를 넘기지 않으면 그때 처음 로드).
+    deadline(core.deadline.Deadline)을 주면 헤더는 남은 시간까지만 기다리고, 못 받으면 "incomplete": True 입니다.
+    사이드카 응답이 마감 시간을 넘겨도 예외 대신 NOHEADER로 추론한 incomplete 결과를 돌려줍니다 (프로세스 내 경로와 같음).
+    그 추론마저 SIDECAR_DEADLINE_GRACE_SECONDS 안에 오지 않으면 TimeoutError입니다.
+    프로세스 내 추론으로 넘어가는 것은 사이드카에 연결할 수 없을 때(SidecarUnavailable)뿐입니다.
+    이 프로세스가 같은 URL 페이지를 이미 받는 중이면(상세 분석의 크롤링 등) 그 헤더를 써서 다시 요청하지 않습니다.
+    """
+    global _down_until
+    header_info, incomplete = _shared_header_info(url, deadline)
+    result = None
+    if SIDECAR_ENABLED and time.monotonic() >= _down_until:
+        try:
+            result = _client.classify(url, deadline, header_info)
+        except SidecarUnavailable as e:
+            _down_until = time.monotonic() + SIDECAR_RETRY_SECONDS
+            print(f"⚠️ URLBERT 사이드카 연결 실패({e}), 프로세스 내 추론으로 대체합니다.")
+    if result is None:
+        result = _classify_in_process(url, model, tokenizer, deadline, header_info)
+    if incomplete:
+        result["incomplete"] = True
+    return result
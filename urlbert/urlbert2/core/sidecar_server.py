@@ -0,0 +1,73 @@
+# urlbert/urlbert2/core/sidecar_server.py
+# URLBERT 추론 사이드카 서버: 모델을 한 번만 로드하고 Unix 도메인 소켓으로 요청을 받습니다.
+#
+# 실행 (프로젝트 루트에서):
+#   python -m urlbert.urlbert2.core.sidecar_server
+# 연결마다 스레드 하나가 요청을 처리하며, 실제 forward는 마이크로 배칭 실행기가 묶어서 수행합니다.
+import os
+import socketserver
+
+from .urlbert_analyzer import classify_url_and_explain
+from .model_loader import load_inference_model
+from .warmup import warm_model
+from .deadline import Deadline
+from .sidecar import (
+    OP_CLASSIFY, OP_PING, OP_CLASSIFY_DEADLINE, OP_CLASSIFY_HEADERS, STATUS_OK, STATUS_ERROR, STATUS_INCOMPLETE,
+    read_request, pack_response
+)
+from config import SIDECAR_SOCKET_PATH
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        while True:
+            try:
+                op, url, budget_ms, header_info = read_request(sock)
+            except (ConnectionError, OSError):
+                return
+
+            if op == OP_PING:
+                sock.sendall(pack_response(STATUS_OK))
+                continue
+            if op not in (OP_CLASSIFY, OP_CLASSIFY_DEADLINE, OP_CLASSIFY_HEADERS):
+                sock.sendall(pack_response(STATUS_ERROR, text=f"unknown op {op}"))
+                continue
+
+            try:
+                model, tokenizer = self.server.model, self.server.tokenizer
+                deadline = Deadline(budget_ms / 1000) if budget_ms is not None else None
+                result = classify_url_and_explain(url, model, tokenizer, deadline=deadline, header_info=header_info)
+                status = STATUS_INCOMPLETE if result.get("incomplete") else STATUS_OK
+                resp = pack_response(status, int(result["is_malicious"]),
+                                     float(result["confidence"]), result.get("header_info") or "")
+            except Exception as e:
+                resp = pack_response(STATUS_ERROR, text=f"{type(e).__name__}: {e}")
+            sock.sendall(resp)
+
+
+class SidecarServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, model, tokenizer):
+        self.model = model
+        self.tokenizer = tokenizer
+        if os.path.exists(socket_path):
+            os.remove(socket_path)  # 이전 실행에서 남은 소켓 파일 정리
+        super().__init__(socket_path, _Handler)
+
+
+def serve(socket_path: str = SIDECAR_SOCKET_PATH):
+    model, tokenizer = load_inference_model()
+    warm_model(model)  # 소켓을 열기 전에 워밍업 → 클라이언트의 ping 성공 = 바로 처리 가능
+    with SidecarServer(socket_path, model, tokenizer) as server:
+        print(f"URLBERT 사이드카 대기 중: {socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+
+
+if __name__ == "__main__":
+    serve()
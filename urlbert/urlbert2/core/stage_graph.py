@@ -0,0 +1,262 @@
+# urlbert/urlbert2/core/stage_graph.py
+# 선언형 단계 그래프 실행기
+#
+# 단계(Stage)는 입력/출력 이름을 선언하고, 입력이 모두 준비된 단계끼리는 공유 스레드 풀에서 동시에 실행됩니다.
+# 따라서 전체 소요 시간은 단계 시간의 합이 아니라 의존 경로 중 가장 느린 경로에 가까워집니다.
+# 단계마다 timeout / 기본값 / 캐시 훅이 있고, 실행 결과(StageRun)에 단계별 상태와 소요 시간이 남습니다.
+#
+#   graph = StageGraph([
+#       Stage("dns",   resolve, inputs=("host", "deadline"), outputs=("resolvable",), timeout=2),
+#       Stage("crawl", crawl,   inputs=("url", "resolvable", "deadline"), outputs=("crawl",), timeout=10),
+#       Stage("ssl",   probe,   inputs=("host", "deadline"), outputs=("ssl",), timeout=3),
+#   ])
+#   run = graph.run({"url": url, "host": host}, deadline=Deadline(1.5))
+#   run.values["crawl"], run.incomplete, run.timings
+#
+# 입력 이름 "deadline"은 예약어입니다. 그 단계의 timeout과 요청 마감 시간 중 이른 쪽으로 끝나는 Deadline이 들어오며,
+# 단계가 시간 초과/조기 종료로 버려질 때 cancel()되므로 on_cancel()로 진행 중인 요청을 끊을 수 있습니다.
+# 시간을 넘긴 단계는 기본값(defaults)으로 채우고 incomplete로 표시합니다. 예외를 낸 단계도 기본값을 쓰며 errors에 남습니다.
+# 버린 단계가 cancel에 반응하지 못하고 계속 돌면 풀 스레드를 잡고 있으므로, 단계별로 그런 실행이
+# max_abandoned(STAGE_MAX_ABANDONED)개 쌓이면 그 단계는 풀에 넣지 않고 바로 기본값(SATURATED)으로 채웁니다.
+import copy
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config import STAGE_POOL_WORKERS, STAGE_MAX_ABANDONED
+from .deadline import Deadline
+
+DEADLINE_INPUT = "deadline"
+
+# 단계 상태
+OK, CACHED, ERROR, TIMEOUT, SKIPPED, CANCELLED = "ok", "cached", "error", "timeout", "skipped", "cancelled"
+SATURATED = "saturated"
+_INCOMPLETE = (TIMEOUT, SKIPPED, CANCELLED, SATURATED)
+
+
+class Stage:
+    """
+    fn(**inputs)를 실행하는 단계 하나.
+    outputs가 하나면 fn의 반환값이 그대로 그 출력이 되고, 여러 개면 fn은 출력 이름을 키로 하는 dict를 반환합니다.
+    cache: get(key) -> 출력 dict 또는 None, put(key, 출력 dict)를 가진 객체. cache_key(inputs) -> key (None이면 캐시 안 함)
+    max_abandoned: 버렸는데 아직 끝나지 않은 실행이 이만큼 있으면 새로 실행하지 않습니다 (0 이하면 제한 없음).
+    """
+
+    def __init__(self, name: str, fn, inputs=(), outputs=(), timeout: float = None,
+                 defaults: dict = None, cache=None, cache_key=None, max_abandoned: int = STAGE_MAX_ABANDONED):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs) or (name,)
+        self.timeout = timeout
+        self.defaults = dict(defaults or {})
+        self.cache = cache
+        self.cache_key = cache_key
+        self.max_abandoned = max_abandoned
+        self._abandoned = 0
+        self._abandoned_lock = threading.Lock()
+
+    @property
+    def abandoned(self) -> int:
+        """시간 초과/조기 종료로 버렸지만 아직 풀 스레드에서 돌고 있는 실행 수 (모든 그래프 실행 합계)."""
+        return self._abandoned
+
+    def saturated(self) -> bool:
+        return self.max_abandoned > 0 and self._abandoned >= self.max_abandoned
+
+    def abandon(self, future):
+        """결과를 더는 기다리지 않을 실행. 아직 시작 전이면 취소하고, 돌고 있으면 끝날 때까지 세어 둡니다."""
+        if future.cancel() or future.done():
+            return
+        with self._abandoned_lock:
+            self._abandoned += 1
+        future.add_done_callback(self._abandoned_done)
+
+    def _abandoned_done(self, _future):
+        with self._abandoned_lock:
+            self._abandoned -= 1
+
+    def default_outputs(self) -> dict:
+        # 기본값은 단계 객체가 모든 요청에 걸쳐 공유하므로 매번 복사해서 내줍니다 (호출부가 고쳐도 다음 요청에 남지 않게).
+        return {k: copy.deepcopy(self.defaults.get(k)) for k in self.outputs}
+
+    def to_outputs(self, result) -> dict:
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        return {k: result[k] if k in result else copy.deepcopy(self.defaults.get(k)) for k in self.outputs}
+
+    def __repr__(self):
+        return f"Stage({self.name}: {self.inputs} -> {self.outputs})"
+
+
+class StageRun:
+    """그래프 한 번 실행한 결과: 값, 단계별 상태/소요 시간, 오류."""
+
+    def __init__(self, values: dict):
+        self.values = values
+        self.timings = {}   # 단계 이름 -> {"status": ..., "seconds": ...}
+        self.errors = {}    # 단계 이름 -> "ExcType: message"
+        self.stopped_early = False
+        self.started_at = time.perf_counter()
+        self.elapsed = 0.0
+
+    def record(self, name: str, status: str, seconds: float = 0.0):
+        self.timings[name] = {"status": status, "seconds": round(seconds, 4)}
+
+    def status(self, name: str):
+        return self.timings.get(name, {}).get("status")
+
+    @property
+    def incomplete(self) -> list:
+        """시간 초과/마감 후 건너뜀/조기 종료로 결과를 얻지 못한 단계 (실행 순서)."""
+        return [n for n, t in self.timings.items() if t["status"] in _INCOMPLETE]
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+
+class StageGraph:
+    def __init__(self, stages: list):
+        self.stages = list(stages)
+        producers = {}
+        for st in self.stages:
+            for out in st.outputs:
+                if out in producers:
+                    raise ValueError(f"출력 '{out}'을 두 단계({producers[out]}, {st.name})가 만듭니다.")
+                if out == DEADLINE_INPUT:
+                    raise ValueError(f"'{DEADLINE_INPUT}'은 예약된 입력 이름입니다.")
+                producers[out] = st.name
+        self._producers = producers
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        deps = {st.name: {self._producers[i] for i in st.inputs if i in self._producers} for st in self.stages}
+        done, visiting = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"단계 그래프에 순환이 있습니다: {name}")
+            visiting.add(name)
+            for dep in deps[name]:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for st in self.stages:
+            visit(st.name)
+
+    def run(self, initial: dict, deadline: Deadline = None, stop_when=None) -> StageRun:
+        """
+        initial: 외부 입력 값. stop_when(values)가 True가 되면 남은 단계를 취소하고 바로 반환합니다.
+        """
+        missing = {i for st in self.stages for i in st.inputs
+                   if i not in self._producers and i not in initial and i != DEADLINE_INPUT}
+        if missing:
+            raise ValueError(f"단계 입력이 없습니다: {sorted(missing)}")
+
+        run = StageRun(dict(initial))
+        values = run.values
+        pending = list(self.stages)
+        running = {}  # future -> (stage, stage_deadline, cache_key, started)
+        pool = _get_pool()
+
+        def finish(stage, status, outputs, started):
+            values.update(outputs)
+            run.record(stage.name, status, time.perf_counter() - started)
+
+        def start_ready() -> bool:
+            started_any = False
+            for stage in list(pending):
+                if not all(i in values or i == DEADLINE_INPUT for i in stage.inputs):
+                    continue
+                pending.remove(stage)
+                started_any = True
+                started = time.perf_counter()
+                kwargs = {i: values[i] for i in stage.inputs if i != DEADLINE_INPUT}
+
+                key = stage.cache_key(kwargs) if stage.cache is not None and stage.cache_key else None
+                if key is not None:
+                    hit = stage.cache.get(key)
+                    if hit is not None:
+                        finish(stage, CACHED, {k: hit[k] if k in hit else copy.deepcopy(stage.defaults.get(k))
+                                               for k in stage.outputs}, started)
+                        continue
+
+                if deadline is not None and deadline.expired():
+                    finish(stage, SKIPPED, stage.default_outputs(), started)
+                    continue
+                if stage.saturated():
+                    run.errors[stage.name] = f"버려진 실행 {stage.abandoned}개가 아직 진행 중이라 실행하지 않음"
+                    finish(stage, SATURATED, stage.default_outputs(), started)
+                    continue
+
+                stage_deadline = deadline.child(stage.timeout) if deadline is not None else Deadline(stage.timeout)
+                if DEADLINE_INPUT in stage.inputs:
+                    kwargs[DEADLINE_INPUT] = stage_deadline
+                running[pool.submit(stage.fn, **kwargs)] = (stage, stage_deadline, key, started)
+            return started_any
+
+        while True:
+            while start_ready():
+                pass
+            if not running:
+                break
+
+            limits = [d.remaining() for _, d, _, _ in running.values() if not d.unlimited]
+            done, _ = wait(list(running), timeout=min(limits) if limits else None, return_when=FIRST_COMPLETED)
+
+            for fut in done:
+                stage, _, key, started = running.pop(fut)
+                try:
+                    outputs = stage.to_outputs(fut.result())
+                except Exception as e:
+                    run.errors[stage.name] = f"{type(e).__name__}: {e}"
+                    finish(stage, ERROR, stage.default_outputs(), started)
+                    continue
+                if key is not None:
+                    stage.cache.put(key, outputs)
+                finish(stage, OK, outputs, started)
+
+            for fut, (stage, stage_deadline, _, started) in list(running.items()):
+                if stage_deadline.expired():
+                    running.pop(fut)
+                    stage_deadline.cancel()
+                    stage.abandon(fut)
+                    finish(stage, TIMEOUT, stage.default_outputs(), started)
+
+            if stop_when is not None and stop_when(values):
+                run.stopped_early = True
+                for fut, (stage, stage_deadline, _, started) in running.items():
+                    stage_deadline.cancel()
+                    stage.abandon(fut)
+                    run.record(stage.name, CANCELLED, time.perf_counter() - started)
+                running.clear()
+                for stage in pending:
+                    run.record(stage.name, CANCELLED)
+                pending.clear()
+                break
+
+        run.elapsed = time.perf_counter() - run.started_at
+        return run
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    # 시간을 넘긴 단계는 결과를 버리고 먼저 반환하므로, 모든 단계는 호출 스레드가 아닌 공유 풀에서 돌립니다.
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=STAGE_POOL_WORKERS, thread_name_prefix="urlbert-stage")
+    return _pool
@@ -2,8 +2,6 @@ import os
 import sys
 import torch
 import torch.nn.functional as F
-import requests
-import random
 import numpy as np
 import re
 from urllib.parse import urlparse # URL 파싱을 위해 추가
@@ -16,9 +14,16 @@ if project_root not in sys.path:
 
 
 from config import (
-    PAD_SIZE, DEVICE, CLASS_LABELS, IMPORTANT_HEADERS,
-    REQUEST_TIMEOUT_SECONDS
+    PAD_SIZE, CLASS_LABELS, MICRO_BATCH_ENABLED, DYNAMIC_PADDING,
+    BATCH_HEADER_WORKERS, BATCH_CHUNK_MAX_SIZE, BATCH_CHUNK_MEMORY_MB,
+    SPECULATIVE_INFERENCE, SPECULATIVE_CONFIDENCE, REQUEST_TIMEOUT_SECONDS
 )
+from .batch_engine import get_batch_executor
+from .padding import bucket_length, pad_batch, get_input_buffers
+from .fast_tokenizer import encode_text
+from . import header_fetcher
+from . import page_fetcher
+from .stage_graph import Stage, StageGraph
 
 # 현재 파일의 디렉토리 (core)
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -31,71 +36,45 @@ if project_root not in sys.path:
 
 # --- HTTP 헤더 정보 추출 함수 ---
 def get_header_info(url: str) -> str:
-    user_agents = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/114 Safari/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 Version/14.0.3 Safari/605.1.15",
-        "Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X) AppleWebKit/605.1.15 Version/14.0 Mobile/15E148 Safari/604.1"
-    ]
-    headers = {
-        "User-Agent": random.choice(user_agents),
-        "Accept-Language": "en-US,en;q=0.9",
-        "Referer": "https://www.google.com/"
-    }
-
-    try:
-        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT_SECONDS, allow_redirects=True)
-        resp_headers = response.headers
-        
-        important = {
-            k: resp_headers.get(k, "") for k in IMPORTANT_HEADERS
-        }
-        header_str = ", ".join(f"{k}: {v}" for k, v in important.items() if v)
-        return header_str if header_str else "NOHEADER"
-    except requests.exceptions.RequestException:
-        return "NOHEADER"
-    except Exception:
-        return "NOHEADER"
+    """중요 헤더를 "키: 값, ..." 문자열로 반환합니다 (실패 시 "NOHEADER"). 실제 요청은 header_fetcher가 담당합니다."""
+    return header_fetcher.get_header_info(url)
 
 # --- 데이터 전처리 함수 ---
-def preprocess_url_for_inference(url: str, header_info: str, tokenizer: BertTokenizer, pad_size: int = PAD_SIZE):
+def encode_url_for_inference(url: str, header_info: str, tokenizer: BertTokenizer, max_len: int = PAD_SIZE) -> list:
+    """[CLS] url [SEP] header [SEP] 를 토큰 id 리스트로 변환합니다 (패딩 없음, max_len으로 자름)."""
     text = f"{url} [SEP] {header_info}"
-    tokenized_text = tokenizer.tokenize(text)
-    
-    tokens = ["[CLS]"] + tokenized_text + ["[SEP]"]
-    ids = tokenizer.convert_tokens_to_ids(tokens)
-    types = [0] * (len(ids))
-    masks = [1] * len(ids)
-
-    if len(ids) < pad_size:
-        types = types + [1] * (pad_size - len(ids))
-        masks = masks + [0] * (pad_size - len(ids))
-        ids = ids + [0] * (pad_size - len(ids))
-    else:
-        types = types[:pad_size]
-        masks = masks[:pad_size]
-        ids = ids[:pad_size]
-
-    assert len(ids) == len(masks) == len(types) == pad_size
-
-    return (
-        torch.tensor([ids], dtype=torch.long).to(DEVICE),
-        torch.tensor([types], dtype=torch.long).to(DEVICE),
-        torch.tensor([masks], dtype=torch.long).to(DEVICE)
-    )
+    ids = encode_text(tokenizer, text)
+
+    ids = [tokenizer.vocab["[CLS]"]] + ids + [tokenizer.vocab["[SEP]"]]
+    return ids[:max_len]
+
+def preprocess_url_for_inference(url: str, header_info: str, tokenizer: BertTokenizer, pad_size: int = PAD_SIZE):
+    """
+    모델 입력 텐서 (ids, types, masks)를 [1, L] 형태로 반환합니다.
+    pad_size=None 이면 고정 512 대신 시퀀스 길이에 맞는 버킷(PAD_BUCKETS) 크기로만 패딩합니다.
+    """
+    ids = encode_url_for_inference(url, header_info, tokenizer, PAD_SIZE)
+    if pad_size is None:
+        pad_size = bucket_length(len(ids))
+    return pad_batch([ids], pad_size)
 
 
 # --- 1. 모델 예측만 수행하는 함수 ---
-def predict_url(url: str, model, tokenizer) -> dict:
-    header_info = get_header_info(url)
-    
+def _predict_probabilities(url: str, header_info: str, model, tokenizer) -> torch.Tensor:
     input_ids, input_types, input_masks = preprocess_url_for_inference(
-        url, header_info, tokenizer, PAD_SIZE
+        url, header_info, tokenizer, None if DYNAMIC_PADDING else PAD_SIZE
     )
 
-    with torch.no_grad():
+    if MICRO_BATCH_ENABLED:
+        # 동시 요청과 묶어서 한 번의 forward로 처리
+        return get_batch_executor(model).predict(input_ids, input_types, input_masks)
+    with torch.inference_mode():
         outputs = model([input_ids, input_types, input_masks])
-        probabilities = F.softmax(outputs, dim=1)
-        predicted_class_id = torch.argmax(probabilities, dim=1).item()
+        return F.softmax(outputs, dim=1)
+
+def _prediction(probabilities: torch.Tensor, header_info: str, speculative: bool = False,
+                incomplete: bool = False) -> dict:
+    predicted_class_id = torch.argmax(probabilities, dim=1).item()
 
     predicted_label = CLASS_LABELS[predicted_class_id]
     confidence = probabilities[0][predicted_class_id].item() # 0~1 사이 값으로 반환
@@ -104,17 +83,59 @@ def predict_url(url: str, model, tokenizer) -> dict:
         "predicted_label": predicted_label,
         "confidence": confidence, # 0~1 사이 값으로 반환
         "predicted_class_id": predicted_class_id,
-        "header_info": header_info 
+        "header_info": header_info,
+        "speculative": speculative,  # 헤더 없이(NOHEADER) 확정한 결과인지
+        "incomplete": incomplete     # 마감 시간 안에 헤더를 받지 못해 NOHEADER로 추론했는지
     }
-# --- 3. URL 분류 및 설명을 통합하는 함수 ---
-def classify_url_and_explain(url: str, model, tokenizer) -> dict:
-    # 1) URL 예측 수행
-    pred_out = predict_url(url, model, tokenizer)
-
-  
 
-
-    # 3) DB 저장용 필드명에 맞춰서 dict 반환
+def _header_stage(url: str, deadline) -> str:
+    # 같은 URL을 크롤링 중이거나 방금 받았다면(page_fetcher) 그 응답의 헤더를 씁니다 (본문 다운로드는 기다리지 않음).
+    # 시간 초과/추측 확정 시 진행 중인 요청까지 끊습니다. (다른 쪽도 기다리는 요청이면 끊지 않음)
+    # 헤더를 받은 뒤에도 대기자 자리를 돌려주므로, 아무도 기다리지 않는 본문 다운로드는 끊길 수 있습니다.
+    return page_fetcher.wait(url, page_fetcher.submit_page(url), deadline=deadline)["header_info"]
+
+def _guess_stage(url: str, model, tokenizer) -> dict:
+    return _prediction(_predict_probabilities(url, "NOHEADER", model, tokenizer), "NOHEADER", speculative=True)
+
+# 헤더 수집과 (추측 추론 시) "url [SEP] NOHEADER" 추론은 서로 독립이라 동시에 실행됩니다.
+HEADER_STAGE = Stage("headers", _header_stage, inputs=("url", "deadline"), outputs=("header_info",),
+                     timeout=REQUEST_TIMEOUT_SECONDS, defaults={"header_info": "NOHEADER"})
+GUESS_STAGE = Stage("guess", _guess_stage, inputs=("url", "model", "tokenizer"), outputs=("guess",))
+_PREDICT_GRAPHS = {False: StageGraph([HEADER_STAGE]), True: StageGraph([HEADER_STAGE, GUESS_STAGE])}
+
+def _confident_guess(values: dict) -> bool:
+    guess = values.get("guess")
+    return guess is not None and guess["confidence"] >= SPECULATIVE_CONFIDENCE
+
+def predict_url(url: str, model, tokenizer, speculative: bool = SPECULATIVE_INFERENCE, deadline=None,
+                header_info: str = None) -> dict:
+    """
+    deadline(core.deadline.Deadline)을 주면 헤더는 남은 시간까지만 기다리고, 못 받으면 incomplete=True 입니다.
+    header_info를 주면(이미 받은 페이지의 헤더) 요청 없이 바로 추론합니다.
+    """
+    if header_info is not None:
+        return _prediction(_predict_probabilities(url, header_info, model, tokenizer), header_info)
+    run = _PREDICT_GRAPHS[bool(speculative)].run(
+        {"url": url, "model": model, "tokenizer": tokenizer}, deadline=deadline,
+        stop_when=_confident_guess if speculative else None
+    )
+    guess = run.values.get("guess")
+    if run.stopped_early:
+        # 추측 추론의 확신도가 충분하면 헤더를 기다리지 않고 바로 반환합니다.
+        return guess
+
+    header_info = run.values["header_info"]
+    incomplete = "headers" in run.incomplete
+    if guess is not None and header_info == "NOHEADER":
+        # 헤더를 못 받았으면 모델 입력이 추측 때와 같으므로 다시 돌리지 않습니다.
+        guess["speculative"] = False
+        guess["incomplete"] = incomplete
+        return guess
+    return _prediction(_predict_probabilities(url, header_info, model, tokenizer), header_info,
+                       incomplete=incomplete)
+# --- 3. URL 분류 및 설명을 통합하는 함수 ---
+def _to_db_record(url: str, pred_out: dict) -> dict:
+    # DB 저장용 필드명에 맞춰서 dict 반환
     is_mal = 1 if pred_out["predicted_label"] == "malicious" else 0
 
     return {
@@ -122,6 +143,83 @@ def classify_url_and_explain(url: str, model, tokenizer) -> dict:
         "header_info": pred_out["header_info"],
         "is_malicious": is_mal,
         "confidence": pred_out["confidence"],    # float 타입
-        "true_label": None                 
-        
+        "true_label": None,
+        "incomplete": pred_out.get("incomplete", False)  # 마감 시간 때문에 헤더 없이 판정 (DB 저장/캐시 대상 아님)
     }
+
+def classify_url_and_explain(url: str, model, tokenizer, deadline=None, header_info: str = None) -> dict:
+    # 1) URL 예측 수행 (deadline이 있으면 헤더는 남은 시간까지만 기다림, header_info가 있으면 요청 생략)
+    pred_out = predict_url(url, model, tokenizer, deadline=deadline, header_info=header_info)
+
+    # 2) DB 저장용 dict 반환
+    return _to_db_record(url, pred_out)
+
+# --- 4. 여러 URL을 한 번에 분류하는 함수 ---
+def estimate_chunk_bytes(batch_size: int, seq_len: int, hidden: int = 768,
+                         heads: int = 12, intermediate: int = 3072) -> int:
+    """
+    추론 1회(inference_mode) 동안의 활성값 메모리를 대략 추정합니다 (fp32 기준).
+    forward는 층별 hidden state를 쌓아 두지 않으므로 한 층의 입력/출력 + attention score/FFN 중간값만 셉니다.
+    """
+    per_seq = 2 * seq_len * hidden + heads * seq_len * seq_len + seq_len * intermediate
+    return 4 * batch_size * per_seq
+
+def _plan_chunks(lengths: list, max_size: int, memory_mb: float, pad_size: int = None) -> list:
+    """
+    길이순으로 정렬한 인덱스를 메모리 상한/최대 개수 안에서 청크로 나눕니다.
+    비슷한 길이끼리 묶이므로 패딩 낭비도 줄어듭니다.
+    pad_size: 모든 청크를 이 길이로 채울 때(DYNAMIC_PADDING=0) 메모리 추정에도 이 길이를 씁니다. None이면 버킷 길이.
+    """
+    budget = memory_mb * 1024 * 1024
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    chunks, cur = [], []
+    for i in order:
+        seq_len = pad_size or bucket_length(max([lengths[j] for j in cur] + [lengths[i]]))
+        if cur and (len(cur) >= max_size or estimate_chunk_bytes(len(cur) + 1, seq_len) > budget):
+            chunks.append(cur)
+            cur = []
+        cur.append(i)
+    if cur:
+        chunks.append(cur)
+    return chunks
+
+def fetch_headers_batch(urls: list, max_workers: int = BATCH_HEADER_WORKERS) -> list:
+    """get_header_info를 여러 URL에 대해 동시에 수행합니다 (입력 순서 유지)."""
+    return header_fetcher.fetch_headers(urls, max_workers)
+
+def classify_urls_batch(urls: list, model, tokenizer,
+                        chunk_max_size: int = BATCH_CHUNK_MAX_SIZE,
+                        chunk_memory_mb: float = BATCH_CHUNK_MEMORY_MB,
+                        header_infos: list = None) -> list:
+    """
+    여러 URL을 한 번에 분류합니다. 반환 리스트의 각 원소는 classify_url_and_explain과 같은 dict이며 입력 순서를 따릅니다.
+    1) 헤더 동시 수집 (header_infos를 넘기면 생략)
+    2) 일괄 토큰화
+    3) 청크 단위 배치 forward (청크당 추정 메모리가 chunk_memory_mb를 넘지 않도록 분할)
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+    if header_infos is None:
+        header_infos = fetch_headers_batch(urls)
+
+    encoded = [encode_url_for_inference(u, h, tokenizer, PAD_SIZE) for u, h in zip(urls, header_infos)]
+    results = [None] * len(urls)
+
+    pad_size = None if DYNAMIC_PADDING else PAD_SIZE
+    for chunk in _plan_chunks([len(ids) for ids in encoded], chunk_max_size, chunk_memory_mb, pad_size):
+        input_ids, input_types, input_masks = get_input_buffers().fill([encoded[i] for i in chunk], pad_size)
+        with torch.inference_mode():
+            outputs = model([input_ids, input_types, input_masks])
+            probabilities = F.softmax(outputs, dim=1)
+        class_ids = torch.argmax(probabilities, dim=1).tolist()
+
+        for row, i in enumerate(chunk):
+            cid = class_ids[row]
+            results[i] = _to_db_record(urls[i], {
+                "predicted_label": CLASS_LABELS[cid],
+                "confidence": probabilities[row][cid].item(),
+                "predicted_class_id": cid,
+                "header_info": header_infos[i],
+            })
+    return results
@@ -0,0 +1,83 @@
+# urlbert/urlbert2/core/warmup.py
+# 모델 지연 로드 + 백그라운드 워밍업 + 준비 상태(readiness) 조회
+#
+# 웹 서버는 모델 없이 바로 뜨고, 필요하면 백그라운드 스레드가 모델을 로드한 뒤
+# 버킷 길이/배치 크기별 더미 배치를 돌려 메모리 할당기와 스레드 풀을 미리 데워 둡니다.
+# 로드 밸런서는 readiness()가 ready일 때만 분석 트래픽을 보내면 됩니다.
+import threading
+import time
+
+import torch
+
+from config import (
+    PAD_BUCKETS, PAD_SIZE, MICRO_BATCH_ENABLED, MICRO_BATCH_MAX_SIZE,
+    SIDECAR_ENABLED, WARMUP_ROUNDS
+)
+from .padding import pad_batch
+from .batch_engine import get_batch_executor
+
+_state = {"status": "cold", "mode": None, "error": None, "seconds": None}
+_state_lock = threading.Lock()
+_thread = None
+
+
+def _set(**kw):
+    with _state_lock:
+        _state.update(kw)
+
+
+def readiness() -> dict:
+    """{"ready": bool, "status": cold|loading|ready|failed, "mode": sidecar|in_process, ...}"""
+    with _state_lock:
+        out = dict(_state)
+    out["ready"] = out["status"] == "ready"
+    return out
+
+
+def warm_model(model, rounds: int = WARMUP_ROUNDS):
+    """버킷 길이 x 배치 크기(1, 최대) 조합으로 더미 forward를 돌립니다."""
+    lengths = PAD_BUCKETS or (PAD_SIZE,)
+    batch_sizes = sorted({1, MICRO_BATCH_MAX_SIZE if MICRO_BATCH_ENABLED else 1})
+    dummy = [101] * 8  # 실제 길이는 pad_size가 정하므로 내용은 상관없음
+    for _ in range(rounds):
+        for L in lengths:
+            for bs in batch_sizes:
+                ids, types, masks = pad_batch([dummy] * bs, L)
+                with torch.inference_mode():
+                    model([ids, types, masks])
+    if MICRO_BATCH_ENABLED:
+        # 배칭 워커 스레드도 미리 띄워 둠
+        ids, types, masks = pad_batch([dummy], lengths[0])
+        get_batch_executor(model).predict(ids, types, masks)
+
+
+def warm_up():
+    """
+    사이드카가 응답하면 사이드카를 사용(사이드카는 스스로 워밍업 후 소켓을 엽니다),
+    아니면 이 프로세스에서 모델을 로드하고 워밍업합니다.
+    """
+    start = time.monotonic()
+    _set(status="loading", error=None)
+    try:
+        if SIDECAR_ENABLED:
+            from .sidecar import SidecarClient
+            if SidecarClient().ping():
+                _set(status="ready", mode="sidecar", seconds=time.monotonic() - start)
+                return
+        from .model_loader import load_inference_model
+        model, _ = load_inference_model()
+        warm_model(model)
+        _set(status="ready", mode="in_process", seconds=time.monotonic() - start)
+    except Exception as e:
+        _set(status="failed", error=f"{type(e).__name__}: {e}", seconds=time.monotonic() - start)
+
+
+def start_background_warmup() -> threading.Thread:
+    """warm_up()을 데몬 스레드로 한 번만 실행합니다."""
+    global _thread
+    with _state_lock:
+        if _thread is not None:
+            return _thread
+        _thread = threading.Thread(target=warm_up, name="urlbert-warmup", daemon=True)
+    _thread.start()
+    return _thread
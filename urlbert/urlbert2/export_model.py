@@ -0,0 +1,24 @@
+# export_model.py
+# 파인튜닝된 분류 모델을 ONNX / TorchScript로 내보냅니다 (패리티 검사 포함).
+#
+# 사용 예 (urlbert2 디렉토리에서 실행):
+#   python export_model.py --backend onnx --backend torchscript
+# 결과: finetune/phishing/checkpoints/modelx_URLBERT_82.<EXPORT_VERSION>.onnx(.json) 등
+# 서버에서는 URLBERT_BACKEND=onnx 처럼 환경변수로 백엔드를 고릅니다.
+import argparse
+
+from core.model_loader import load_fp32_model, export_model
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", action="append", dest="backends", choices=["onnx", "torchscript"])
+    args = parser.parse_args()
+
+    model = load_fp32_model()
+    for backend in args.backends or ["onnx", "torchscript"]:
+        export_model(backend, model)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# finetune/phishing/distill_student.py
+# 12층 URLBERT 분류기(교사)를 4~6층 학생 모델로 증류하고, 교사 대비 정확도/지연시간/크기 리포트를 만듭니다.
+#
+# 사용 예 (urlbert2 디렉토리에서 실행):
+#   python finetune/phishing/distill_student.py --train-csv dataset/train.csv --layers 4
+#   python finetune/phishing/distill_student.py --train-csv dataset/train.csv --eval-csv dataset/test.csv --layers 6
+# CSV에는 'url', 'label'(malicious/benign 또는 1/0) 컬럼이 필요하고, 'header_info'가 있으면 그대로 씁니다.
+#
+# 결과물
+#   - 학생 체크포인트: config.STUDENT_MODEL_PATH (URLBERT_MODEL_VARIANT=student 로 서버에서 바로 로드)
+#   - 리포트: <체크포인트>.report.json
+#
+# 학생 초기화: 교사의 임베딩/분류기 + 고르게 뽑은 인코더 층(예: 4층이면 0, 4, 7, 11번)을 복사합니다.
+# 손실: alpha * T^2 * KL(학생/T || 교사/T) + (1 - alpha) * CE(학생, 정답 라벨)
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from config import DEVICE, VOCAB_FILE_PATH, STUDENT_MODEL_PATH, SEED
+from core.fast_tokenizer import UrlTokenizer
+from core.model_loader import (
+    _build_model_skeleton, load_teacher_model, save_student_checkpoint, load_student_model
+)
+from core.padding import bucket_length, pad_batch
+from bench_utils import load_samples, encode_samples, timed_forward, classification_metrics, model_size_mb
+
+_LAYER_PREFIX = "bert.bert.encoder.layer."
+
+
+def pick_teacher_layers(teacher_layers: int, student_layers: int) -> list:
+    """첫 층과 마지막 층을 포함해 교사 층을 고르게 고릅니다."""
+    if student_layers == 1:
+        return [teacher_layers - 1]
+    return [round(i * (teacher_layers - 1) / (student_layers - 1)) for i in range(student_layers)]
+
+
+def build_student(teacher, num_layers: int):
+    """교사 가중치로 초기화한 학생 모델과 사용한 교사 층 번호를 반환합니다."""
+    layer_map = pick_teacher_layers(teacher.bert.config.num_hidden_layers, num_layers)
+    student = _build_model_skeleton(num_hidden_layers=num_layers)
+    teacher_state = teacher.state_dict()
+    state = {}
+    for name in student.state_dict():
+        src = name
+        if name.startswith(_LAYER_PREFIX):
+            idx, rest = name[len(_LAYER_PREFIX):].split(".", 1)
+            src = f"{_LAYER_PREFIX}{layer_map[int(idx)]}.{rest}"
+        state[name] = teacher_state[src]
+    student.load_state_dict(state)
+    return student, layer_map
+
+
+def split_train_eval(df, ratio: float = 0.8, seed: int = 2024):
+    """train_model.py와 같은 방식(고정 시드 셔플 후 8:2)으로 나눕니다."""
+    order = np.random.RandomState(seed).permutation(len(df))
+    cut = int(len(df) * ratio)
+    return df.iloc[order[:cut]].reset_index(drop=True), df.iloc[order[cut:]].reset_index(drop=True)
+
+
+def distill_loss(student_logits, teacher_logits, labels, temperature: float, alpha: float):
+    soft = F.kl_div(
+        F.log_softmax(student_logits / temperature, dim=-1),
+        F.softmax(teacher_logits / temperature, dim=-1),
+        reduction="batchmean",
+    ) * (temperature ** 2)
+    hard = F.cross_entropy(student_logits, labels)
+    return alpha * soft + (1 - alpha) * hard
+
+
+def train_epoch(student, optimizer, encoded, teacher_logits, labels, args, epoch):
+    student.train()
+    order = np.random.permutation(len(encoded))
+    total = 0.0
+    for step, i in enumerate(range(0, len(order), args.batch_size)):
+        idx = order[i:i + args.batch_size]
+        chunk = [encoded[j] for j in idx]
+        ids, types, masks = pad_batch(chunk, bucket_length(max(len(x) for x in chunk)))
+        t_logits = teacher_logits[idx].to(DEVICE)
+        y = labels[idx].to(DEVICE)
+
+        loss = distill_loss(student([ids, types, masks]), t_logits, y, args.temperature, args.alpha)
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+        total += loss.item()
+        if (step + 1) % 100 == 0:
+            print(f"Epoch {epoch} [{i + len(idx)}/{len(order)}] loss {loss.item():.4f}")
+    return total / max(1, (len(order) + args.batch_size - 1) // args.batch_size)
+
+
+def evaluate(model, encoded, y_true, batch_size: int) -> dict:
+    """정확도 지표 + 지연시간(ms/url) + 모델 크기."""
+    model.eval()
+    elapsed, logits = timed_forward(model, encoded, batch_size)
+    out = classification_metrics(y_true, logits.argmax(dim=1).tolist())
+    out["ms_per_url"] = elapsed / max(1, len(encoded)) * 1000
+    out["size_mb"] = model_size_mb(model)
+    out["params_m"] = sum(p.numel() for p in model.parameters()) / 1e6
+    return out, logits
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--train-csv", required=True, help="라벨이 있는 학습용 CSV")
+    parser.add_argument("--eval-csv", default=None, help="없으면 train CSV의 20%를 평가용으로 사용")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--fetch-headers", action="store_true", help="header_info가 없는 행은 실제로 요청")
+    parser.add_argument("--layers", type=int, default=4, help="학생 인코더 층 수 (4~6 권장)")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--lr", type=float, default=5e-5)
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--alpha", type=float, default=0.7, help="soft(교사) 손실 비중")
+    parser.add_argument("--bench-batch-size", type=int, default=1, help="지연시간 측정 배치 크기")
+    parser.add_argument("--threads", type=int, default=None, help="지연시간 측정 시 torch 스레드 수")
+    parser.add_argument("--output", default=STUDENT_MODEL_PATH)
+    args = parser.parse_args()
+
+    torch.manual_seed(SEED)
+    np.random.seed(SEED)
+
+    tokenizer = UrlTokenizer(VOCAB_FILE_PATH)
+    df = load_samples(args.train_csv, args.limit, fetch_headers=args.fetch_headers)
+    if "label" not in df.columns:
+        raise ValueError("CSV에 'label' 컬럼이 없습니다.")
+    if args.eval_csv:
+        train_df, eval_df = df, load_samples(args.eval_csv, fetch_headers=args.fetch_headers)
+    else:
+        train_df, eval_df = split_train_eval(df)
+    print(f"학습 {len(train_df)}건 / 평가 {len(eval_df)}건")
+
+    train_enc = encode_samples(train_df, tokenizer)
+    eval_enc = encode_samples(eval_df, tokenizer)
+    train_y = torch.tensor(train_df["label"].astype(int).tolist())
+    eval_y = eval_df["label"].astype(int).tolist()
+
+    teacher = load_teacher_model().to(DEVICE).eval()
+    # 교사 logits는 한 번만 계산해 두고 모든 epoch에서 재사용
+    _, teacher_logits = timed_forward(teacher, train_enc, args.batch_size)
+
+    student, layer_map = build_student(teacher, args.layers)
+    student.to(DEVICE)
+    print(f"학생 {args.layers}층 초기화 (교사 층 {layer_map})")
+    optimizer = torch.optim.AdamW(student.parameters(), lr=args.lr, weight_decay=1e-4)
+
+    best_f1, best_state = -1.0, None
+    for epoch in range(1, args.epochs + 1):
+        start = time.time()
+        loss = train_epoch(student, optimizer, train_enc, teacher_logits, train_y, args, epoch)
+        m, _ = evaluate(student, eval_enc, eval_y, args.batch_size)
+        print(f"Epoch {epoch}: loss {loss:.4f}, acc {m['accuracy']:.4f}, F1 {m['f1']:.4f} ({time.time() - start:.0f}s)")
+        if m["f1"] > best_f1:
+            best_f1 = m["f1"]
+            best_state = {k: v.detach().cpu().clone() for k, v in student.state_dict().items()}
+    student.load_state_dict(best_state)
+
+    # --- 리포트: 같은 조건(CPU, 같은 평가셋, 같은 배치 크기)에서 교사와 비교 ---
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    teacher.to("cpu")
+    student.to("cpu")
+    t_metrics, t_logits = evaluate(teacher, eval_enc, eval_y, args.bench_batch_size)
+    s_metrics, s_logits = evaluate(student, eval_enc, eval_y, args.bench_batch_size)
+    agree = (t_logits.argmax(dim=1) == s_logits.argmax(dim=1)).float().mean().item()
+
+    report = {
+        "student_layers": args.layers,
+        "teacher_layers_used": layer_map,
+        "eval_samples": len(eval_enc),
+        "bench_batch_size": args.bench_batch_size,
+        "threads": torch.get_num_threads(),
+        "teacher": t_metrics,
+        "student": s_metrics,
+        "speedup": t_metrics["ms_per_url"] / max(s_metrics["ms_per_url"], 1e-9),
+        "size_ratio": t_metrics["size_mb"] / max(s_metrics["size_mb"], 1e-9),
+        "f1_delta": s_metrics["f1"] - t_metrics["f1"],
+        "prediction_agreement": agree,
+    }
+    for name in ("teacher", "student"):
+        m = report[name]
+        print(f"[{name}] {m['ms_per_url']:.2f} ms/url, {m['size_mb']:.1f} MB ({m['params_m']:.1f}M params), "
+              f"acc={m['accuracy']:.4f} P={m['precision']:.4f} R={m['recall']:.4f} F1={m['f1']:.4f}")
+    print(f"\n속도 x{report['speedup']:.2f}, 크기 x{report['size_ratio']:.2f} 감소, "
+          f"F1 차이 {report['f1_delta']:+.4f}, 예측 일치율 {agree * 100:.2f}%")
+
+    save_student_checkpoint(student, args.output, teacher_layers=layer_map, metrics=report)
+    report_path = os.path.splitext(args.output)[0] + ".report.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"리포트 저장: {report_path}")
+
+    # 저장한 체크포인트가 model_loader 경로로 그대로 로드되는지 확인
+    reloaded = load_student_model(args.output).eval()
+    _, r_logits = timed_forward(reloaded, eval_enc[:8], args.bench_batch_size)
+    if not torch.allclose(r_logits, s_logits[:len(r_logits)], atol=1e-4):
+        raise RuntimeError("저장한 학생 체크포인트를 다시 로드한 결과가 다릅니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,11 @@
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-from pytorch_pretrained_bert import BertTokenizer
+import os
+import sys
+# vocab 경로("./bert_tokenizer")와 마찬가지로 urlbert2 디렉토리에서 실행한다고 가정 (core.fast_tokenizer 사용)
+sys.path.insert(0, os.path.abspath('.'))
+from core.fast_tokenizer import UrlTokenizer
 import pandas as pd
 import numpy as np
 from torch.utils.data import *
@@ -25,16 +29,13 @@ def dataPreprocessFromCSV(filename, input_ids, input_types, input_masks, label):
     :return: None
     """
     pad_size = 200
-    tokenizer = BertTokenizer("./bert_tokenizer/vocab.txt")  # Initialize the tokenizer
+    tokenizer = UrlTokenizer("./bert_tokenizer/vocab.txt")  # Initialize the tokenizer (fast + 구성요소 캐시)
 
     data = pd.read_csv(filename, encoding='utf-8')
     for i, row in tqdm(data.iterrows(), total=len(data)):
         x1 = row['url']  # Replace with the column name in your CSV file where the text data is located
-        x1 = tokenizer.tokenize(x1)
-        tokens = ["[CLS]"] + x1 + ["[SEP]"]
-
         # Get input_id, seg_id, att_mask
-        ids = tokenizer.convert_tokens_to_ids(tokens)
+        ids = [tokenizer.vocab["[CLS]"]] + tokenizer.encode_ids(x1) + [tokenizer.vocab["[SEP]"]]
         types = [0] * (len(ids))
         masks = [1] * len(ids)
 